@@ -0,0 +1,307 @@
+"""
+Benchmarks for header parsing, sample decoding and navigation extraction.
+
+Synthetic SEG-Y files are written to a temporary directory (or --workdir)
+and each benchmark reports the best of several repeats along with
+traces/sec and MB/s. Results are printed as JSON so runs from different
+versions can be compared with --compare.
+
+Usage:
+    python -m benchmarks.run --traces 20000 --samples 500 --output before.json
+    python -m benchmarks.run --output after.json --compare before.json
+"""
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from quicksegy.segy import SegY2D, SegY3D, BinaryHeader, LazyTraceHeader, TraceData, TraceHeader
+from quicksegy.internals.compat import np
+from quicksegy.internals.header_enums import SampleFormat
+from quicksegy.internals.struct_utils import MultiStruct
+
+from quicksegy.writer import write_converted
+
+from benchmarks.synthetic import write_segy
+
+MB = 1024 * 1024
+
+SAMPLE_FORMATS = [
+    SampleFormat.IBM_FLOAT,
+    SampleFormat.INT32,
+    SampleFormat.INT16,
+    SampleFormat.IEEE_FLOAT,
+    SampleFormat.IEEE_DOUBLE,
+    SampleFormat.CHAR,
+]
+
+
+def best_time(func, repeat):
+    """
+    Best wall clock time of repeated calls to func
+
+    :param func: function with no arguments
+    :param repeat: number of calls
+    :return: time in seconds
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def result(name, seconds, traces, nbytes, **params):
+    """
+    Benchmark result as a JSON serialisable dict
+    """
+    seconds = max(seconds, 1e-9)
+    return {
+        'name': name,
+        'params': params,
+        'seconds': seconds,
+        'traces': traces,
+        'bytes': nbytes,
+        'traces_per_sec': traces / seconds,
+        'mb_per_sec': nbytes / MB / seconds,
+    }
+
+
+class BenchmarkFiles:
+    """
+    Lazily written synthetic SEG-Y files shared between benchmarks
+
+    :param directory: directory to write files to
+    :param trace_count: number of traces in each file
+    :param sample_count: number of samples per trace
+    :param inline_count: crosslines per inline for 3D files
+    """
+    def __init__(self, directory, trace_count, sample_count, inline_count):
+        self.directory = Path(directory)
+        self.trace_count = trace_count
+        self.sample_count = sample_count
+        self.inline_count = inline_count
+        self._paths = {}
+
+    def get(self, kind='2d', format_code=SampleFormat.IBM_FLOAT, endian='>'):
+        key = (kind, int(format_code), endian)
+        if key not in self._paths:
+            name = f'{kind}_{int(format_code)}_{"be" if endian == ">" else "le"}.sgy'
+            self._paths[key] = write_segy(
+                self.directory / name,
+                trace_count=self.trace_count,
+                sample_count=self.sample_count,
+                format_code=format_code,
+                endian=endian,
+                inline_count=self.inline_count if kind == '3d' else None,
+            )
+        return self._paths[key]
+
+
+def bench_binary_header(files, repeat, loops=1000):
+    with open(files.get(), 'rb') as f:
+        f.seek(3200)
+        data = f.read(BinaryHeader.SIZE)
+    seconds = best_time(lambda: [BinaryHeader(data) for _ in range(loops)], repeat)
+    return [result('binary_header', seconds, 0, loops * len(data), loops=loops)]
+
+
+def bench_trace_header(files, repeat, loops=10000):
+    with open(files.get(), 'rb') as f:
+        f.seek(3600)
+        data = f.read(TraceHeader.SIZE)
+    multistruct = MultiStruct(TraceHeader.STRUCT_DICT)
+    return [
+        result('trace_header', best_time(lambda: [TraceHeader(data) for _ in range(loops)], repeat),
+               loops, loops * len(data), loops=loops),
+        result('lazy_trace_header_key',
+               best_time(lambda: [LazyTraceHeader(data)['CDP'] for _ in range(loops)], repeat),
+               loops, loops * len(data), loops=loops),
+        result('multistruct_unpack',
+               best_time(lambda: [multistruct.unpack(data) for _ in range(loops)], repeat),
+               loops, loops * len(data), loops=loops),
+    ]
+
+
+def bench_trace_data(files, repeat):
+    results = []
+    for fmt in SAMPLE_FORMATS:
+        for endian in ('>', '<'):
+            sgy = SegY2D(files.get('2d', fmt, endian), endian=endian)
+            count = min(sgy.trace_count, 1000)
+            with open(sgy.filepath, 'rb') as f:
+                blobs = []
+                for i in range(count):
+                    f.seek(sgy.traceindexer.trace_offset(i))
+                    blobs.append(f.read(sgy.trace_size))
+
+            def decode():
+                for blob in blobs:
+                    TraceData(blob, fmt, endian).data
+
+            seconds = best_time(decode, repeat)
+            results.append(result('trace_data', seconds, count, sum(map(len, blobs)),
+                                  format=fmt.name, endian=endian))
+    return results
+
+
+def bench_traces(files, repeat):
+    results = []
+    modes = [False] if np is None else [False, True]
+    for use_numpy in modes:
+        sgy = SegY2D(files.get())
+        sgy.traceindexer.use_numpy = use_numpy
+        nbytes = sgy.trace_count * sgy.trace_size
+        seconds = best_time(lambda: sgy.traces[:], repeat)
+        results.append(result('traces_slice', seconds, sgy.trace_count, nbytes,
+                              use_numpy=use_numpy))
+    return results
+
+
+def bench_header_scan(files, repeat):
+    keys = ['INLINE', 'CROSSLINE', 'CDP_X', 'CDP_Y', 'COORDINATE_SCALAR']
+    results = []
+    for memory_map in (False, True):
+        with SegY3D(files.get('3d'), memory_map=memory_map) as sgy:
+            nbytes = sgy.trace_count * TraceHeader.SIZE
+            seconds = best_time(lambda: sgy.trace_header[:], repeat)
+            results.append(result('header_scan', seconds, sgy.trace_count, nbytes,
+                                  memory_map=memory_map))
+            modes = [False] if np is None else [False, True]
+            for use_numpy in modes:
+                seconds = best_time(
+                    lambda: sgy.headers_columns(keys, use_numpy=use_numpy), repeat
+                )
+                results.append(result('header_columns', seconds, sgy.trace_count, nbytes,
+                                      memory_map=memory_map, use_numpy=use_numpy))
+    return results
+
+
+def bench_sampled_nav(files, repeat, count=500):
+    results = []
+    for kind, cls in (('2d', SegY2D), ('3d', SegY3D)):
+        with cls(files.get(kind)) as sgy:
+            seconds = best_time(lambda: sgy.sampled_nav(count), repeat)
+            samples = len(sgy.sampled_indices(count))
+            results.append(result('sampled_nav', seconds, samples, samples * TraceHeader.SIZE,
+                                  kind=kind, count=count))
+    return results
+
+
+def bench_convert(files, repeat):
+    results = []
+    modes = [False] if np is None else [False, True]
+    for use_numpy in modes:
+        with SegY2D(files.get()) as sgy:
+            target = files.directory / 'converted.sgy'
+            seconds = best_time(
+                lambda: write_converted(sgy, target, SampleFormat.IEEE_FLOAT, '<',
+                                        use_numpy=use_numpy),
+                repeat
+            )
+            nbytes = sgy.trace_count * (sgy.trace_size + TraceHeader.SIZE)
+            results.append(result('convert_ibm_to_ieee', seconds, sgy.trace_count, nbytes,
+                                  use_numpy=use_numpy))
+    return results
+
+
+BENCHMARKS = {
+    'binary_header': bench_binary_header,
+    'trace_header': bench_trace_header,
+    'trace_data': bench_trace_data,
+    'traces': bench_traces,
+    'header_scan': bench_header_scan,
+    'sampled_nav': bench_sampled_nav,
+    'convert': bench_convert,
+}
+
+
+def run(directory, trace_count=10000, sample_count=250, inline_count=100,
+        repeat=3, names=None):
+    """
+    Run benchmarks against synthetic files written to directory
+
+    :param directory: directory for the synthetic SEG-Y files
+    :param trace_count: number of traces in each file
+    :param sample_count: number of samples per trace
+    :param inline_count: crosslines per inline for the 3D file
+    :param repeat: number of repeats for each timing (best is reported)
+    :param names: benchmark names to run (default: all)
+    :return: dict with environment details and a list of results
+    """
+    files = BenchmarkFiles(directory, trace_count, sample_count, inline_count)
+    results = []
+    for name in names or BENCHMARKS:
+        results.extend(BENCHMARKS[name](files, repeat))
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': None if np is None else np.__version__,
+        'trace_count': trace_count,
+        'sample_count': sample_count,
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def result_key(item):
+    return item['name'], json.dumps(item['params'], sort_keys=True)
+
+
+def compare(previous, current):
+    """
+    Ratio of current to previous throughput for matching benchmarks
+
+    :param previous: output of an earlier run
+    :param current: output of this run
+    :return: list of (name, params, speedup) where speedup > 1 is faster
+    """
+    old = {result_key(item): item for item in previous['results']}
+    ratios = []
+    for item in current['results']:
+        before = old.get(result_key(item))
+        if before is not None:
+            ratios.append((item['name'], item['params'], before['seconds'] / item['seconds']))
+    return ratios
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--traces', type=int, default=10000)
+    parser.add_argument('--samples', type=int, default=250)
+    parser.add_argument('--inline-count', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS))
+    parser.add_argument('--workdir', help='directory for synthetic files (default: temporary)')
+    parser.add_argument('--output', help='write JSON results to this file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    args = parser.parse_args(argv)
+
+    options = dict(trace_count=args.traces, sample_count=args.samples,
+                   inline_count=args.inline_count, repeat=args.repeat, names=args.only)
+    if args.workdir:
+        Path(args.workdir).mkdir(parents=True, exist_ok=True)
+        output = run(args.workdir, **options)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            output = run(directory, **options)
+
+    text = json.dumps(output, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    else:
+        print(text)
+
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text())
+        for name, params, speedup in compare(previous, output):
+            print(f'{name:20} {json.dumps(params, sort_keys=True):60} {speedup:6.2f}x',
+                  file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
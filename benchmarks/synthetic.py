@@ -0,0 +1,148 @@
+"""
+Deterministic synthetic SEG-Y files for tests and benchmarks.
+
+Trace header values and samples are derived from the trace index so the
+same arguments always give byte-identical files.
+"""
+import struct
+
+from quicksegy.segy import BinaryHeader, TextHeader, TraceHeader
+from quicksegy.internals.header_enums import SampleFormat
+from quicksegy.internals.ibmfloat import float_to_ibm
+
+
+def sample_value(trace, sample):
+    """
+    Value of a sample in the synthetic data
+
+    Integer formats store the value multiplied by 4.
+    """
+    return (trace + 1) * 0.5 + sample * 0.25
+
+
+def trace_values(trace, sample_count, format_code):
+    """
+    Stored sample values for a trace (before any IBM encoding)
+
+    Integer values that do not fit the sample format wrap around so large
+    files can be written in any format.
+    """
+    fmt = SampleFormat(format_code)
+    values = [sample_value(trace, j) for j in range(sample_count)]
+    if fmt.as_struct not in 'fd' and fmt != SampleFormat.IBM_FLOAT:
+        full = 1 << (8 * fmt.size)
+        if fmt.as_struct.islower():
+            half = full >> 1
+            values = [(int(v * 4) + half) % full - half for v in values]
+        else:
+            values = [int(v * 4) % full for v in values]
+    return values
+
+
+def header_values(trace, sample_count, inline_count):
+    """
+    Trace header values written for a trace
+
+    :param trace: trace index
+    :param sample_count: samples per trace
+    :param inline_count: traces per inline
+    :return: dict of header values
+    """
+    return {
+        'TRACE_NO_LINE': trace + 1,
+        'TRACE_NO_FILE': trace + 1,
+        'SP': 1000 + trace * 5,
+        'CDP': 2000 + trace,
+        'TRACE_ID_CODE': 1,
+        'COORDINATE_SCALAR': -100,
+        'SP_SCALAR': -10,
+        'SAMPLE_COUNT': sample_count,
+        'CDP_X': 50000000 + trace * 1250,
+        'CDP_Y': 600000000 + trace * 2500,
+        'INLINE': 100 + trace // inline_count,
+        'CROSSLINE': 200 + trace % inline_count,
+    }
+
+
+def write_segy(path, trace_count=20, sample_count=10, format_code=1, endian='>',
+               inline_count=None, text=b'', header_func=None, *, revision=0,
+               extended_text=(), extended_headers=0, padding=0, trailers=0,
+               binary_values=None, trace_samples=None):
+    """
+    Write a synthetic SEG-Y file
+
+    With inline_count the traces form a regular inline sorted 3D grid
+    with inline_count crosslines per inline, otherwise every trace is on
+    one inline (a 2D line).
+
+    The REV 1/2 layout options fill the binary header to match, extended
+    trace headers and padding are filled with 0xee bytes.
+
+    :param path: path to write the file to
+    :param trace_count: number of traces
+    :param sample_count: number of samples per trace
+    :param format_code: SEG-Y sample format code
+    :param endian: endianness of the file
+    :param inline_count: number of crosslines per inline for 3D layouts
+    :param text: ascii text to place at the start of the text header
+    :param header_func: optional function(trace_idx, dict) to edit header values
+    :param revision: MAJOR_SEGY_REV_NO
+    :param extended_text: ascii text of each extended text header
+    :param extended_headers: number of extended trace headers per trace
+    :param padding: bytes between the headers and the first trace
+                    (sets FIRST_TRACE_OFFSET)
+    :param trailers: number of 3200 byte data trailer records
+    :param binary_values: dict of extra {key: value} for the binary header
+    :param trace_samples: optional function(trace_idx) giving the sample count
+                          of each trace for variable length files
+    :return: path
+    """
+    fmt = SampleFormat(format_code)
+    xl_count = inline_count if inline_count else trace_count
+    pairs = TraceHeader.STRUCT_DICT
+
+    with open(path, 'wb') as f:
+        f.write(text.decode('ascii').ljust(TextHeader.CHARACTERS).encode('cp037'))
+
+        start_offset = TextHeader.CHARACTERS * (1 + len(extended_text)) + BinaryHeader.SIZE
+        binary = {
+            'SAMPLES_PER_TRACE': sample_count,
+            'SAMPLE_FORMAT_CODE': format_code,
+            'MAJOR_SEGY_REV_NO': revision,
+            'EXTENDED_TEXT_HEADER_COUNT': len(extended_text),
+            'MAX_EXTENDED_TRACE_HEADERS': extended_headers,
+            'FIRST_TRACE_OFFSET': start_offset + padding if padding else 0,
+            'TRAILER_RECORDS': trailers,
+            **(binary_values or {}),
+        }
+        binheader = bytearray(BinaryHeader.SIZE)
+        for key, value in binary.items():
+            pair = BinaryHeader.STRUCT_DICT[key]
+            struct.pack_into(endian + pair.ctype, binheader, pair.offset, value)
+        f.write(binheader)
+
+        for extended in extended_text:
+            f.write(extended.ljust(TextHeader.CHARACTERS).encode('cp037'))
+        f.write(b'\xee' * padding)
+
+        for i in range(trace_count):
+            trace_sample_count = trace_samples(i) if trace_samples else sample_count
+            values = header_values(i, trace_sample_count, xl_count)
+            if header_func:
+                header_func(i, values)
+
+            header = bytearray(TraceHeader.SIZE)
+            for key, value in values.items():
+                struct.pack_into(endian + pairs[key].ctype, header, pairs[key].offset, value)
+            f.write(header)
+            f.write(b'\xee' * (extended_headers * TraceHeader.SIZE))
+
+            samples = trace_values(i, trace_sample_count, fmt)
+            if fmt == SampleFormat.IBM_FLOAT:
+                samples = [float_to_ibm(s) for s in samples]
+            f.write(struct.pack(f'{endian}{len(samples)}{fmt.as_struct}', *samples))
+
+        for i in range(trailers):
+            f.write(f'trailer {i}'.ljust(TextHeader.CHARACTERS).encode('cp037'))
+
+    return path
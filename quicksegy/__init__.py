@@ -1 +1,5 @@
-from .segy import SegY2D, SegY3D
\ No newline at end of file
+from .internals.stats import IOStats
+from .probe import probe
+from .segy import SegY2D, SegY3D
+from .survey import scan_surveys
+from .writer import write_converted, write_subset
@@ -0,0 +1,200 @@
+"""
+Persistent on-disk cache of trace header columns.
+
+Each SEG-Y file gets a single cache file, either as a sidecar next to the
+SEG-Y ('<name>.qsidx') or in a cache directory. The cache stores the file
+identity (path, size, mtime, endianness, header edits and the trace
+layout) and is ignored and rebuilt if any of these no longer match.
+
+File layout:
+    8 bytes magic, 4 byte little endian metadata length,
+    JSON metadata, raw column data in the order listed in the metadata.
+"""
+import array
+import hashlib
+import json
+import os
+import struct
+import sys
+from pathlib import Path
+
+from quicksegy.internals.compat import np, resolve_numpy
+from quicksegy.internals.struct_utils import NUMPY_CODES
+
+MAGIC = b'QSGYIDX1'
+SUFFIX = '.qsidx'
+LENGTH_STRUCT = struct.Struct('<I')
+_PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+
+def caller_stacklevel():
+    """
+    warnings.warn stacklevel of the first caller outside quicksegy (eg: SegY(...))
+    """
+    level = 1
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_code.co_filename.startswith(_PACKAGE_DIR):
+        frame = frame.f_back
+        level += 1
+    return level
+
+
+def layout_key(layout, sample_size):
+    """
+    Where the traces of a file are, as used to read it
+
+    :param layout: TraceLayout or TraceOffsets of the file
+    :param sample_size: size of a single sample
+    :return: JSON serialisable dict
+    """
+    return {
+        'start_offset': layout.start_offset,
+        'header_size': layout.header_size,
+        'trace_size': layout.trace_size,
+        'trace_count': layout.trace_count,
+        'trailer_count': getattr(layout, 'trailer_count', 0),
+        'sample_size': sample_size,
+    }
+
+
+def file_key(path, endian, header_edits, layout=None, sample_size=None):
+    """
+    Identity of a SEG-Y file and the way its trace headers are read
+
+    :param path: path to the SEG-Y file
+    :param endian: endianness used to read the file
+    :param header_edits: trace header edits {'key': StructPair}
+    :param layout: TraceLayout or TraceOffsets the traces are read with
+                   (binary header edits and overrides change it)
+    :param sample_size: size of a single sample
+    :return: JSON serialisable dict
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    edits = header_edits if header_edits else {}
+    key = {
+        'path': str(path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'endian': endian,
+        'edits': sorted(
+            [key, pair.offset, pair.ctype, pair.ibm_float] for key, pair in edits.items()
+        ),
+    }
+    if layout is not None:
+        key['layout'] = layout_key(layout, sample_size)
+    return key
+
+
+def cache_path(path, directory=None, suffix=SUFFIX):
+    """
+    Location of a cache file for a SEG-Y file
+
+    :param path: path to the SEG-Y file
+    :param directory: cache directory, if None the cache file is next to the SEG-Y
+    :param suffix: suffix of the cache file
+    :return: Path of the cache file
+    """
+    path = Path(path)
+    if directory is None:
+        return path.with_name(path.name + suffix)
+    digest = hashlib.sha1(str(path.resolve()).encode('utf8')).hexdigest()
+    return Path(directory) / (digest + suffix)
+
+
+class HeaderCache:
+    """
+    Store and retrieve trace header columns for SEG-Y files
+
+    :param directory: cache directory, if None cache files are written
+                      next to the SEG-Y files
+    """
+    def __init__(self, directory=None):
+        self.directory = None if directory is None else Path(directory)
+
+    def cache_path(self, path):
+        """
+        Location of the cache file for a SEG-Y file
+
+        :param path: path to the SEG-Y file
+        :return: Path of the cache file
+        """
+        return cache_path(path, self.directory, SUFFIX)
+
+    def _read(self, cache_path):
+        with cache_path.open('rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None, None
+            size, = LENGTH_STRUCT.unpack(f.read(LENGTH_STRUCT.size))
+            meta = json.loads(f.read(size).decode('utf8'))
+            return meta, f.read()
+
+    def load(self, key, keys=None, use_numpy=None):
+        """
+        Load cached columns if the cache matches the file key
+
+        :param key: file key from file_key
+        :param keys: header keys wanted (default: everything in the cache)
+        :param use_numpy: return numpy arrays (default: if numpy is installed)
+        :return: dict of {key: column} or None if the cache is missing or stale
+        """
+        use_numpy = resolve_numpy(use_numpy)
+        cache_path = self.cache_path(key['path'])
+        try:
+            meta, data = self._read(cache_path)
+        except (OSError, ValueError):
+            return None
+        if meta is None or meta['key'] != key:
+            return None
+
+        columns = {}
+        position = 0
+        for name, typecode, nbytes in meta['columns']:
+            if keys is None or name in keys:
+                raw = data[position:position + nbytes]
+                if use_numpy:
+                    dtype = np.dtype(NUMPY_CODES[typecode])
+                    if meta['byteorder'] != sys.byteorder:
+                        dtype = dtype.newbyteorder('S')
+                    column = np.frombuffer(raw, dtype=dtype).astype(dtype.newbyteorder('='))
+                else:
+                    column = array.array(typecode)
+                    column.frombytes(raw)
+                    if meta['byteorder'] != sys.byteorder:
+                        column.byteswap()
+                columns[name] = column
+            position += nbytes
+
+        if keys is not None and any(name not in columns for name in keys):
+            return None
+        return columns
+
+    def save(self, key, columns, typecodes):
+        """
+        Write columns to the cache, replacing any existing entry
+
+        :param key: file key from file_key
+        :param columns: dict of {key: column} (numpy arrays or array.array)
+        :param typecodes: dict of {key: array typecode} for the columns
+        :return: Path of the cache file
+        """
+        cache_path = self.cache_path(key['path'])
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+        blobs = [(name, typecodes[name], column.tobytes()) for name, column in columns.items()]
+        meta = {
+            'key': key,
+            'byteorder': sys.byteorder,
+            'columns': [[name, typecode, len(blob)] for name, typecode, blob in blobs],
+        }
+        meta_bytes = json.dumps(meta).encode('utf8')
+
+        temp_path = cache_path.with_name(cache_path.name + '.tmp')
+        with temp_path.open('wb') as f:
+            f.write(MAGIC)
+            f.write(LENGTH_STRUCT.pack(len(meta_bytes)))
+            f.write(meta_bytes)
+            for _, _, blob in blobs:
+                f.write(blob)
+        os.replace(str(temp_path), str(cache_path))
+        return cache_path
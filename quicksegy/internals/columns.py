@@ -0,0 +1,132 @@
+"""
+Decode selected header fields from many headers at once into columns.
+
+Headers are expected to be regularly spaced in a buffer, either packed
+together or at a fixed stride within the trace data.
+"""
+import array
+import struct
+
+from quicksegy.internals.compat import np, resolve_numpy
+from quicksegy.internals.ibmfloat import ibm_words_to_float
+from quicksegy.internals.struct_utils import DOUBLE, NUMPY_CODES
+
+# array.array codes for struct codes where the sizes differ (array 'l' may be 8 bytes)
+ARRAY_CODES = {'l': 'i', 'L': 'I'}
+
+
+class ColumnDecoder:
+    """
+    Decode a subset of header keys into one typed column per key.
+
+    Columns are numpy arrays if numpy is available (and not disabled),
+    otherwise array.array objects.
+
+    :param struct_dict: full header struct dictionary {'key': StructPair}
+    :param keys: header keys to extract
+    :param endian: endianness of the header data
+    :param use_numpy: use numpy arrays (default: if numpy is installed)
+    """
+    def __init__(self, struct_dict, keys, endian='>', use_numpy=None):
+        missing = [key for key in keys if key not in struct_dict]
+        if missing:
+            raise KeyError(f'Unknown header keys: {missing}')
+
+        self.endian = endian
+        self.use_numpy = resolve_numpy(use_numpy)
+        self.keys = list(keys)
+        self.pairs = {key: struct_dict[key] for key in self.keys}
+
+    def typecode(self, key):
+        """
+        array.array typecode of the output column for a key
+        """
+        pair = self.pairs[key]
+        if pair.ibm_float:
+            return DOUBLE
+        return ARRAY_CODES.get(pair.ctype, pair.ctype)
+
+    def empty(self):
+        """
+        Create an empty set of columns to decode into
+        """
+        if self.use_numpy:
+            return {key: [] for key in self.keys}
+        return {key: array.array(self.typecode(key)) for key in self.keys}
+
+    def _decode_numpy(self, pair, buffer, offset, count, record_size):
+        dtype = np.dtype(self.endian + NUMPY_CODES[pair.ctype])
+        values = np.ndarray(shape=(count,), dtype=dtype, buffer=buffer,
+                            offset=offset + pair.offset, strides=(record_size,))
+        if pair.ibm_float:
+            return ibm_words_to_float(values)
+        # Copy to native byte order so nothing holds on to the source buffer
+        return values.astype(dtype.newbyteorder('='))
+
+    def _decode_python(self, pair, buffer, offset, count, record_size):
+        size = struct.calcsize(pair.ctype)
+        view = memoryview(buffer)[offset:offset + count * record_size]
+        if len(view) == count * record_size:
+            stride_struct = struct.Struct(
+                f'{self.endian}{pair.offset}x{pair.ctype}{record_size - pair.offset - size}x'
+            )
+            values = [val for val, in stride_struct.iter_unpack(view)]
+        else:
+            # Buffer stops short after the final header, unpack one at a time
+            value_struct = struct.Struct(self.endian + pair.ctype)
+            values = [
+                value_struct.unpack_from(view, i * record_size + pair.offset)[0]
+                for i in range(count)
+            ]
+        if pair.ibm_float:
+            return ibm_words_to_float(values)
+        return values
+
+    def decode_into(self, columns, buffer, offset, count, record_size):
+        """
+        Decode regularly spaced headers from a buffer and add them to columns
+
+        :param columns: columns from empty()
+        :param buffer: buffer containing the headers
+        :param offset: offset of the first header in the buffer
+        :param count: number of headers in the buffer
+        :param record_size: distance in bytes between the start of each header
+        """
+        if count <= 0:
+            return
+        for key in self.keys:
+            pair = self.pairs[key]
+            if self.use_numpy:
+                columns[key].append(
+                    self._decode_numpy(pair, buffer, offset, count, record_size)
+                )
+            else:
+                columns[key].extend(
+                    self._decode_python(pair, buffer, offset, count, record_size)
+                )
+
+    def finish(self, columns, reverse=False):
+        """
+        Join decoded chunks into the final columns
+
+        :param columns: columns from empty() after decoding
+        :param reverse: reverse the order of the columns
+        :return: dict of {key: column}
+        """
+        if self.use_numpy:
+            result = {}
+            for key, chunks in columns.items():
+                if chunks:
+                    result[key] = np.concatenate(chunks)
+                else:
+                    dtype = np.float64 if self.pairs[key].ibm_float else \
+                        np.dtype(NUMPY_CODES[self.pairs[key].ctype])
+                    result[key] = np.empty(0, dtype=dtype)
+            if reverse:
+                result = {key: col[::-1].copy() for key, col in result.items()}
+            return result
+
+        if reverse:
+            for col in columns.values():
+                col.reverse()
+        return columns
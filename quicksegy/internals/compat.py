@@ -0,0 +1,27 @@
+"""
+Optional dependency and Python version handling.
+"""
+import asyncio
+
+try:
+    import numpy as np
+except ModuleNotFoundError:
+    np = None
+
+
+def resolve_numpy(use_numpy=None):
+    """
+    Decide whether to use numpy
+
+    :param use_numpy: True, False or None to use numpy if it is installed
+    :return: bool
+    """
+    if use_numpy is None:
+        return np is not None
+    elif use_numpy and np is None:
+        raise ModuleNotFoundError('Module \'numpy\' could not be found')
+    return bool(use_numpy)
+
+
+# asyncio.get_running_loop is new in Python 3.7
+get_running_loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)
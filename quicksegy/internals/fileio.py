@@ -0,0 +1,295 @@
+"""
+Positional file reads that can be shared between threads.
+
+Includes a read planner that merges many small fixed size reads
+(eg: trace headers) into a few large vectored reads and a file to file
+copy that avoids passing the data through Python where possible.
+"""
+import errno
+import os
+import threading
+from collections import namedtuple
+from pathlib import Path
+
+HAS_PREAD = hasattr(os, 'pread')
+HAS_PREADV = hasattr(os, 'preadv')
+
+COPY_CHUNK = 2**24
+# Errors meaning a zero-copy call is unsupported for these files rather than failed
+_COPY_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP,
+                     getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP)}
+
+try:
+    IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, ValueError, OSError):
+    IOV_MAX = 1024
+if IOV_MAX <= 0:
+    IOV_MAX = 1024
+
+# offset and size of a merged read, targets are (offset in block, request position)
+ReadBlock = namedtuple('ReadBlock', 'offset size targets')
+
+
+def plan_reads(offsets, size, max_gap=0, max_size=2**24):
+    """
+    Merge fixed size reads at the given offsets into larger reads
+
+    Reads are merged when the gap between them is at most max_gap bytes,
+    up to a total read size of max_size.
+
+    :param offsets: file offsets to read, in request order
+    :param size: size of each read
+    :param max_gap: largest gap between two reads to read through
+    :param max_size: maximum size of a merged read
+    :return: list of ReadBlock sorted by offset
+    """
+    blocks = []
+    start = end = None
+    targets = []
+    for position in sorted(range(len(offsets)), key=offsets.__getitem__):
+        offset = offsets[position]
+        if targets and offset - end <= max_gap and offset + size - start <= max_size:
+            targets.append((offset - start, position))
+            end = max(end, offset + size)
+        else:
+            if targets:
+                blocks.append(ReadBlock(start, end - start, targets))
+            start, end = offset, offset + size
+            targets = [(0, position)]
+    if targets:
+        blocks.append(ReadBlock(start, end - start, targets))
+    return blocks
+
+
+class PositionalReader:
+    """
+    Read blocks at given offsets from a file
+
+    Uses os.pread/os.preadv where available so reads from several threads
+    do not interfere with each other, otherwise falls back to seek and read
+    under a lock.
+
+    Short reads (eg: from network filesystems) are continued until the
+    request is filled, reaching the end of the file first raises EOFError.
+
+    :param path: path to the file
+    :param stats: IOStats to record reads in (default: not recorded)
+    """
+    def __init__(self, path, stats=None):
+        self.path = Path(path)
+        self.stats = stats
+        self.handle = self.path.open('rb')
+        if stats is not None:
+            stats.count('opens')
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.handle.close()
+
+    def pread(self, size, offset):
+        """
+        Read size bytes from offset
+
+        :param size: number of bytes to read
+        :param offset: position in the file
+        :return: bytes
+        """
+        if self.stats is not None:
+            with self.stats.timed('read'):
+                data = self._pread(size, offset)
+            self.stats.count('reads')
+            self.stats.count('bytes_read', len(data))
+            return data
+        return self._pread(size, offset)
+
+    def _seek(self, offset):
+        if self.stats is not None:
+            self.stats.count('seeks')
+        self.handle.seek(offset)
+
+    def _pread(self, size, offset):
+        if HAS_PREAD:
+            data = os.pread(self.handle.fileno(), size, offset)
+        else:
+            with self._lock:
+                self._seek(offset)
+                data = self.handle.read(size)
+        if len(data) == size:
+            return data
+        buffer = bytearray(size)
+        buffer[:len(data)] = data
+        self._readv([memoryview(buffer)[len(data):]], offset + len(data))
+        return bytes(buffer)
+
+    def readv(self, buffers, offset):
+        """
+        Fill a sequence of writable buffers with consecutive data from offset
+
+        :param buffers: list of writable buffers
+        :param offset: position in the file
+        :return: number of bytes read
+        """
+        if self.stats is not None:
+            with self.stats.timed('read'):
+                read = self._readv(buffers, offset)
+            self.stats.count('reads')
+            self.stats.count('bytes_read', read)
+            return read
+        return self._readv(buffers, offset)
+
+    def _readv(self, buffers, offset):
+        buffers = [memoryview(buffer).cast('B') for buffer in buffers]
+        total = sum(len(buffer) for buffer in buffers)
+        done = 0
+        while buffers:
+            if HAS_PREADV:
+                read = os.preadv(self.handle.fileno(), buffers, offset + done)
+            else:
+                with self._lock:
+                    self._seek(offset + done)
+                    read = self.handle.readinto(buffers[0])
+            if not read:
+                raise EOFError(f'End of {self.path} at {offset + done} bytes, '
+                               f'reading {total} bytes from {offset}')
+            done += read
+            # Continue a short read from where it stopped
+            while buffers and read >= len(buffers[0]):
+                read -= len(buffers.pop(0))
+            if read:
+                buffers[0] = buffers[0][read:]
+        return total
+
+    def copy_to(self, dst, offset, count):
+        """
+        Copy count bytes from offset to the current position of dst (see copy_range)
+
+        :param dst: file object opened for binary writing
+        :param offset: position in the file
+        :param count: number of bytes to copy
+        :return: number of bytes copied
+        """
+        if self.stats is None:
+            copied = copy_range(self.handle, dst, offset, count)
+        else:
+            with self.stats.timed('read'):
+                copied = copy_range(self.handle, dst, offset, count)
+            self.stats.count('reads')
+            self.stats.count('bytes_read', copied)
+        if copied < count:
+            raise EOFError(f'End of {self.path} at {offset + copied} bytes, '
+                           f'copying {count} bytes from {offset}')
+        return copied
+
+    def readinto(self, buffer, offset):
+        """
+        Fill a writable buffer with data from offset
+
+        :param buffer: writable buffer
+        :param offset: position in the file
+        :return: number of bytes read
+        """
+        return self.readv([buffer], offset)
+
+    def gather(self, offsets, size, max_gap=0, max_size=2**24):
+        """
+        Read fixed size blocks at many offsets with as few reads as possible
+
+        Nearby reads are merged (see plan_reads) and data is scattered
+        directly into the output, gaps between reads go to a scratch buffer.
+
+        :param offsets: file offsets to read, in request order
+        :param size: size of each read
+        :param max_gap: largest gap between two reads to read through
+        :param max_size: maximum size of a merged read
+        :return: bytearray of len(offsets) * size with the blocks in request order
+        """
+        output = bytearray(len(offsets) * size)
+        view = memoryview(output)
+        scratch = None
+
+        for block in plan_reads(offsets, size, max_gap, max_size):
+            buffers = []
+            position = 0
+            for rel, target in block.targets:
+                if rel < position:
+                    # Overlapping reads can't be scattered, read the block and copy
+                    buffers = None
+                    break
+                if rel > position:
+                    if scratch is None or len(scratch) < rel - position:
+                        scratch = memoryview(bytearray(max(max_gap, rel - position)))
+                    buffers.append(scratch[:rel - position])
+                buffers.append(view[target * size:(target + 1) * size])
+                position = rel + size
+
+            if buffers is not None and len(buffers) <= IOV_MAX:
+                self.readv(buffers, block.offset)
+            else:
+                data = bytearray(block.size)
+                self.readinto(data, block.offset)
+                for rel, target in block.targets:
+                    view[target * size:(target + 1) * size] = data[rel:rel + size]
+        return output
+
+
+def _copy_buffered(src, dst, offset, count):
+    buffer = bytearray(min(count, COPY_CHUNK))
+    view = memoryview(buffer)
+    copied = 0
+    while copied < count:
+        size = min(len(buffer), count - copied)
+        src.seek(offset + copied)
+        read = src.readinto(view[:size])
+        if not read:
+            break
+        dst.write(view[:read])
+        copied += read
+    return copied
+
+
+def copy_range(src, dst, offset, count):
+    """
+    Copy count bytes from offset in src to the current position of dst
+
+    Uses os.copy_file_range or os.sendfile so the data stays in the kernel
+    (or is shared on filesystems supporting reflinks), falling back to
+    buffered reads and writes.
+
+    :param src: file object opened for binary reading
+    :param dst: file object opened for binary writing
+    :param offset: position in src to copy from
+    :param count: number of bytes to copy
+    :return: number of bytes copied (less than count if src is short)
+    """
+    dst.flush()
+    in_fd, out_fd = src.fileno(), dst.fileno()
+    copied = 0
+    try:
+        for name in ('copy_file_range', 'sendfile'):
+            func = getattr(os, name, None)
+            if func is None:
+                continue
+            try:
+                while copied < count:
+                    size = min(count - copied, COPY_CHUNK)
+                    if name == 'copy_file_range':
+                        done = func(in_fd, out_fd, size, offset + copied)
+                    else:
+                        done = func(out_fd, in_fd, offset + copied, size)
+                    if not done:
+                        return copied
+                    copied += done
+                return copied
+            except OSError as e:
+                if copied or e.errno not in _COPY_UNSUPPORTED:
+                    raise
+    finally:
+        # Keep the file object position in step with the descriptor
+        dst.seek(os.lseek(out_fd, 0, os.SEEK_CUR))
+    return copied + _copy_buffered(src, dst, offset + copied, count - copied)
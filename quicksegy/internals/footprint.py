@@ -0,0 +1,324 @@
+"""
+Exact 3D survey footprints built from every trace.
+
+Trace headers are streamed once. Inline/crossline numbers mark bins in an
+occupancy grid (one byte per bin, so memory depends on the survey extent
+rather than the number of traces) and the bin grid to map coordinate
+transform is fitted by least squares from running sums.
+
+The outline is the union of the occupied bins, so notches and holes in
+the survey are kept, mapped into map coordinates by the fitted transform.
+Surveys of a single inline or crossline can't be fitted as a grid, they
+are fitted as a line and given square bins (a buffer of the line).
+"""
+from functools import reduce
+from math import gcd
+
+try:
+    import shapely.geometry as geometry
+    from shapely.affinity import affine_transform
+    from shapely.ops import unary_union
+except ModuleNotFoundError:
+    geometry = None
+
+from quicksegy.internals.compat import np
+
+# Default limit on the size of the occupancy grid (one byte per bin)
+MAX_BINS = 2**28
+
+
+class OccupancyGrid:
+    """
+    Record which inline/crossline bins contain traces
+
+    Rows are kept per inline as bytearrays over the crossline range seen
+    so far, growing when new crosslines extend the range.
+
+    :param max_bins: largest number of bins (inlines * crossline range),
+                     a ValueError is raised beyond this (eg: junk line numbers)
+    """
+    def __init__(self, max_bins=MAX_BINS):
+        self.rows = {}
+        self.origin = None
+        self.width = 0
+        self.max_bins = max_bins
+
+    def _check_size(self, rows, width):
+        if rows * width > self.max_bins:
+            raise ValueError(
+                f'Occupancy grid of {rows} inlines by {width} crosslines is over '
+                f'max_bins ({self.max_bins}), check the inline and crossline values'
+            )
+
+    def _grow(self, low, high):
+        if self.origin is None:
+            self._check_size(1, high - low + 1)
+            self.origin, self.width = low, high - low + 1
+            return
+        new_origin = min(self.origin, low)
+        new_width = max(self.origin + self.width, high + 1) - new_origin
+        if new_origin == self.origin and new_width == self.width:
+            return
+        self._check_size(max(1, len(self.rows)), new_width)
+        before = self.origin - new_origin
+        after = new_width - self.width - before
+        for inline, row in self.rows.items():
+            self.rows[inline] = bytearray(before) + row + bytearray(after)
+        self.origin, self.width = new_origin, new_width
+
+    def _row(self, inline):
+        row = self.rows.get(inline)
+        if row is None:
+            self._check_size(len(self.rows) + 1, self.width)
+            row = self.rows[inline] = bytearray(self.width)
+        return row
+
+    def add(self, inlines, crosslines):
+        """
+        Mark the bins for columns of inline and crossline numbers
+
+        :param inlines: inline number of each trace
+        :param crosslines: crossline number of each trace
+        """
+        if len(inlines) == 0:
+            return
+        self._grow(int(min(crosslines)), int(max(crosslines)))
+
+        if np is not None and isinstance(inlines, np.ndarray):
+            order = np.argsort(inlines, kind='stable')
+            inlines = inlines[order]
+            positions = np.asarray(crosslines)[order].astype(np.int64) - self.origin
+            splits = np.flatnonzero(np.diff(inlines)) + 1
+            for line, group in zip(inlines[np.r_[0, splits]].tolist(),
+                                   np.split(positions, splits)):
+                np.frombuffer(self._row(line), dtype=np.uint8)[group] = 1
+            return
+
+        origin = self.origin
+        for line, crossline in zip(inlines, crosslines):
+            self._row(line)[crossline - origin] = 1
+
+    @property
+    def inline_step(self):
+        """
+        Increment between inline numbers
+        """
+        lines = sorted(self.rows)
+        return reduce(gcd, (b - a for a, b in zip(lines, lines[1:])), 0) or 1
+
+    @property
+    def crossline_step(self):
+        """
+        Increment between crossline numbers
+        """
+        used = reduce(lambda a, b: a | b,
+                      (int.from_bytes(row, 'little') for row in self.rows.values()), 0)
+        used = used.to_bytes(self.width, 'little')
+        step = 0
+        previous = used.find(1)
+        position = used.find(1, previous + 1)
+        while position != -1:
+            step = gcd(step, position - previous)
+            previous, position = position, used.find(1, position + 1)
+        return step or 1
+
+    @property
+    def bin_count(self):
+        """
+        Number of occupied bins
+        """
+        return sum(row.count(1) for row in self.rows.values())
+
+    def runs(self):
+        """
+        Runs of consecutive occupied bins along each inline
+
+        :return: generator of (inline, first crossline, last crossline)
+        """
+        xl_step = self.crossline_step
+        for inline in sorted(self.rows):
+            row = self.rows[inline]
+            start = previous = None
+            position = row.find(1)
+            while position != -1:
+                if start is not None and position != previous + xl_step:
+                    yield inline, self.origin + start, self.origin + previous
+                    start = None
+                if start is None:
+                    start = position
+                previous = position
+                position = row.find(1, position + 1)
+            if start is not None:
+                yield inline, self.origin + start, self.origin + previous
+
+
+class AffineFit:
+    """
+    Least squares fit of map coordinates from inline/crossline numbers
+
+    Only running sums are kept. Values are taken relative to the first
+    point so the sums stay well conditioned for large coordinates.
+    """
+    def __init__(self):
+        self.base = None
+        # sums of 1, il, xl, il*il, il*xl, xl*xl, x, il*x, xl*x, y, il*y, xl*y
+        self.sums = [0.0] * 12
+
+    def add(self, inlines, crosslines, x, y):
+        """
+        Add columns of points to the fit
+
+        :param inlines: inline numbers
+        :param crosslines: crossline numbers
+        :param x: map x coordinates
+        :param y: map y coordinates
+        """
+        if len(inlines) == 0:
+            return
+        if self.base is None:
+            self.base = (float(inlines[0]), float(crosslines[0]), float(x[0]), float(y[0]))
+        il0, xl0, x0, y0 = self.base
+
+        if np is not None and isinstance(inlines, np.ndarray):
+            il = inlines - il0
+            xl = crosslines - xl0
+            dx = np.asarray(x, dtype=np.float64) - x0
+            dy = np.asarray(y, dtype=np.float64) - y0
+            terms = [len(il), il.sum(), xl.sum(), (il * il).sum(), (il * xl).sum(),
+                     (xl * xl).sum(), dx.sum(), (il * dx).sum(), (xl * dx).sum(),
+                     dy.sum(), (il * dy).sum(), (xl * dy).sum()]
+        else:
+            terms = [0.0] * 12
+            for il, xl, dx, dy in zip(inlines, crosslines, x, y):
+                il, xl, dx, dy = il - il0, xl - xl0, dx - x0, dy - y0
+                for i, value in enumerate((1, il, xl, il * il, il * xl, xl * xl,
+                                           dx, il * dx, xl * dx, dy, il * dy, xl * dy)):
+                    terms[i] += value
+        self.sums = [total + float(term) for total, term in zip(self.sums, terms)]
+
+    def solve(self, inline_step=1, crossline_step=1):
+        """
+        Solve for the transform
+
+        Points on a single inline or crossline are fitted as a line, the
+        other direction is taken perpendicular to it with square bins.
+
+        :param inline_step: increment between inline numbers
+        :param crossline_step: increment between crossline numbers
+        :return: shapely style affine parameters [a, b, d, e, xoff, yoff]
+                 where x = a * inline + b * crossline + xoff
+                 and y = d * inline + e * crossline + yoff
+        """
+        n, s_il, s_xl, s_ilil, s_ilxl, s_xlxl, s_x, s_ilx, s_xlx, s_y, s_ily, s_xly = self.sums
+        matrix = [[s_ilil, s_ilxl, s_il],
+                  [s_ilxl, s_xlxl, s_xl],
+                  [s_il, s_xl, n]]
+        x_coef = _solve3(matrix, [s_ilx, s_xlx, s_x])
+        y_coef = _solve3(matrix, [s_ily, s_xly, s_y])
+        if x_coef is None or y_coef is None:
+            x_coef, y_coef = self._solve_line(inline_step, crossline_step)
+
+        il0, xl0, x0, y0 = self.base
+        a, b, c = x_coef
+        d, e, f = y_coef
+        return [a, b, d, e,
+                x0 + c - a * il0 - b * xl0,
+                y0 + f - d * il0 - e * xl0]
+
+    def _solve_line(self, inline_step, crossline_step):
+        """
+        Fit points along a single inline or crossline
+
+        :return: relative ([a, b, c], [d, e, f]) coefficients as for the grid fit
+        """
+        n, s_il, s_xl, s_ilil, _, s_xlxl, s_x, s_ilx, s_xlx, s_y, s_ily, s_xly = self.sums
+        il_var = n * s_ilil - s_il * s_il
+        xl_var = n * s_xlxl - s_xl * s_xl
+        tolerance = 1e-9 * n * n
+        if il_var <= tolerance and xl_var > tolerance:
+            # A single inline, the line runs along the crosslines
+            s_t, s_tx, s_ty, var = s_xl, s_xlx, s_xly, xl_var
+            ratio = crossline_step / inline_step
+            along_crosslines = True
+        elif xl_var <= tolerance and il_var > tolerance:
+            s_t, s_tx, s_ty, var = s_il, s_ilx, s_ily, il_var
+            ratio = inline_step / crossline_step
+            along_crosslines = False
+        else:
+            raise ValueError('Inline and crossline numbers do not form a line or 2D grid')
+
+        along_x = (n * s_tx - s_t * s_x) / var
+        along_y = (n * s_ty - s_t * s_y) / var
+        c = (s_x - along_x * s_t) / n
+        f = (s_y - along_y * s_t) / n
+        # A step across the line covers the same distance as a step along it
+        across_x, across_y = -along_y * ratio, along_x * ratio
+        if along_crosslines:
+            return [across_x, along_x, c], [across_y, along_y, f]
+        return [along_x, across_x, c], [along_y, across_y, f]
+
+
+def _det3(m):
+    return (m[0][0] * (m[1][1] * m[2][2] - m[1][2] * m[2][1])
+            - m[0][1] * (m[1][0] * m[2][2] - m[1][2] * m[2][0])
+            + m[0][2] * (m[1][0] * m[2][1] - m[1][1] * m[2][0]))
+
+
+def _solve3(matrix, rhs):
+    det = _det3(matrix)
+    scale = max(abs(v) for row in matrix for v in row) or 1.0
+    if abs(det) <= 1e-12 * scale ** 3:
+        return None
+    result = []
+    for col in range(3):
+        replaced = [[rhs[r] if c == col else matrix[r][c] for c in range(3)] for r in range(3)]
+        result.append(_det3(replaced) / det)
+    return result
+
+
+class Footprint:
+    """
+    Occupied bins of a 3D survey and their position on the map
+
+    :param grid: OccupancyGrid of the traces
+    :param transform: affine parameters from AffineFit.solve
+    :param trace_count: number of traces scanned
+    """
+    def __init__(self, grid, transform, trace_count):
+        self.grid = grid
+        self.transform = transform
+        self.trace_count = trace_count
+
+    @property
+    def bin_count(self):
+        return self.grid.bin_count
+
+    def to_map(self, inline, crossline):
+        """
+        Map coordinates of an inline/crossline location
+
+        :return: (x, y)
+        """
+        a, b, d, e, xoff, yoff = self.transform
+        return a * inline + b * crossline + xoff, d * inline + e * crossline + yoff
+
+    def geometry(self):
+        """
+        Outline of the occupied bins in map coordinates
+
+        Each bin covers half a line increment either side of its
+        inline/crossline location.
+
+        :return: shapely Polygon or MultiPolygon
+        """
+        if geometry is None:
+            raise ModuleNotFoundError('Module \'shapely\' could not be found')
+        il_half = self.grid.inline_step / 2
+        xl_half = self.grid.crossline_step / 2
+        strips = [
+            geometry.box(inline - il_half, first - xl_half, inline + il_half, last + xl_half)
+            for inline, first, last in self.grid.runs()
+        ]
+        # Strips meeting along their edges are joined by the union
+        outline = unary_union(strips)
+        return affine_transform(outline, self.transform)
@@ -0,0 +1,197 @@
+"""
+Map 3D inline/crossline numbers to trace indices.
+
+Regularly sorted surveys (every line full, constant increments) are
+described by a handful of numbers and looked up with arithmetic,
+anything else falls back to dictionaries built from the header values.
+"""
+from quicksegy.internals.compat import np
+
+
+def _as_list(column):
+    return column.tolist() if hasattr(column, 'tolist') else list(column)
+
+
+class RegularGrid:
+    """
+    Arithmetic lookup for surveys sorted by one line type with full lines
+
+    :param slow_first: first value of the slow (outer) line number
+    :param slow_step: increment of the slow line number
+    :param slow_count: number of slow lines
+    :param fast_first: first value of the fast (inner) line number
+    :param fast_step: increment of the fast line number
+    :param fast_count: number of traces in each slow line
+    """
+    def __init__(self, slow_first, slow_step, slow_count, fast_first, fast_step, fast_count):
+        self.slow_first = slow_first
+        self.slow_step = slow_step
+        self.slow_count = slow_count
+        self.fast_first = fast_first
+        self.fast_step = fast_step
+        self.fast_count = fast_count
+
+    def __repr__(self):
+        return (f'{self.__class__.__name__}({self.slow_first}, {self.slow_step}, '
+                f'{self.slow_count}, {self.fast_first}, {self.fast_step}, {self.fast_count})')
+
+    @staticmethod
+    def _position(value, first, step, count):
+        position, remainder = divmod(value - first, step)
+        if remainder or not 0 <= position < count:
+            return None
+        return position
+
+    def slow_traces(self, value):
+        pos = self._position(value, self.slow_first, self.slow_step, self.slow_count)
+        if pos is None:
+            return None
+        return range(pos * self.fast_count, (pos + 1) * self.fast_count)
+
+    def fast_traces(self, value):
+        pos = self._position(value, self.fast_first, self.fast_step, self.fast_count)
+        if pos is None:
+            return None
+        return range(pos, self.slow_count * self.fast_count, self.fast_count)
+
+    def trace(self, slow, fast):
+        slow_pos = self._position(slow, self.slow_first, self.slow_step, self.slow_count)
+        fast_pos = self._position(fast, self.fast_first, self.fast_step, self.fast_count)
+        if slow_pos is None or fast_pos is None:
+            return None
+        return slow_pos * self.fast_count + fast_pos
+
+    @classmethod
+    def detect(cls, slow, fast):
+        """
+        Check if the line numbers form a regular grid with fast varying first
+
+        :param slow: slow line numbers for each trace
+        :param fast: fast line numbers for each trace
+        :return: RegularGrid or None
+        """
+        total = len(slow)
+        if total == 0:
+            return None
+
+        fast_count = 1
+        while fast_count < total and slow[fast_count] == slow[0]:
+            fast_count += 1
+        if total % fast_count:
+            return None
+        slow_count = total // fast_count
+
+        slow_step = int(slow[fast_count] - slow[0]) if slow_count > 1 else 1
+        fast_step = int(fast[1] - fast[0]) if fast_count > 1 else 1
+        if slow_step == 0 or fast_step == 0:
+            return None
+
+        grid = cls(int(slow[0]), slow_step, slow_count, int(fast[0]), fast_step, fast_count)
+
+        if np is not None and isinstance(slow, np.ndarray):
+            positions = np.arange(total)
+            expected_slow = grid.slow_first + (positions // fast_count) * slow_step
+            expected_fast = grid.fast_first + (positions % fast_count) * fast_step
+            if np.array_equal(slow, expected_slow) and np.array_equal(fast, expected_fast):
+                return grid
+            return None
+
+        for i in range(total):
+            line, trace = divmod(i, fast_count)
+            if slow[i] != grid.slow_first + line * slow_step or \
+                    fast[i] != grid.fast_first + trace * fast_step:
+                return None
+        return grid
+
+
+class GeometryIndex:
+    """
+    Lookup of trace indices by inline and crossline number
+
+    :param inlines: inline number of every trace
+    :param crosslines: crossline number of every trace
+    """
+    def __init__(self, inlines, crosslines):
+        if len(inlines) != len(crosslines):
+            raise ValueError('Inline and crossline columns must be the same length')
+
+        self.trace_count = len(inlines)
+        self.sorting = None
+        self.grid = None
+        self._traces = self._inlines = self._crosslines = None
+
+        grid = RegularGrid.detect(inlines, crosslines)
+        if grid is not None:
+            self.sorting, self.grid = 'inline', grid
+            return
+        grid = RegularGrid.detect(crosslines, inlines)
+        if grid is not None:
+            self.sorting, self.grid = 'crossline', grid
+            return
+
+        self._traces = {}
+        self._inlines = {}
+        self._crosslines = {}
+        for idx, (il, xl) in enumerate(zip(_as_list(inlines), _as_list(crosslines))):
+            self._traces.setdefault((il, xl), idx)
+            self._inlines.setdefault(il, []).append(idx)
+            self._crosslines.setdefault(xl, []).append(idx)
+
+    @property
+    def regular(self):
+        """
+        True if lookups are done by arithmetic
+        """
+        return self.grid is not None
+
+    def inline_traces(self, inline):
+        """
+        Trace indices for an inline
+
+        :param inline: inline number
+        :return: sequence of trace indices
+        """
+        if self.sorting == 'inline':
+            traces = self.grid.slow_traces(inline)
+        elif self.sorting == 'crossline':
+            traces = self.grid.fast_traces(inline)
+        else:
+            traces = self._inlines.get(inline)
+        if traces is None:
+            raise KeyError(f'Inline {inline} not found')
+        return traces
+
+    def crossline_traces(self, crossline):
+        """
+        Trace indices for a crossline
+
+        :param crossline: crossline number
+        :return: sequence of trace indices
+        """
+        if self.sorting == 'inline':
+            traces = self.grid.fast_traces(crossline)
+        elif self.sorting == 'crossline':
+            traces = self.grid.slow_traces(crossline)
+        else:
+            traces = self._crosslines.get(crossline)
+        if traces is None:
+            raise KeyError(f'Crossline {crossline} not found')
+        return traces
+
+    def trace_index(self, inline, crossline):
+        """
+        Trace index at an inline/crossline location
+
+        :param inline: inline number
+        :param crossline: crossline number
+        :return: trace index
+        """
+        if self.sorting == 'inline':
+            idx = self.grid.trace(inline, crossline)
+        elif self.sorting == 'crossline':
+            idx = self.grid.trace(crossline, inline)
+        else:
+            idx = self._traces.get((inline, crossline))
+        if idx is None:
+            raise KeyError(f'No trace at inline {inline}, crossline {crossline}')
+        return idx
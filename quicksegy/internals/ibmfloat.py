@@ -2,11 +2,35 @@
 Handle the IBM Floating point numeric format.
 
 Convert 32 bit IBM floating point numbers to
-native python floats.
+native python floats and back.
 """
+import array
+import math
+import sys
+
+from quicksegy.internals.compat import np, resolve_numpy
+from quicksegy.internals.struct_utils import BIG_ENDIAN, LITTLE_ENDIAN, DOUBLE
+
 MAX_SIZE = (1 - 16**-6) * 16**63
 MIN_SIZE = 16**-65
 
+NATIVE_ENDIAN = LITTLE_ENDIAN if sys.byteorder == 'little' else BIG_ENDIAN
+
+# array.array typecode for unsigned 32 bit words
+WORD_TYPE = 'I' if array.array('I').itemsize == 4 else 'L'
+
+# Value of the fraction bit for each possible top byte (sign + exponent)
+# multiplying by the 24 bit fraction as an integer gives the exact value
+BYTE_SCALE = [
+    (1 - 2 * (byte >> 7)) * 16.0**((byte & 0x7f) - 64) / 2**24
+    for byte in range(256)
+]
+if np is not None:
+    NP_BYTE_SCALE = np.array(BYTE_SCALE, dtype=np.float64)
+
+# Largest magnitude IBM float (sign bit excluded)
+IBM_MAX_WORD = 0x7fffffff
+
 
 def ibm_to_float(ibm):
     """
@@ -27,3 +51,136 @@ def ibm_to_float(ibm):
     value = sign * 16**(exp-64) * fract
 
     return value
+
+
+def ibm_words_to_float(words, dtype=DOUBLE):
+    """
+    Convert a sequence of IBM floats already read as unsigned integers
+
+    numpy arrays are converted with numpy and give a numpy array,
+    anything else gives an array.array.
+
+    :param words: IBM floating point values as uints
+    :param dtype: output type 'd' (float64) or 'f' (float32)
+    :return: numpy array or array.array of floats
+    """
+    if np is not None and isinstance(words, np.ndarray):
+        words = words.astype(np.uint32, copy=False)
+        values = NP_BYTE_SCALE[words >> 24] * (words & 0xffffff)
+        with np.errstate(over='ignore'):
+            return values.astype(dtype, copy=False)
+
+    scale = BYTE_SCALE
+    return array.array(dtype, [scale[word >> 24] * (word & 0xffffff) for word in words])
+
+
+def ibm_to_float_array(data, endian=BIG_ENDIAN, dtype=DOUBLE, use_numpy=None):
+    """
+    Convert a buffer of 32 bit IBM floats in one pass
+
+    Gives the same values as ibm_to_float (float32 output is rounded).
+
+    :param data: bytes-like buffer of IBM floats
+    :param endian: endianness of the data '>' or '<'
+    :param dtype: output type 'd' (float64) or 'f' (float32)
+    :param use_numpy: use numpy (default: if numpy is installed)
+    :return: numpy array if using numpy otherwise array.array
+    """
+    if resolve_numpy(use_numpy):
+        return ibm_words_to_float(np.frombuffer(data, dtype=endian + 'u4'), dtype)
+
+    words = array.array(WORD_TYPE)
+    words.frombytes(data)
+    if endian != NATIVE_ENDIAN:
+        words.byteswap()
+    return ibm_words_to_float(words, dtype)
+
+
+def float_to_ibm(value):
+    """
+    Convert a Python float to an IBM float
+
+    The fraction is rounded to the nearest value (ties to even), values
+    too large for IBM floats give the largest IBM float with the same sign
+    and values too small lose precision down to 0. NaN gives 0.
+
+    :param value: float value
+    :type value: float
+    :return: IBM floating point value as uint
+    :rtype: int
+    """
+    if value == 0 or value != value:
+        return 0
+    sign = 0x80000000 if value < 0 else 0
+    value = abs(value)
+    if value == math.inf:
+        return sign | IBM_MAX_WORD
+
+    mant, exp = math.frexp(value)
+    exp16 = (exp + 3) // 4
+    fract = round(math.ldexp(mant, 24 + exp - 4 * exp16))
+    if fract == 2**24:
+        fract >>= 4
+        exp16 += 1
+
+    biased = exp16 + 64
+    if biased > 127:
+        return sign | IBM_MAX_WORD
+    if biased < 0:
+        fract >>= min(-4 * biased, 24)
+        biased = 0
+        if not fract:
+            return 0
+    return sign | (biased << 24) | fract
+
+
+def float_to_ibm_words(values, use_numpy=None):
+    """
+    Convert a sequence of floats to IBM floats as unsigned integers
+
+    Gives the same values as float_to_ibm.
+
+    :param values: sequence or numpy array of floats
+    :param use_numpy: use numpy (default: if numpy is installed)
+    :return: numpy uint32 array if using numpy otherwise array.array
+    """
+    if not resolve_numpy(use_numpy):
+        return array.array(WORD_TYPE, [float_to_ibm(value) for value in values])
+
+    values = np.asarray(values, dtype=np.float64)
+    magnitude = np.abs(values)
+    finite = np.isfinite(values) & (values != 0)
+    sign = (values < 0).astype(np.uint32) << np.uint32(31)
+
+    mant, exp = np.frexp(np.where(finite, magnitude, 1.0))
+    exp = exp.astype(np.int64)
+    exp16 = (exp + 3) // 4
+    fract = np.rint(np.ldexp(mant, (24 + exp - 4 * exp16).astype(np.int32))).astype(np.int64)
+    carry = fract == 2**24
+    fract = np.where(carry, fract >> 4, fract)
+    biased = exp16 + 64 + carry
+
+    fract = np.where(biased < 0, fract >> np.minimum(-4 * biased, 24).clip(0), fract)
+    words = (np.maximum(biased, 0) << 24) | fract
+    words = np.where(biased > 127, IBM_MAX_WORD, words)
+    words = np.where(np.isinf(values), IBM_MAX_WORD, words)
+    words = np.where(finite | np.isinf(values), words, 0)
+    words = np.where(words & 0xffffff, words, 0)
+    return words.astype(np.uint32) | np.where(words != 0, sign, 0).astype(np.uint32)
+
+
+def float_to_ibm_array(values, endian=BIG_ENDIAN, use_numpy=None):
+    """
+    Encode a sequence of floats as a buffer of 32 bit IBM floats
+
+    :param values: sequence or numpy array of floats
+    :param endian: endianness of the output '>' or '<'
+    :param use_numpy: use numpy (default: if numpy is installed)
+    :return: bytes of IBM floats
+    """
+    words = float_to_ibm_words(values, use_numpy)
+    if isinstance(words, array.array):
+        if endian != NATIVE_ENDIAN:
+            words.byteswap()
+        return words.tobytes()
+    return words.astype(endian + 'u4', copy=False).tobytes()
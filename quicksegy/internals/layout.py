@@ -0,0 +1,149 @@
+"""
+Byte layout of the traces in a fixed length SEG-Y file.
+
+The layout is worked out once from the binary header and file size:
+    SEG-Y REV 1+  EXTENDED_TEXT_HEADER_COUNT 3200 byte extended text headers
+                  follow the binary header (-1 means a variable number ending
+                  with an ((SEG: EndText)) stanza)
+    SEG-Y REV 2+  MAX_EXTENDED_TRACE_HEADERS 240 byte extended trace headers
+                  follow each standard trace header, a non zero
+                  FIRST_TRACE_OFFSET overrides the start of the first trace
+                  and TRAILER_RECORDS 3200 byte trailers follow the last trace
+
+Revision 0 files often have junk in these bytes so they are ignored there.
+Every trace is then at start_offset + trace_size * index.
+"""
+TEXT_HEADER_SIZE = 3200
+BINARY_HEADER_SIZE = 400
+TRACE_HEADER_SIZE = 240
+END_TEXT = '((SEG: EndText))'
+
+
+class TraceLayout:
+    """
+    Offsets of the trace headers and samples in a SEG-Y file
+
+    :param data_size: size of the samples of one trace in bytes
+    :param trace_count: number of traces in the file
+    :param start_offset: offset of the first trace header
+    :param extended_headers: extended trace headers after each trace header
+    :param extended_text_count: extended text headers after the binary header
+    :param trailer_count: data trailer records after the last trace
+    """
+    def __init__(self, data_size, trace_count=0, *,
+                 start_offset=TEXT_HEADER_SIZE + BINARY_HEADER_SIZE,
+                 extended_headers=0, extended_text_count=0, trailer_count=0):
+        self.data_size = data_size
+        self.trace_count = trace_count
+        self.start_offset = start_offset
+        self.extended_headers = extended_headers
+        self.extended_text_count = extended_text_count
+        self.trailer_count = trailer_count
+        self.header_size = TRACE_HEADER_SIZE * (1 + extended_headers)
+        self.trace_size = self.header_size + data_size
+
+    def __repr__(self):
+        return (f'{self.__class__.__name__}(start_offset={self.start_offset}, '
+                f'header_size={self.header_size}, data_size={self.data_size}, '
+                f'trace_count={self.trace_count})')
+
+    def __eq__(self, other):
+        if not isinstance(other, TraceLayout):
+            return NotImplemented
+        return self.key() == other.key()
+
+    def key(self):
+        """
+        Values identifying the layout (eg: for cache keys)
+        """
+        return [self.start_offset, self.header_size, self.data_size, self.trace_count]
+
+    def trace_offset(self, idx):
+        """
+        Get the byte offset of a trace (starting at its header) in the file
+
+        :param idx: trace index (negative indices count from the end)
+        :return: offset of the start of the trace
+        """
+        if idx >= self.trace_count or idx < -self.trace_count:
+            raise IndexError(f'Index {idx} out of range.')
+
+        if idx < 0:
+            idx += self.trace_count
+        return self.start_offset + self.trace_size * idx
+
+    def data_offset(self, idx):
+        """
+        Get the byte offset of the samples of a trace in the file
+
+        :param idx: trace index (negative indices count from the end)
+        :return: offset of the first sample
+        """
+        return self.trace_offset(idx) + self.header_size
+
+    @classmethod
+    def from_file(cls, handle, binary_header, data_size, filesize, encoding='ebcdic-cp-be'):
+        """
+        Work out the layout of an open SEG-Y file
+
+        :param handle: python file handle, only read for a variable number
+                       of extended text headers
+        :param binary_header: BinaryHeader of the file
+        :param data_size: size of the samples of one trace in bytes
+        :param filesize: size of the file in bytes
+        :param encoding: encoding of the text headers
+        :return: new instance
+        """
+        revision = binary_header['MAJOR_SEGY_REV_NO']
+        start_offset = TEXT_HEADER_SIZE + BINARY_HEADER_SIZE
+        first_trace_offset = extended_text_count = extended_headers = trailer_count = 0
+
+        if revision >= 2:
+            first_trace_offset = binary_header['FIRST_TRACE_OFFSET']
+            extended_headers = binary_header['MAX_EXTENDED_TRACE_HEADERS']
+            # A variable number of trailers (-1) can't be sized from the header
+            trailer_count = max(binary_header['TRAILER_RECORDS'], 0)
+
+        if revision >= 1:
+            extended_text_count = binary_header['EXTENDED_TEXT_HEADER_COUNT']
+            if extended_text_count == -1 and not first_trace_offset:
+                extended_text_count = count_extended_text(handle, encoding)
+            extended_text_count = max(extended_text_count, 0)
+            start_offset += extended_text_count * TEXT_HEADER_SIZE
+
+        if first_trace_offset:
+            start_offset = first_trace_offset
+
+        if start_offset > filesize:
+            raise ValueError(
+                f'First trace offset {start_offset} is beyond the end of the file '
+                f'({filesize} bytes), check the binary header or use binheader_overrides'
+            )
+
+        layout = cls(data_size, 0, start_offset=start_offset,
+                     extended_headers=extended_headers,
+                     extended_text_count=extended_text_count,
+                     trailer_count=trailer_count)
+        trace_region = max(filesize - start_offset - trailer_count * TEXT_HEADER_SIZE, 0)
+        layout.trace_count = trace_region // layout.trace_size
+        return layout
+
+
+def count_extended_text(handle, encoding='ebcdic-cp-be'):
+    """
+    Count extended text headers up to the one with an ((SEG: EndText)) stanza
+
+    :param handle: python file handle
+    :param encoding: encoding of the text headers
+    :return: number of extended text headers
+    """
+    end_text = END_TEXT.encode('ascii')
+    handle.seek(TEXT_HEADER_SIZE + BINARY_HEADER_SIZE)
+    count = 0
+    while True:
+        data = handle.read(TEXT_HEADER_SIZE)
+        if len(data) < TEXT_HEADER_SIZE:
+            raise ValueError('No ((SEG: EndText)) stanza found in the extended text headers')
+        count += 1
+        if end_text in data or END_TEXT in data.decode(encoding, errors='replace'):
+            return count
@@ -0,0 +1,163 @@
+"""
+Extract navigation from columns of trace header values.
+
+Scalars are applied to whole columns at once (vectorised with numpy
+arrays) and the result is kept as columns. Nav2D/Nav3D tuples are only
+created when asked for.
+"""
+from collections import namedtuple
+
+from quicksegy.internals.compat import np
+
+Nav2D = namedtuple('Nav2D', 'trace sp cdp x y')
+Nav3D = namedtuple('Nav3D', 'trace inline xline x y')
+
+
+def _tolist(column):
+    return column.tolist() if hasattr(column, 'tolist') else list(column)
+
+
+def scale_values(values, scalar):
+    """
+    Apply SEG-Y scalars to a column of values
+
+    Positive scalars multiply, negative scalars divide and 0 leaves the
+    value unchanged. Integer values stay integers unless divided, numpy
+    columns become float64 if any scalar divides.
+
+    :param values: column of values
+    :param scalar: column of scalar values
+    :return: numpy array or list
+    """
+    if np is not None and isinstance(scalar, np.ndarray):
+        values = np.asarray(values)
+        if values.dtype.kind in 'iu' and not (scalar < 0).any():
+            return values.astype(np.int64) * np.where(scalar > 0, scalar, 1).astype(np.int64)
+        scalar = scalar.astype(np.float64)
+        multiply = np.where(scalar > 0, scalar, 1.0)
+        divide = np.where(scalar < 0, -scalar, 1.0)
+        return values * multiply / divide
+
+    result = []
+    for value, scale in zip(values, scalar):
+        if scale > 0:
+            value = value * scale
+        elif scale < 0:
+            value = value / -scale
+        result.append(value)
+    return result
+
+
+def scale_coordinates(x, y, scalar):
+    """
+    Apply coordinate scalars to columns of x and y values
+
+    :param x: column of x values
+    :param y: column of y values
+    :param scalar: column of COORDINATE_SCALAR values
+    :return: (x, y) as numpy arrays or lists
+    """
+    return scale_values(x, scalar), scale_values(y, scalar)
+
+
+class NavColumns:
+    """
+    Navigation as one column per field
+
+    Fields are those of the tuple type (Nav2D or Nav3D).
+
+    :param tuple_type: namedtuple type of a single nav point
+    :param columns: dict of {field: column}
+    """
+    def __init__(self, tuple_type, columns):
+        self.tuple_type = tuple_type
+        self.columns = {field: columns[field] for field in tuple_type._fields}
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.tuple_type.__name__}, {len(self)} points)'
+
+    def __len__(self):
+        return len(self.columns['x'])
+
+    def __getitem__(self, field):
+        return self.columns[field]
+
+    def __getattr__(self, field):
+        try:
+            return self.__dict__['columns'][field]
+        except KeyError:
+            raise AttributeError(f'NavColumns object has no attribute \'{field}\'') from None
+
+    def tuples(self):
+        """
+        Nav as a list of namedtuples
+        """
+        tuple_type = self.tuple_type
+        rows = zip(*(_tolist(self.columns[field]) for field in tuple_type._fields))
+        return [tuple_type(*row) for row in rows]
+
+    def points(self):
+        """
+        Nav as a list of (x, y) tuples
+        """
+        return list(zip(_tolist(self.columns['x']), _tolist(self.columns['y'])))
+
+
+def nav_keys_2d(*, trace_loc='TRACE_NO_LINE', sp_loc='SP', cdp_loc='CDP', nav_loc='CDP',
+                use_nav_scalar=True, use_sp_scalar=True):
+    """
+    Header keys needed by nav_2d
+    """
+    keys = [trace_loc, sp_loc, cdp_loc, nav_loc + '_X', nav_loc + '_Y']
+    if use_sp_scalar:
+        keys.append('SP_SCALAR')
+    if use_nav_scalar:
+        keys.append('COORDINATE_SCALAR')
+    return list(dict.fromkeys(keys))
+
+
+def nav_2d(columns, *, trace_loc='TRACE_NO_LINE', sp_loc='SP', cdp_loc='CDP', nav_loc='CDP',
+           use_nav_scalar=True, use_sp_scalar=True):
+    """
+    2D navigation from header columns
+
+    :param columns: dict of header columns including the keys from nav_keys_2d
+    :return: NavColumns of Nav2D fields
+    """
+    sp = columns[sp_loc]
+    x, y = columns[nav_loc + '_X'], columns[nav_loc + '_Y']
+    if use_sp_scalar:
+        sp = scale_values(sp, columns['SP_SCALAR'])
+    if use_nav_scalar:
+        x, y = scale_coordinates(x, y, columns['COORDINATE_SCALAR'])
+    return NavColumns(Nav2D, {
+        'trace': columns[trace_loc], 'sp': sp, 'cdp': columns[cdp_loc], 'x': x, 'y': y,
+    })
+
+
+def nav_keys_3d(*, trace_loc='TRACE_NO_LINE', inline_loc='INLINE', crossline_loc='CROSSLINE',
+                nav_loc='CDP', use_nav_scalar=True):
+    """
+    Header keys needed by nav_3d
+    """
+    keys = [trace_loc, inline_loc, crossline_loc, nav_loc + '_X', nav_loc + '_Y']
+    if use_nav_scalar:
+        keys.append('COORDINATE_SCALAR')
+    return list(dict.fromkeys(keys))
+
+
+def nav_3d(columns, *, trace_loc='TRACE_NO_LINE', inline_loc='INLINE', crossline_loc='CROSSLINE',
+           nav_loc='CDP', use_nav_scalar=True):
+    """
+    3D navigation from header columns
+
+    :param columns: dict of header columns including the keys from nav_keys_3d
+    :return: NavColumns of Nav3D fields
+    """
+    x, y = columns[nav_loc + '_X'], columns[nav_loc + '_Y']
+    if use_nav_scalar:
+        x, y = scale_coordinates(x, y, columns['COORDINATE_SCALAR'])
+    return NavColumns(Nav3D, {
+        'trace': columns[trace_loc], 'inline': columns[inline_loc],
+        'xline': columns[crossline_loc], 'x': x, 'y': y,
+    })
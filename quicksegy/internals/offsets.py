@@ -0,0 +1,208 @@
+"""
+Trace offset index for SEG-Y files where the traces differ in length.
+
+Traces are found by walking the headers once: each header's SAMPLE_COUNT
+gives the position of the next trace. The start of every trace is kept in
+an array('Q') (8 bytes per trace) so any trace can then be found in O(1).
+
+The index can be stored next to the SEG-Y ('<name>.qsoff') or in a cache
+directory. It uses the same file identity as the header cache and is
+rebuilt if the file or the way it is read changes.
+
+File layout:
+    8 bytes magic, 4 byte little endian metadata length,
+    JSON metadata, raw offsets (trace_count + 1 native 8 byte integers).
+"""
+import array
+import json
+import os
+import struct
+import sys
+import warnings
+
+from quicksegy.internals.cache import LENGTH_STRUCT, cache_path, caller_stacklevel
+from quicksegy.internals.layout import TEXT_HEADER_SIZE, TRACE_HEADER_SIZE
+from quicksegy.internals.stats import open_file
+
+MAGIC = b'QSGYOFF1'
+SUFFIX = '.qsoff'
+# Buffer size used when walking the headers
+READ_BUFFER = 2**20
+
+
+class TraceOffsets:
+    """
+    Byte offsets of the traces in a variable length SEG-Y file
+
+    Provides the same offsets as TraceLayout, trace_size is None as there
+    is no fixed distance between traces.
+
+    :param offsets: array('Q') of the start of every trace followed by the
+                    end of the last trace
+    :param header_size: size of the trace headers (including extended headers)
+    :param sample_size: size of a single sample
+    """
+    trace_size = None
+
+    def __init__(self, offsets, header_size, sample_size):
+        self.offsets = offsets
+        self.header_size = header_size
+        self.sample_size = sample_size
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.trace_count} traces)'
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def trace_count(self):
+        return len(self.offsets) - 1
+
+    @property
+    def start_offset(self):
+        return self.offsets[0]
+
+    def _index(self, idx):
+        count = len(self.offsets) - 1
+        if idx >= count or idx < -count:
+            raise IndexError(f'Index {idx} out of range.')
+        return idx + count if idx < 0 else idx
+
+    def trace_offset(self, idx):
+        """
+        Get the byte offset of a trace (starting at its header) in the file
+
+        :param idx: trace index (negative indices count from the end)
+        :return: offset of the start of the trace
+        """
+        return self.offsets[self._index(idx)]
+
+    def data_offset(self, idx):
+        """
+        Get the byte offset of the samples of a trace in the file
+
+        :param idx: trace index (negative indices count from the end)
+        :return: offset of the first sample
+        """
+        return self.offsets[self._index(idx)] + self.header_size
+
+    def data_size(self, idx):
+        """
+        Size of the samples of a trace in bytes
+
+        :param idx: trace index (negative indices count from the end)
+        """
+        idx = self._index(idx)
+        return self.offsets[idx + 1] - self.offsets[idx] - self.header_size
+
+    def sample_count(self, idx):
+        """
+        Number of samples in a trace
+
+        :param idx: trace index (negative indices count from the end)
+        """
+        return self.data_size(idx) // self.sample_size
+
+    @classmethod
+    def from_file(cls, path, layout, sample_size, count_pair, endian, filesize, stats=None):
+        """
+        Walk the trace headers of a file to find every trace
+
+        Walking stops at the first trace that would run past the end of the
+        file (or into the data trailers), with a warning giving the trace
+        index and offset as it is usually a truncated file or a bad
+        SAMPLE_COUNT.
+
+        :param path: path to the SEG-Y file
+        :param layout: TraceLayout giving the first trace offset, header size
+                       and trailers
+        :param sample_size: size of a single sample
+        :param count_pair: StructPair of the trace header sample count
+        :param endian: endianness of the data
+        :param filesize: size of the file in bytes
+        :param stats: IOStats to record the reads in (default: not recorded)
+        :return: new instance
+        """
+        count_struct = struct.Struct(endian + count_pair.ctype)
+        header_size = layout.header_size
+        end = filesize - layout.trailer_count * TEXT_HEADER_SIZE
+
+        offsets = array.array('Q')
+        position = layout.start_offset
+        with open_file(path, stats, buffering=READ_BUFFER) as handle:
+            while position + header_size <= end:
+                # Seeks within the read buffer don't touch the file
+                handle.seek(position)
+                header = handle.read(TRACE_HEADER_SIZE)
+                sample_count, = count_struct.unpack_from(header, count_pair.offset)
+                if sample_count < 0:
+                    # SAMPLE_COUNT is unsigned from REV 1
+                    sample_count += 1 << (8 * count_struct.size)
+                next_position = position + header_size + sample_count * sample_size
+                if next_position > end:
+                    warnings.warn(
+                        f'Trace {len(offsets)} at offset {position} has {sample_count} samples '
+                        f'running past the end of the trace data ({end} bytes), '
+                        f'only the {len(offsets)} traces before it are used',
+                        stacklevel=caller_stacklevel(),
+                    )
+                    break
+                offsets.append(position)
+                position = next_position
+        offsets.append(position)
+        return cls(offsets, header_size, sample_size)
+
+    @classmethod
+    def load(cls, key, directory=None):
+        """
+        Load a stored index if it matches the file key
+
+        :param key: file key (see cache.file_key) including the layout
+        :param directory: cache directory (default: next to the SEG-Y file)
+        :return: new instance or None if the index is missing or stale
+        """
+        try:
+            with cache_path(key['path'], directory, SUFFIX).open('rb') as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    return None
+                size, = LENGTH_STRUCT.unpack(f.read(LENGTH_STRUCT.size))
+                meta = json.loads(f.read(size).decode('utf8'))
+                data = f.read()
+        except (OSError, ValueError, struct.error):
+            return None
+        if meta['key'] != key:
+            return None
+
+        offsets = array.array('Q')
+        offsets.frombytes(data)
+        if meta['byteorder'] != sys.byteorder:
+            offsets.byteswap()
+        return cls(offsets, meta['header_size'], meta['sample_size'])
+
+    def save(self, key, directory=None):
+        """
+        Store the index, replacing any existing one
+
+        :param key: file key (see cache.file_key) including the layout
+        :param directory: cache directory (default: next to the SEG-Y file)
+        :return: Path of the index file
+        """
+        path = cache_path(key['path'], directory, SUFFIX)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            'key': key,
+            'byteorder': sys.byteorder,
+            'header_size': self.header_size,
+            'sample_size': self.sample_size,
+        }
+        meta_bytes = json.dumps(meta).encode('utf8')
+
+        temp_path = path.with_name(path.name + '.tmp')
+        with temp_path.open('wb') as f:
+            f.write(MAGIC)
+            f.write(LENGTH_STRUCT.pack(len(meta_bytes)))
+            f.write(meta_bytes)
+            f.write(self.offsets.tobytes())
+        os.replace(temp_path, path)
+        return path
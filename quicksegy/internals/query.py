@@ -0,0 +1,120 @@
+"""
+Filter traces by trace header values.
+
+Conditions are given as {'key': condition} and every condition must match:
+    value           header equals value
+    (low, high)     low <= header <= high, either end may be None
+    set/frozenset   header is one of the values
+    callable        called with the whole column, returns a boolean mask
+
+Conditions are evaluated on columns of header values so only the keys
+referenced are ever decoded.
+"""
+import numbers
+
+from quicksegy.internals.compat import np
+
+
+class Condition:
+    """
+    Test for a single header key
+
+    :param key: trace header key
+    :param condition: condition value (see module docs)
+    """
+    def __init__(self, key, condition):
+        self.key = key
+        self.condition = condition
+        if callable(condition):
+            self.kind = 'callable'
+        elif isinstance(condition, (set, frozenset)):
+            self.kind = 'in'
+        elif isinstance(condition, tuple):
+            if len(condition) != 2:
+                raise ValueError(f'Range for {key} must be (low, high), not {condition!r}')
+            self.kind = 'range'
+        elif isinstance(condition, numbers.Number):
+            self.kind = 'equal'
+        else:
+            raise TypeError(f'Unsupported condition for {key}: {condition!r}')
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.key!r}, {self.condition!r})'
+
+    def _mask_numpy(self, column):
+        kind, condition = self.kind, self.condition
+        if kind == 'equal':
+            return column == condition
+        elif kind == 'in':
+            return np.isin(column, list(condition))
+        elif kind == 'range':
+            low, high = condition
+            mask = np.ones(len(column), dtype=bool)
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+            return mask
+        return np.asarray(condition(column), dtype=bool)
+
+    def _mask_python(self, column):
+        kind, condition = self.kind, self.condition
+        if kind == 'equal':
+            return [value == condition for value in column]
+        elif kind == 'in':
+            return [value in condition for value in column]
+        elif kind == 'range':
+            low, high = condition
+            if low is None:
+                return [value <= high for value in column] if high is not None \
+                    else [True] * len(column)
+            if high is None:
+                return [low <= value for value in column]
+            return [low <= value <= high for value in column]
+        return [bool(value) for value in condition(column)]
+
+    def mask(self, column):
+        """
+        Evaluate the condition over a column of header values
+
+        :param column: numpy array or array.array of values
+        :return: boolean numpy array or list of bool
+        """
+        if np is not None and isinstance(column, np.ndarray):
+            return self._mask_numpy(column)
+        return self._mask_python(column)
+
+
+class HeaderFilter:
+    """
+    Combination of conditions that must all match
+
+    :param where: dict of {'key': condition}
+    """
+    def __init__(self, where):
+        if not where:
+            raise ValueError('At least one condition is required')
+        self.conditions = [Condition(key, condition) for key, condition in where.items()]
+
+    @property
+    def keys(self):
+        """
+        Header keys needed to evaluate the filter
+        """
+        return [condition.key for condition in self.conditions]
+
+    def matches(self, columns, start=0):
+        """
+        Trace indices matching every condition
+
+        :param columns: dict of {'key': column} for a run of consecutive traces
+        :param start: trace index of the first value in the columns
+        :return: numpy array or list of matching trace indices
+        """
+        masks = [condition.mask(columns[condition.key]) for condition in self.conditions]
+        if np is not None and isinstance(masks[0], np.ndarray):
+            combined = masks[0]
+            for mask in masks[1:]:
+                combined = combined & mask
+            return np.flatnonzero(combined) + start
+        return [start + i for i, flags in enumerate(zip(*masks)) if all(flags)]
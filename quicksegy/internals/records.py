@@ -0,0 +1,48 @@
+"""
+Numpy structured dtypes describing whole SEG-Y trace records.
+
+A fixed length SEG-Y file is a regular grid of (header, samples) records
+so the trace region can be mapped directly as a numpy structured array.
+"""
+from quicksegy.internals.compat import np
+from quicksegy.internals.struct_utils import NUMPY_CODES
+
+SAMPLES_FIELD = 'SAMPLES'
+
+
+def trace_dtype(struct_dict, header_size, sample_format, samples_per_trace, endian='>'):
+    """
+    Create a numpy structured dtype for one trace record
+
+    Header keys keep their names, the samples are stored in a
+    sub-array field named SAMPLES. IBM float values (header or samples)
+    are left as raw unsigned 32 bit integers.
+
+    :param struct_dict: trace header struct dictionary {'key': StructPair}
+    :param header_size: total size of the trace headers before the samples
+    :param sample_format: SampleFormat of the trace data
+    :param samples_per_trace: number of samples in each trace
+    :param endian: endianness of the data
+    :return: numpy dtype
+    """
+    if np is None:
+        raise ModuleNotFoundError('Module \'numpy\' could not be found')
+    if SAMPLES_FIELD in struct_dict:
+        raise ValueError(f'Header key {SAMPLES_FIELD!r} conflicts with the samples field')
+
+    names, formats, offsets = [], [], []
+    for key, pair in struct_dict.items():
+        names.append(key)
+        formats.append(endian + NUMPY_CODES[pair.ctype])
+        offsets.append(pair.offset)
+
+    names.append(SAMPLES_FIELD)
+    formats.append((endian + NUMPY_CODES[sample_format.as_struct], (samples_per_trace,)))
+    offsets.append(header_size)
+
+    return np.dtype({
+        'names': names,
+        'formats': formats,
+        'offsets': offsets,
+        'itemsize': header_size + samples_per_trace * sample_format.size,
+    })
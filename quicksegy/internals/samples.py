@@ -0,0 +1,130 @@
+"""
+Decode blocks of trace samples into typed arrays and encode them back.
+"""
+import array
+import struct
+
+from quicksegy.internals.compat import np, resolve_numpy
+from quicksegy.internals.header_enums import SampleFormat
+from quicksegy.internals.ibmfloat import (
+    NATIVE_ENDIAN, float_to_ibm_array, ibm_to_float_array, ibm_words_to_float
+)
+from quicksegy.internals.struct_utils import NUMPY_CODES
+
+
+def decode_samples(data, sample_format, endian='>', use_numpy=None):
+    """
+    Decode a buffer of samples for one or more traces
+
+    IBM floats are converted to float64, other formats keep their type.
+
+    :param data: bytes-like buffer of samples
+    :param sample_format: SampleFormat of the data
+    :param endian: endianness of the data
+    :param use_numpy: return a numpy array (default: if numpy is installed)
+    :return: numpy array or array.array of samples
+    """
+    sample_format = SampleFormat(sample_format)
+    if sample_format == SampleFormat.IBM_FLOAT:
+        return ibm_to_float_array(data, endian, use_numpy=use_numpy)
+
+    if resolve_numpy(use_numpy):
+        values = np.frombuffer(data, dtype=endian + NUMPY_CODES[sample_format.as_struct])
+        return values.astype(values.dtype.newbyteorder('='))
+
+    values = array.array(sample_format.as_struct)
+    values.frombytes(data)
+    if endian != NATIVE_ENDIAN and values.itemsize > 1:
+        values.byteswap()
+    return values
+
+
+def decode_sample_block(buffer, offset, count, record_size, sample_count,
+                        sample_format, endian='>', use_numpy=None):
+    """
+    Decode the samples of regularly spaced traces in a buffer
+
+    :param buffer: buffer containing the traces
+    :param offset: offset of the first trace's samples in the buffer
+    :param count: number of traces
+    :param record_size: distance in bytes between the start of each trace
+    :param sample_count: number of samples in each trace
+    :param sample_format: SampleFormat of the data
+    :param endian: endianness of the data
+    :param use_numpy: return a 2D numpy array (default: if numpy is installed)
+                      otherwise a list of array.array
+    :return: 2D numpy array of (trace, sample) or list of array.array
+    """
+    sample_format = SampleFormat(sample_format)
+    data_size = sample_count * sample_format.size
+
+    if resolve_numpy(use_numpy):
+        dtype = np.dtype(endian + NUMPY_CODES[sample_format.as_struct])
+        values = np.ndarray(shape=(count, sample_count), dtype=dtype, buffer=buffer,
+                            offset=offset, strides=(record_size, dtype.itemsize))
+        if sample_format == SampleFormat.IBM_FLOAT:
+            return ibm_words_to_float(values)
+        return values.astype(dtype.newbyteorder('='))
+
+    view = memoryview(buffer)
+    return [
+        decode_samples(view[start:start + data_size], sample_format, endian, use_numpy=False)
+        for start in range(offset, offset + count * record_size, record_size)
+    ]
+
+
+def integer_limits(sample_format):
+    """
+    Smallest and largest values of an integer sample format
+
+    :param sample_format: integer SampleFormat
+    :return: (minimum, maximum)
+    """
+    code = SampleFormat(sample_format).as_struct
+    bits = 8 * struct.calcsize('=' + code)
+    if code.islower():
+        return -(1 << (bits - 1)), (1 << (bits - 1)) - 1
+    return 0, (1 << bits) - 1
+
+
+def encode_samples(values, sample_format, endian='>', use_numpy=None):
+    """
+    Encode sample values as a buffer in a SEG-Y sample format
+
+    Values written to integer formats are rounded to the nearest integer
+    and clipped to the range of the format.
+
+    :param values: numpy array (any shape) or sequence of sample values
+    :param sample_format: SampleFormat to encode to
+    :param endian: endianness of the output
+    :param use_numpy: use numpy (default: if numpy is installed)
+    :return: bytes of encoded samples
+    """
+    sample_format = SampleFormat(sample_format)
+    if sample_format == SampleFormat.IBM_FLOAT:
+        return float_to_ibm_array(values, endian, use_numpy=use_numpy)
+
+    code = sample_format.as_struct
+    is_float = code in 'fd'
+
+    if resolve_numpy(use_numpy):
+        values = np.asarray(values)
+        dtype = np.dtype(endian + NUMPY_CODES[code])
+        if not is_float:
+            low, high = integer_limits(sample_format)
+            if values.dtype.kind == 'f':
+                values = np.clip(np.rint(values), low, high)
+            elif values.dtype.kind == 'u' and values.dtype.itemsize == 8:
+                # uint64 doesn't fit in int64, it can only be too large
+                values = np.minimum(values, np.uint64(high))
+            else:
+                values = np.clip(values.astype(np.int64, copy=False), low, high)
+        return values.astype(dtype).tobytes()
+
+    if not is_float:
+        low, high = integer_limits(sample_format)
+        values = [min(max(int(round(value)), low), high) for value in values]
+    encoded = array.array(code, values)
+    if endian != NATIVE_ENDIAN and encoded.itemsize > 1:
+        encoded.byteswap()
+    return encoded.tobytes()
@@ -0,0 +1,208 @@
+"""
+Opt-in counts and timings of file access and decoding.
+
+An IOStats object passed to SegY(stats=...) is handed on to its indexers
+and readers, which record:
+    opens               files opened (or memory mapped)
+    seeks               explicit seeks (positional reads don't seek)
+    reads               read calls
+    bytes_read          bytes returned by those reads
+    headers_decoded     trace headers decoded (objects or column rows)
+    samples_decoded     trace samples decoded
+and the wall time spent in the stages 'read', 'decode_headers' and
+'decode_samples'.
+
+Memory mapped access (memory_map=True and trace_records) only counts
+the open, pages read through the map are not seen.
+
+Hooks are called with (name, value) for each count added and with
+('<stage>_time', seconds) for each timed stage so the events can be
+forwarded to a metrics system. Without stats the read paths only make
+a check for None.
+"""
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+COUNTERS = ('opens', 'seeks', 'reads', 'bytes_read', 'headers_decoded', 'samples_decoded')
+STAGES = ('read', 'decode_headers', 'decode_samples')
+
+
+class IOStats:
+    """
+    Counters and stage timings for reads and decoding
+
+    Counters are also available as attributes (eg: stats.bytes_read).
+    Safe to share between threads. Copies made by pickling (eg: for a
+    process pool) count separately from the original, hooks must be
+    picklable to be copied.
+
+    :param hooks: callables called as hook(name, value) for every event
+    """
+    def __init__(self, hooks=()):
+        self.hooks = list(hooks)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __repr__(self):
+        values = ', '.join(f'{name}={value}' for name, value in self.counts.items())
+        return f'{self.__class__.__name__}({values})'
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __getattr__(self, key):
+        if key in COUNTERS:
+            return self.counts[key]
+        raise AttributeError(f'{self.__class__.__name__} object has no attribute \'{key}\'')
+
+    def reset(self):
+        """
+        Set every counter and timing back to zero
+        """
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self.times = dict.fromkeys(STAGES, 0.0)
+
+    def add_hook(self, hook):
+        """
+        Call hook(name, value) for every count and timing from now on
+
+        :param hook: callable
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def count(self, name, value=1):
+        """
+        Add to a counter
+
+        :param name: counter name (see COUNTERS)
+        :param value: amount to add
+        """
+        with self._lock:
+            self.counts[name] += value
+        for hook in self.hooks:
+            hook(name, value)
+
+    def add_time(self, stage, seconds):
+        """
+        Add wall time spent in a stage
+
+        :param stage: stage name (see STAGES)
+        :param seconds: time taken
+        """
+        with self._lock:
+            self.times[stage] += seconds
+        for hook in self.hooks:
+            hook(f'{stage}_time', seconds)
+
+    @contextmanager
+    def timed(self, stage):
+        """
+        Context manager adding the time taken inside it to a stage
+
+        :param stage: stage name (see STAGES)
+        """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, perf_counter() - start)
+
+    def as_dict(self):
+        """
+        :return: dict of the counters and '<stage>_time' timings
+        """
+        with self._lock:
+            return {**self.counts, **{f'{stage}_time': t for stage, t in self.times.items()}}
+
+
+class _Nothing:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return None
+
+
+_NOTHING = _Nothing()
+
+
+def decoding(stats, kind, count):
+    """
+    Context manager timing a decode and counting what was decoded
+
+    :param stats: IOStats or None to record nothing
+    :param kind: 'headers' or 'samples'
+    :param count: number of headers or samples decoded
+    """
+    if stats is None:
+        return _NOTHING
+    stats.count(f'{kind}_decoded', count)
+    return stats.timed(f'decode_{kind}')
+
+
+class InstrumentedFile:
+    """
+    Wrap a binary file object to record its reads and seeks
+
+    :param handle: file object opened for binary reading
+    :param stats: IOStats to record in
+    """
+    def __init__(self, handle, stats):
+        self.handle = handle
+        self.stats = stats
+        stats.count('opens')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __getattr__(self, key):
+        return getattr(self.handle, key)
+
+    def close(self):
+        self.handle.close()
+
+    def seek(self, offset, whence=0):
+        self.stats.count('seeks')
+        return self.handle.seek(offset, whence)
+
+    def read(self, size=-1):
+        with self.stats.timed('read'):
+            data = self.handle.read(size)
+        self.stats.count('reads')
+        self.stats.count('bytes_read', len(data))
+        return data
+
+    def readinto(self, buffer):
+        with self.stats.timed('read'):
+            read = self.handle.readinto(buffer)
+        self.stats.count('reads')
+        self.stats.count('bytes_read', read)
+        return read
+
+
+def open_file(path, stats=None, **kwargs):
+    """
+    Open a file for binary reading, recording its use if stats is given
+
+    :param path: path to the file
+    :param stats: IOStats or None
+    :param kwargs: passed on to open
+    :return: file object
+    """
+    handle = open(path, 'rb', **kwargs)
+    if stats is None:
+        return handle
+    return InstrumentedFile(handle, stats)
@@ -1,6 +1,7 @@
 import struct
+from operator import itemgetter
 
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Tuple, Union
 
 
 # Unit aliases for format strings
@@ -20,6 +21,16 @@ VALID_TYPES = ''.join(
     [CHAR, UCHAR, INT16, UINT16, INT32, UINT32, INT64, UINT64, FLOAT, DOUBLE]
 )
 
+# Sized numpy type codes for the struct type codes (struct 'l' is 4 bytes)
+NUMPY_CODES = {
+    CHAR: 'i1', UCHAR: 'u1',
+    INT16: 'i2', UINT16: 'u2',
+    INT32: 'i4', UINT32: 'u4',
+    'l': 'i4', 'L': 'u4',
+    INT64: 'i8', UINT64: 'u8',
+    FLOAT: 'f4', DOUBLE: 'f8',
+}
+
 
 class StructPair:
     def __init__(self, offset, ctype=UINT32, ibm_float=False):
@@ -35,6 +46,22 @@ class StructPair:
         return r
 
 
+def layout_key(struct_dict):
+    # type: (Dict[str, StructPair]) -> Tuple[Tuple[str, int, str, bool], ...]
+    """
+    Hashable description of a struct dictionary
+
+    :param struct_dict: Dictionary of key names and structpairs (or None)
+    :return: tuple of (key, offset, ctype, ibm_float) tuples
+    """
+    if not struct_dict:
+        return ()
+    return tuple(
+        (key, value.offset, value.ctype, value.ibm_float)
+        for key, value in struct_dict.items()
+    )
+
+
 class SingleStruct:
     """
     A utility to unpack a struct into a dictionary.
@@ -72,12 +99,35 @@ class MultiStruct:
 
         Only for unpacking
 
+        Unpacking uses a compiled plan: a single flat struct covering every
+        non-overlapping field (gaps filled with pad bytes) followed by a
+        secondary pass for any fields overlapping those. Values are given
+        in the key order of struct_dict.
+
         :param struct_dict: Dictionary of key names and structpairs
         :param endian: Endianness of structs
         """
         self.endian = endian
         self.source = struct_dict
-        self.structs = self._generate_structs()
+        self._structs = None
+        self.flat_struct, self.overlaps, plan_names = self._compile_plan()
+        # The plan unpacks in offset order, reorder to match struct_dict
+        self.names = list(self.source)
+        plan_index = {name: i for i, name in enumerate(plan_names)}
+        order = [plan_index[name] for name in self.names]
+        self._reorder = None if order == sorted(order) else itemgetter(*order)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.ibm_keys = [key for key, value in self.source.items() if value.ibm_float]
+
+    @property
+    def structs(self):
+        # type: () -> List[SingleStruct]
+        """
+        Runs of contiguous fields as SingleStructs (built on first use)
+        """
+        if self._structs is None:
+            self._structs = self._generate_structs()
+        return self._structs
 
     def _generate_structs(self):
         # type: () -> List[SingleStruct]
@@ -117,9 +167,54 @@ class MultiStruct:
         structs.append(last_struct)
         return structs
 
-    def unpack(self, data):
-        # type: (bytes) -> Dict[str, Union[int, float]]
-        result = {}
-        for section in self.structs:
-            result.update(section.unpack(data))
-        return result
+    def _compile_plan(self):
+        # type: () -> Tuple[struct.Struct, List[SingleStruct], List[str]]
+        """
+        Generate the flat struct and overlapping field structs
+
+        :return: flat struct, list of single field SingleStructs for overlaps,
+                 names in the order values are unpacked
+        """
+        flat_format = []
+        flat_names = []
+        overlaps = []  # type: List[SingleStruct]
+
+        position = 0
+        for key, value in sorted(self.source.items(), key=lambda item: item[1].offset):
+            size = struct.calcsize(self.endian + value.ctype)
+            if value.offset >= position:
+                if value.offset > position:
+                    flat_format.append(f'{value.offset - position}x')
+                flat_format.append(value.ctype)
+                flat_names.append(key)
+                position = value.offset + size
+            else:
+                field_struct = struct.Struct(self.endian + value.ctype)
+                overlaps.append(SingleStruct(field_struct, [key], offset=value.offset))
+
+        flat_struct = struct.Struct(self.endian + ''.join(flat_format))
+        names = flat_names + [section.names[0] for section in overlaps]
+        return flat_struct, overlaps, names
+
+    def unpack_tuple(self, data, offset=0):
+        # type: (bytes, int) -> Tuple[Union[int, float], ...]
+        """
+        Unpack to a tuple of values in the order of self.names (struct_dict order)
+
+        :param data: buffer to unpack from
+        :param offset: offset of the start of the structure in data
+        :return: tuple of values
+        """
+        values = self.flat_struct.unpack_from(data, offset)
+        if self.overlaps:
+            values += tuple(
+                section.struct_.unpack_from(data, offset + section.offset)[0]
+                for section in self.overlaps
+            )
+        if self._reorder is not None:
+            values = self._reorder(values)
+        return values
+
+    def unpack(self, data, offset=0):
+        # type: (bytes, int) -> Dict[str, Union[int, float]]
+        return dict(zip(self.names, self.unpack_tuple(data, offset)))
@@ -0,0 +1,303 @@
+"""
+Streaming statistics of trace header columns for quality control.
+
+Columns are added a chunk of traces at a time and only a fixed amount of
+state is kept per header key: count, minimum, maximum, whether the values
+never decrease or never increase, and the number of distinct values.
+
+Distinct values are counted exactly while there are few of them, then
+estimated with a HyperLogLog sketch (2**precision one byte registers,
+about 1.04 / sqrt(2**precision) relative error: 1.6% for the default 12).
+Only the distinct values of each chunk are hashed.
+"""
+import struct
+from math import log
+
+from quicksegy.internals.compat import np
+
+MASK64 = (1 << 64) - 1
+# Distinct values kept exactly before switching to the sketch
+EXACT_LIMIT = 1024
+_DOUBLE_BITS = struct.Struct('=d')
+_WORD = struct.Struct('=Q')
+
+
+def _mix64(value):
+    """
+    splitmix64 finaliser for a 64 bit integer
+    """
+    value = (value + 0x9e3779b97f4a7c15) & MASK64
+    value = ((value ^ (value >> 30)) * 0xbf58476d1ce4e5b9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94d049bb133111eb) & MASK64
+    return value ^ (value >> 31)
+
+
+def _mix64_numpy(values):
+    """
+    splitmix64 finaliser for a uint64 numpy array (wraps like _mix64)
+    """
+    values = values + np.uint64(0x9e3779b97f4a7c15)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+    return values ^ (values >> np.uint64(31))
+
+
+def _word(value):
+    """
+    64 bit pattern of a header value, floats by their bits and integers
+    in two's complement so numpy and python give the same words
+    """
+    if isinstance(value, float):
+        return _WORD.unpack(_DOUBLE_BITS.pack(value))[0]
+    return value & MASK64
+
+
+def _words_numpy(values):
+    if values.dtype.kind == 'f':
+        return values.astype(np.float64).view(np.uint64)
+    return values.astype(np.int64).view(np.uint64)
+
+
+class DistinctCounter:
+    """
+    Count distinct values, exactly for small counts then approximately
+
+    :param precision: HyperLogLog precision (number of index bits)
+    """
+    def __init__(self, precision=12):
+        self.precision = precision
+        self.exact = set()
+        self.registers = None
+
+    def _add_words(self, words):
+        width = 64 - self.precision
+        low_mask = (1 << width) - 1
+        registers = self.registers
+        for word in words:
+            hashed = _mix64(word)
+            index = hashed >> width
+            rank = width - (hashed & low_mask).bit_length() + 1
+            if rank > registers[index]:
+                registers[index] = rank
+
+    def _add_words_numpy(self, words):
+        width = 64 - self.precision
+        hashed = _mix64_numpy(words)
+        index = (hashed >> np.uint64(width)).astype(np.intp)
+        low = hashed & np.uint64((1 << width) - 1)
+        # Bit length of the low bits, 0 stays 0
+        lengths = np.zeros(len(low), dtype=np.int64)
+        nonzero = low != 0
+        lengths[nonzero] = np.floor(np.log2(low[nonzero].astype(np.float64))).astype(np.int64) + 1
+        rank = (width - lengths + 1).astype(np.uint8)
+        registers = np.frombuffer(self.registers, dtype=np.uint8)
+        np.maximum.at(registers, index, rank)
+
+    def _start_sketch(self):
+        self.registers = bytearray(1 << self.precision)
+        self._add_words([_word(value) for value in self.exact])
+        self.exact = None
+
+    def add(self, column):
+        """
+        Add a column of values
+
+        :param column: numpy array or sequence of values
+        """
+        if np is not None and isinstance(column, np.ndarray):
+            unique = np.unique(column)
+            if self.exact is not None:
+                if len(self.exact) + len(unique) <= EXACT_LIMIT:
+                    self.exact.update(unique.tolist())
+                    return
+                self._start_sketch()
+            self._add_words_numpy(_words_numpy(unique))
+            return
+
+        unique = set(column)
+        if self.exact is not None:
+            self.exact |= unique
+            if len(self.exact) > EXACT_LIMIT:
+                self._start_sketch()
+            return
+        self._add_words([_word(value) for value in unique])
+
+    @property
+    def is_exact(self):
+        return self.exact is not None
+
+    def count(self):
+        """
+        Number of distinct values (estimated once the sketch is in use)
+        """
+        if self.exact is not None:
+            return len(self.exact)
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * log(m / zeros)
+        return int(round(estimate))
+
+
+class FieldSummary:
+    """
+    Running statistics for one trace header key
+
+    increasing/decreasing are True while the values never decrease/never
+    increase from one trace to the next.
+
+    :param key: trace header key
+    :param precision: HyperLogLog precision for the distinct count
+    """
+    def __init__(self, key, precision=12):
+        self.key = key
+        self.count = 0
+        self.minimum = None
+        self.maximum = None
+        self.increasing = True
+        self.decreasing = True
+        self._last = None
+        self._distinct = DistinctCounter(precision)
+
+    def __repr__(self):
+        return (f'{self.__class__.__name__}({self.key!r}, min={self.minimum}, '
+                f'max={self.maximum}, distinct={self.distinct})')
+
+    def add(self, column):
+        """
+        Add the values of the next chunk of traces
+
+        :param column: numpy array or array.array of values in trace order
+        """
+        if len(column) == 0:
+            return
+        if np is not None and isinstance(column, np.ndarray):
+            low, high = column.min().item(), column.max().item()
+            first, last = column[0].item(), column[-1].item()
+            if self.increasing or self.decreasing:
+                # Compared rather than differenced so unsigned values can't wrap
+                before, after = column[:-1], column[1:]
+                self.increasing = self.increasing and bool((after >= before).all())
+                self.decreasing = self.decreasing and bool((after <= before).all())
+        else:
+            low, high = min(column), max(column)
+            first, last = column[0], column[-1]
+            if self.increasing or self.decreasing:
+                pairs = list(zip(column, column[1:]))
+                self.increasing = self.increasing and all(a <= b for a, b in pairs)
+                self.decreasing = self.decreasing and all(a >= b for a, b in pairs)
+
+        if self._last is not None:
+            self.increasing = self.increasing and self._last <= first
+            self.decreasing = self.decreasing and self._last >= first
+        self._last = last
+        self.minimum = low if self.minimum is None else min(self.minimum, low)
+        self.maximum = high if self.maximum is None else max(self.maximum, high)
+        self.count += len(column)
+        self._distinct.add(column)
+
+    @property
+    def distinct(self):
+        """
+        Number of distinct values (approximate if distinct_exact is False)
+        """
+        return self._distinct.count()
+
+    @property
+    def distinct_exact(self):
+        return self._distinct.is_exact
+
+    @property
+    def constant(self):
+        """
+        Every trace has the same value
+        """
+        return self.count > 0 and self.minimum == self.maximum
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'min': self.minimum,
+            'max': self.maximum,
+            'distinct': self.distinct,
+            'distinct_exact': self.distinct_exact,
+            'increasing': self.increasing,
+            'decreasing': self.decreasing,
+        }
+
+
+class HeaderSummary:
+    """
+    Statistics for each trace header key of a file
+
+    Dict-like access to the FieldSummary of each key.
+
+    :param keys: trace header keys to summarise
+    :param precision: HyperLogLog precision for the distinct counts
+    """
+    def __init__(self, keys, precision=12):
+        self.fields = {key: FieldSummary(key, precision) for key in keys}
+        self.trace_count = 0
+
+    def __getitem__(self, key):
+        return self.fields[key]
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def __len__(self):
+        return len(self.fields)
+
+    def add(self, columns):
+        """
+        Add a chunk of header columns
+
+        :param columns: dict of {key: column} for consecutive traces
+        """
+        for key, summary in self.fields.items():
+            summary.add(columns[key])
+        if self.fields:
+            self.trace_count += len(columns[next(iter(self.fields))])
+
+    def constant_fields(self):
+        """
+        Keys with the same value in every trace (eg: unused or dead fields)
+
+        :return: dict of {key: value}
+        """
+        return {key: s.minimum for key, s in self.fields.items() if s.constant}
+
+    def unsorted_fields(self):
+        """
+        Keys whose values both increase and decrease between traces
+        """
+        return [key for key, s in self.fields.items()
+                if s.count and not (s.increasing or s.decreasing)]
+
+    def as_dict(self):
+        """
+        :return: dict of {key: dict of statistics}
+        """
+        return {key: summary.as_dict() for key, summary in self.fields.items()}
+
+    def __str__(self):
+        rows = [('KEY', 'MIN', 'MAX', 'DISTINCT', 'ORDER')]
+        for key, s in self.fields.items():
+            if s.constant:
+                order = 'constant'
+            elif s.increasing:
+                order = 'increasing'
+            elif s.decreasing:
+                order = 'decreasing'
+            else:
+                order = ''
+            distinct = str(s.distinct) if s.distinct_exact else f'~{s.distinct}'
+            rows.append((key, str(s.minimum), str(s.maximum), distinct, order))
+        widths = [max(len(row[i]) for row in rows) for i in range(5)]
+        return '\n'.join(
+            '  '.join(value.ljust(width) for value, width in zip(row, widths)).rstrip()
+            for row in rows
+        )
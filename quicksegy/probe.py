@@ -0,0 +1,137 @@
+"""
+Detect the endianness and text encoding of a SEG-Y file before opening it.
+
+Only the file headers and the first trace header are read. Each byte
+order is scored on:
+    ENDIAN_CONSTANT         (REV 2) 0x01020304 settles the byte order
+    SAMPLE_FORMAT_CODE      must be a valid SampleFormat
+    SAMPLES_PER_TRACE       should be non zero and match the first trace's
+                            SAMPLE_COUNT
+    file size               should hold a whole number of traces
+and the text header is scored as EBCDIC or ASCII by how much of it
+decodes to printable text.
+"""
+import string
+import struct
+from pathlib import Path
+
+from quicksegy.segy import BinaryHeader, TextHeader, TraceHeader
+from quicksegy.internals.header_enums import SampleFormat
+from quicksegy.internals.layout import TraceLayout
+
+ENDIAN_CONSTANT = 0x01020304
+SWAPPED_ENDIAN_CONSTANT = 0x04030201
+EBCDIC = 'ebcdic-cp-be'
+PRINTABLE = frozenset(string.printable) - frozenset('\x0b\x0c')
+
+
+def text_encoding_scores(data):
+    """
+    Score how likely text header data is EBCDIC or ASCII
+
+    :param data: bytes of the text header
+    :return: dict of {encoding: fraction of printable characters}
+    """
+    if not data:
+        return {EBCDIC: 0.0, 'ascii': 0.0}
+    scores = {}
+    for encoding in (EBCDIC, 'ascii'):
+        text = data.decode(encoding, errors='replace')
+        scores[encoding] = sum(char in PRINTABLE for char in text) / len(text)
+    return scores
+
+
+def guess_text_encoding(data):
+    """
+    Pick the encoding for text header data
+
+    Ties (eg: an empty header of null bytes) go to EBCDIC, the standard
+    encoding. ASCII headers with bytes above 127 are read as latin-1 so
+    they can still be decoded.
+
+    :param data: bytes of the text header
+    :return: encoding name for SegY(text_encoding=...)
+    """
+    scores = text_encoding_scores(data)
+    if scores['ascii'] <= scores[EBCDIC]:
+        return EBCDIC
+    return 'ascii' if max(data) < 0x80 else 'latin-1'
+
+
+def endian_score(handle, binary_data, filesize, endian):
+    """
+    Score how well a byte order fits the file headers
+
+    :param handle: open python file handle of the SEG-Y
+    :param binary_data: bytes of the binary header
+    :param filesize: size of the file in bytes
+    :param endian: byte order to test '>' or '<'
+    :return: score, None if the file can't be read with this byte order
+    """
+    constant, = struct.unpack_from(endian + 'I', binary_data, 96)
+    if constant == ENDIAN_CONSTANT:
+        return 100
+    elif constant == SWAPPED_ENDIAN_CONSTANT:
+        return None
+
+    binary_header = BinaryHeader(binary_data, endian=endian)
+    try:
+        sample_format = SampleFormat(binary_header['SAMPLE_FORMAT_CODE'])
+        sample_size = sample_format.size
+    except (ValueError, NotImplementedError):
+        return None
+
+    score = 2
+    samples_per_trace = binary_header['SAMPLES_PER_TRACE']
+    if not samples_per_trace:
+        return score
+    score += 1
+
+    try:
+        layout = TraceLayout.from_file(handle, binary_header, samples_per_trace * sample_size,
+                                       filesize)
+    except ValueError:
+        return score
+    if layout.trace_count == 0:
+        return score
+
+    handle.seek(layout.start_offset)
+    header = TraceHeader(handle.read(TraceHeader.SIZE), endian=endian)
+    if header['SAMPLE_COUNT'] == samples_per_trace:
+        score += 2
+    trailers = layout.trailer_count * TextHeader.CHARACTERS
+    if (filesize - layout.start_offset - trailers) % layout.trace_size == 0:
+        score += 2
+    return score
+
+
+def probe(path):
+    """
+    Detect the byte order and text encoding of a SEG-Y file
+
+    eg: open files of unknown format
+        sgy = SegY3D(path, **probe(path))
+
+    :param path: path to the SEG-Y file
+    :return: dict of SegY keyword arguments {'endian': ..., 'text_encoding': ...}
+    """
+    path = Path(path)
+    filesize = path.stat().st_size
+    with path.open('rb') as handle:
+        text_data = handle.read(TextHeader.CHARACTERS)
+        binary_data = handle.read(BinaryHeader.SIZE)
+        if len(binary_data) < BinaryHeader.SIZE:
+            raise ValueError(f'{path} is too small to be a SEG-Y file')
+
+        scores = {endian: endian_score(handle, binary_data, filesize, endian)
+                  for endian in ('>', '<')}
+
+    candidates = [endian for endian, score in scores.items() if score is not None]
+    if not candidates:
+        raise ValueError(f'{path} does not have a valid sample format in either byte order')
+
+    return {
+        # Ties go to big endian, the SEG-Y standard
+        'endian': max(candidates, key=scores.__getitem__),
+        'text_encoding': guess_text_encoding(text_data),
+    }
@@ -1,5 +1,11 @@
-import array
-from collections import namedtuple
+import asyncio
+import mmap
+import numbers
+import operator
+import struct
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 
 try:
@@ -13,11 +19,28 @@ from quicksegy.internals.struct_utils import (
     UINT32, INT32,
     UINT64,  # INT64,
     DOUBLE,  # FLOAT
-    StructPair, MultiStruct
+    StructPair, MultiStruct, layout_key
 )
 
+from quicksegy.internals.cache import HeaderCache, caller_stacklevel, file_key
+from quicksegy.internals.columns import ColumnDecoder
+from quicksegy.internals.fileio import PositionalReader
+from quicksegy.internals.footprint import MAX_BINS, AffineFit, Footprint, OccupancyGrid
+from quicksegy.internals.compat import get_running_loop, np, resolve_numpy
+from quicksegy.internals.geometry_index import GeometryIndex
 from quicksegy.internals.header_enums import SampleFormat
 from quicksegy.internals.ibmfloat import ibm_to_float
+from quicksegy.internals.layout import TraceLayout
+# Nav2D and Nav3D are also imported from here
+from quicksegy.internals.nav import (  # noqa: F401
+    Nav2D, Nav3D, nav_2d, nav_3d, nav_keys_2d, nav_keys_3d, scale_coordinates
+)
+from quicksegy.internals.offsets import TraceOffsets
+from quicksegy.internals.query import HeaderFilter
+from quicksegy.internals.records import trace_dtype
+from quicksegy.internals.summary import HeaderSummary
+from quicksegy.internals.samples import decode_samples, decode_sample_block
+from quicksegy.internals.stats import decoding, open_file
 
 
 class TextHeader:
@@ -262,47 +285,112 @@ class TraceHeader:
     }
     DEFAULT_STRUCT = MultiStruct(STRUCT_DICT, ENDIAN)
 
+    __slots__ = ('_values',)
+
+    # Layout of the header, replaced on the record classes made by record_type
+    header_edits = None
+    endian = ENDIAN
+    struct_dict = STRUCT_DICT
+    multistruct = DEFAULT_STRUCT
+    _index = DEFAULT_STRUCT.index
+    _ibm_positions = ()
+
+    _record_types = {}
+
+    def __new__(cls, data=None, header_edits=None, endian=ENDIAN):
+        if cls is cls._base_type:
+            cls = cls.record_type(header_edits, endian)
+        return super().__new__(cls)
+
     def __init__(self, data, header_edits=None, endian=ENDIAN):
         """
         Parse the trace header
 
+        Values are stored positionally, the key lookup and unpacking
+        structures are held on a record class shared by every header
+        with the same layout (see record_type).
+
         :param data: trace header data as a bytestring
         :param header_edits: changes to the header structure as a dict
                              {'key': Structpair(offset, type)} (offsets start at 0)
         """
-        self.endian = endian
-        self.struct_dict = {**self.STRUCT_DICT}
+        values = self.multistruct.unpack_tuple(data)
+        if self._ibm_positions:
+            values = list(values)
+            for i in self._ibm_positions:
+                values[i] = ibm_to_float(values[i])
+            values = tuple(values)
+        self._values = values
+
+    @classmethod
+    def record_type(cls, header_edits=None, endian=ENDIAN):
+        """
+        Get the record class for a trace header layout
+
+        Classes are created once per combination of edits and endianness.
+
+        :param header_edits: changes to the header structure
+        :param endian: data endianness
+        :return: subclass of TraceHeader
+        """
+        base = cls._base_type
+        key = (base, layout_key(header_edits), endian)
+        try:
+            return cls._record_types[key]
+        except KeyError:
+            pass
 
         if header_edits:
-            self.struct_dict.update(header_edits)
-            self.multistruct = MultiStruct(self.struct_dict, self.endian)
-        elif self.endian != self.ENDIAN:
-            self.multistruct = MultiStruct(self.struct_dict, self.endian)
+            struct_dict = {**cls.STRUCT_DICT, **header_edits}
+            multistruct = MultiStruct(struct_dict, endian)
+        elif endian != cls.ENDIAN:
+            struct_dict = cls.STRUCT_DICT
+            multistruct = MultiStruct(struct_dict, endian)
         else:
-            self.multistruct = self.DEFAULT_STRUCT
+            struct_dict = cls.STRUCT_DICT
+            multistruct = cls.DEFAULT_STRUCT
+
+        record = type(base.__name__ + 'Record', (base,), {
+            '__slots__': (),
+            'header_edits': header_edits if header_edits else None,
+            'endian': endian,
+            'struct_dict': struct_dict,
+            'multistruct': multistruct,
+            '_index': multistruct.index,
+            '_ibm_positions': tuple(multistruct.index[key] for key in multistruct.ibm_keys),
+            **base._record_attributes(struct_dict, endian),
+        })
+        cls._record_types[key] = record
+        return record
 
-        self.data = self.multistruct.unpack(data)
-        self._transform_ibm()
+    @classmethod
+    def _record_attributes(cls, struct_dict, endian):
+        """
+        Extra class attributes for the record classes of a layout
+        """
+        return {}
+
+    @property
+    def data(self):
+        """
+        Header values as a new dictionary
+        """
+        return dict(zip(self.multistruct.names, self._values))
+
+    def __reduce__(self):
+        return _restore_trace_header, (self.header_edits, self.endian, self._values)
 
     def __str__(self):
         return str(self.data)
 
     def __getitem__(self, key):
-        return self.data[key]
+        return self._values[self._index[key]]
 
     def __getattr__(self, key):
         try:
-            return self.data[key]
+            return self._values[self._index[key]]
         except KeyError:
-            raise AttributeError(f'BinaryHeader object has no attribute \'{key}\'')
-
-    def _transform_ibm(self):
-        """
-        Transform all IBM structured data to python floats
-        """
-        for key in self.data.keys():
-            if self.struct_dict[key].ibm_float:
-                self.data[key] = ibm_to_float(self.data[key])
+            raise AttributeError(f'TraceHeader object has no attribute \'{key}\'')
 
     @classmethod
     def from_file(cls, handle, header_edits=None, endian=ENDIAN):
@@ -319,6 +407,97 @@ class TraceHeader:
         return cls(data, header_edits, endian)
 
 
+TraceHeader._base_type = TraceHeader
+
+
+def _restore_trace_header(header_edits, endian, values):
+    """
+    Recreate a TraceHeader record from its values (used for pickling)
+    """
+    header = object.__new__(TraceHeader.record_type(header_edits, endian))
+    header._values = values
+    return header
+
+
+class LazyTraceHeader(TraceHeader):
+    """
+    SEG-Y Trace Header that decodes each key on first access
+
+    Keeps the raw header bytes (without copying when given a memoryview)
+    and unpacks only the keys that are used, remembering each value.
+    The full dictionary is still available through data and str().
+
+    Holding a memoryview keeps the underlying buffer alive, pass bytes
+    if the buffer will be reused or released.
+    """
+    __slots__ = ('_raw', '_cache')
+
+    # {'key': (struct.Struct, offset, ibm_float)} set on the record classes
+    _fields = {}
+
+    def __init__(self, data, header_edits=None, endian=TraceHeader.ENDIAN):
+        """
+        Keep the raw trace header for lazy decoding
+
+        :param data: trace header data as a bytestring or memoryview
+        :param header_edits: changes to the header structure as a dict
+                             {'key': Structpair(offset, type)} (offsets start at 0)
+        :param endian: data endianness
+        """
+        self._raw = data
+        self._cache = {}
+
+    @classmethod
+    def _record_attributes(cls, struct_dict, endian):
+        return {'_fields': {
+            key: (struct.Struct(endian + pair.ctype), pair.offset, pair.ibm_float)
+            for key, pair in struct_dict.items()
+        }}
+
+    def _value(self, key):
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        unpacker, offset, ibm = self._fields[key]
+        value = unpacker.unpack_from(self._raw, offset)[0]
+        if ibm:
+            value = ibm_to_float(value)
+        self._cache[key] = value
+        return value
+
+    @property
+    def _values(self):
+        values = self.multistruct.unpack_tuple(self._raw)
+        if self._ibm_positions:
+            values = list(values)
+            for i in self._ibm_positions:
+                values[i] = ibm_to_float(values[i])
+        return tuple(values)
+
+    def __reduce__(self):
+        return _restore_lazy_header, (self.header_edits, self.endian, bytes(self._raw))
+
+    def __getitem__(self, key):
+        return self._value(key)
+
+    def __getattr__(self, key):
+        try:
+            return self._value(key)
+        except KeyError:
+            raise AttributeError(f'TraceHeader object has no attribute \'{key}\'')
+
+
+LazyTraceHeader._base_type = LazyTraceHeader
+
+
+def _restore_lazy_header(header_edits, endian, raw):
+    """
+    Recreate a LazyTraceHeader record from its raw bytes (used for pickling)
+    """
+    return LazyTraceHeader(raw, header_edits, endian)
+
+
 class ExtendedTraceHeader1:
     # NOT YET DEFINED
     SIZE = 240
@@ -334,18 +513,20 @@ class TraceData:
     Handle the trace data for a single trace.
     """
 
-    def __init__(self, data, format_code=1, endian='>'):
+    def __init__(self, data, format_code=1, endian='>', stats=None):
         """
         Store and prepare the trace data for decoding
 
         :param data: trace data (binary bytestring)
         :param format_code: (format code for data from binary header)
         :param endian: (endianness of data '>' or '<')
+        :param stats: IOStats to record decoding in (default: not recorded)
         """
         self._data = None
         self._raw_data = data
         self.format_code = SampleFormat(format_code)
         self.endian = endian
+        self.stats = stats
 
     @property
     def base_format(self):
@@ -355,22 +536,33 @@ class TraceData:
 
     @property
     def data(self):
+        """
+        Decoded samples as a typed array.array (IBM floats become doubles)
+        """
         if self._data is None:
-            arr = array.array(self.base_format, self._raw_data)
-            if self.endian == '>':
-                arr.byteswap()
-            if self.format_code == SampleFormat.IBM_FLOAT:
-                self._data = [ibm_to_float(val) for val in arr]
-            else:
-                self._data = list(arr)
+            count = len(self._raw_data) // self.format_code.size
+            with decoding(self.stats, 'samples', count):
+                self._data = decode_samples(self._raw_data, self.format_code, self.endian,
+                                            use_numpy=False)
         return self._data
 
 
 class TraceHeaderIndexer:
     """
     Handle indexing and obtaining headers from traces by slicing.
+
+    Slices and sequences of indices are read with a read planner which
+    merges headers within max_gap bytes of each other into single reads.
     """
-    def __init__(self, path, trace_size, trace_count, header_edits, endian):
+    # Bulk reads are made in blocks of roughly this many bytes
+    CHUNK_BYTES = 2**23
+    # Strides above this read headers individually instead of whole blocks
+    MAX_BLOCK_STRIDE = 2**16
+    # Default largest gap between headers that is read through
+    MAX_GAP = 2**16
+
+    def __init__(self, path, trace_size, trace_count, header_edits, endian, lazy=False,
+                 layout=None, stats=None):
         """
 
         :param path: path to SEG-Y File
@@ -378,56 +570,589 @@ class TraceHeaderIndexer:
         :param trace_count: number of traces in the SEG-Y file
         :param header_edits: edits to trace_header
         :param endian: endianness of data
+        :param lazy: give LazyTraceHeader objects that decode keys on access
+        :param layout: TraceLayout of the file
+                       (default: traces straight after the binary header)
+        :param stats: IOStats to record reads and decoding in (default: not recorded)
         """
-
-        self.start_offset = TextHeader.CHARACTERS + BinaryHeader.SIZE
+        self.layout = layout if layout is not None else TraceLayout(trace_size, trace_count)
+        self.start_offset = self.layout.start_offset
         self.path = Path(path)
-        self.trace_size = trace_size + TraceHeader.SIZE
-        self.trace_count = trace_count
+        self.trace_size = self.layout.trace_size
+        self.trace_count = self.layout.trace_count
         self.header_edits = header_edits
         self.endian = endian
+        self.lazy = lazy
+        self.header_type = LazyTraceHeader if lazy else TraceHeader
+        self.max_gap = self.MAX_GAP
+        self.stats = stats
 
-    def read_header(self, handle, idx):
+    @property
+    def struct_dict(self):
+        """
+        Trace header structure including any edits
+        """
+        if self.header_edits:
+            return {**TraceHeader.STRUCT_DICT, **self.header_edits}
+        return TraceHeader.STRUCT_DICT
+
+    def _source(self):
+        """
+        Context manager providing the source passed to read_header
+        """
+        return PositionalReader(self.path, self.stats)
+
+    def header_offset(self, idx):
+        """
+        Get the byte offset of a trace header in the file
+
+        :param idx: trace index (negative indices count from the end)
+        :return: offset of the start of the trace header
+        """
+        return self.layout.trace_offset(idx)
+
+    def read_header(self, reader, idx):
         """
         Read traceheader into traceheader object
 
-        :param handle: file handle for the SEG-Y
+        :param reader: PositionalReader for the SEG-Y
         :param idx: trace index
         :return: TraceHeader object
         """
-        # not the fastest method but will do for now
-        if idx >= self.trace_count or idx < -self.trace_count:
-            raise IndexError(f'Index {idx} out of range.')
+        return self.pread_header(reader, idx)
+
+    def pread_header(self, reader, idx):
+        """
+        Read a traceheader with a positional read (safe to use from threads)
 
-        if idx >= 0:
-            handle.seek(self.start_offset + self.trace_size * idx)
+        :param reader: PositionalReader for the SEG-Y
+        :param idx: trace index
+        :return: TraceHeader object
+        """
+        data = reader.pread(TraceHeader.SIZE, self.header_offset(idx))
+        with decoding(self.stats, 'headers', 1):
+            return self.header_type(data, header_edits=self.header_edits, endian=self.endian)
+
+    def read_raw_headers(self, reader, indices):
+        """
+        Read the raw bytes of many trace headers with coalesced reads
+
+        :param reader: PositionalReader for the SEG-Y
+        :param indices: sequence of trace indices in any order
+        :return: bytearray of the headers packed together in index order
+        """
+        offsets = [self.header_offset(idx) for idx in indices]
+        return reader.gather(offsets, TraceHeader.SIZE, self.max_gap, self.CHUNK_BYTES)
+
+    def read_headers(self, reader, indices):
+        """
+        Read many trace headers with coalesced reads
+
+        :param reader: PositionalReader for the SEG-Y
+        :param indices: sequence of trace indices in any order
+        :return: list of TraceHeader objects in index order
+        """
+        view = memoryview(self.read_raw_headers(reader, indices))
+        record_type = self.header_type.record_type(self.header_edits, self.endian)
+        size = TraceHeader.SIZE
+        with decoding(self.stats, 'headers', len(view) // size):
+            return [record_type(view[pos:pos + size]) for pos in range(0, len(view), size)]
+
+    def _get_headers(self, source, trace_no):
+        """
+        Get a header or list of headers from an open source
+
+        :param source: object passed on to read_header
+        :param trace_no: int, slice or sequence of trace indices
+        :return: TraceHeader or list of TraceHeaders
+        """
+        if isinstance(trace_no, slice):
+            return self.read_headers(source, range(*trace_no.indices(self.trace_count)))
+        elif isinstance(trace_no, numbers.Integral):
+            return self.read_header(source, trace_no)
+        elif isinstance(trace_no, (str, bytes)) or not hasattr(trace_no, '__iter__'):
+            raise TypeError(
+                f'Trace Header Indices must be INT, slice or a sequence of INT, '
+                f'not {type(trace_no)}'
+            )
         else:
-            handle.seek(self.start_offset + self.trace_size * (idx + self.trace_count))
-        return TraceHeader.from_file(handle,
-                                     header_edits=self.header_edits,
-                                     endian=self.endian)
+            return self.read_headers(source, [int(idx) for idx in trace_no])
 
     def __getitem__(self, trace_no):
-        with self.path.open('rb') as sgy:
-            if isinstance(trace_no, slice):
-                start, stop, step = trace_no.start, trace_no.stop, trace_no.step
-                start = 0 if start is None else start
-                stop = self.trace_count if stop is None else stop
-                step = 1 if step is None else step
-                data = [self.read_header(sgy, i) for i in range(start, stop, step)]
-            elif isinstance(trace_no, int):
-                data = self.read_header(sgy, trace_no)
-            else:
-                raise TypeError(
-                    f'Trace Header Indices must be INT or slice, '
-                    f'not {type(trace_no)}'
-                )
+        with self._source() as sgy:
+            return self._get_headers(sgy, trace_no)
+
+    def _header_blocks(self, reader, indices):
+        """
+        Read the headers for a range of indices in large blocks
+
+        :param reader: PositionalReader for the SEG-Y
+        :param indices: ascending range of trace indices
+        :return: generator of (buffer, offset, count, record_size)
+        """
+        record_size = self.trace_size * indices.step
+        if record_size <= self.MAX_BLOCK_STRIDE:
+            # Read everything between the headers, it's cheaper than seeking
+            per_block = max(1, self.CHUNK_BYTES // record_size)
+            for i in range(0, len(indices), per_block):
+                block = indices[i:i + per_block]
+                buffer = bytearray((len(block) - 1) * record_size + TraceHeader.SIZE)
+                reader.readinto(buffer, self.header_offset(block[0]))
+                yield buffer, 0, len(block), record_size
+        else:
+            yield from self._gathered_blocks(reader, indices)
+
+    def _gathered_blocks(self, reader, indices):
+        """
+        Read the headers for a sequence of indices through the read planner
+
+        :param reader: PositionalReader for the SEG-Y
+        :param indices: sequence of trace indices
+        :return: generator of (buffer, offset, count, record_size)
+        """
+        per_block = max(1, self.CHUNK_BYTES // TraceHeader.SIZE)
+        for i in range(0, len(indices), per_block):
+            block = indices[i:i + per_block]
+            yield self.read_raw_headers(reader, block), 0, len(block), TraceHeader.SIZE
+
+    def read_columns(self, keys, start=None, stop=None, step=None, use_numpy=None):
+        """
+        Read selected header keys for a range of traces into columns
+
+        Only the requested keys are decoded, no TraceHeader objects are created.
+
+        :param keys: list of header keys to read
+        :param start: first trace index (as for slicing)
+        :param stop: end trace index (as for slicing)
+        :param step: trace step (as for slicing)
+        :param use_numpy: return numpy arrays (default: if numpy is installed)
+        :return: dict of {key: array} with numpy or array.array columns
+        """
+        decoder = ColumnDecoder(self.struct_dict, keys, self.endian, use_numpy)
+
+        indices = range(*slice(start, stop, step).indices(self.trace_count))
+        reverse = indices.step < 0
+        if reverse:
+            indices = indices[::-1]
+
+        columns = decoder.empty()
+        if indices:
+            with self._source() as source:
+                for block in self._header_blocks(source, indices):
+                    with decoding(self.stats, 'headers', block[2]):
+                        decoder.decode_into(columns, *block)
+        return decoder.finish(columns, reverse=reverse)
+
+    def iter_columns(self, keys, chunk_traces=65536, use_numpy=None):
+        """
+        Read selected header keys for every trace in chunks
+
+        :param keys: list of header keys to read
+        :param chunk_traces: number of traces in each chunk
+        :param use_numpy: return numpy arrays (default: if numpy is installed)
+        :return: generator of (first trace index, {key: array})
+        """
+        decoder = ColumnDecoder(self.struct_dict, keys, self.endian, use_numpy)
+        indices = range(self.trace_count)
+        chunk_traces = max(1, chunk_traces)
+        with self._source() as source:
+            for start in range(0, self.trace_count, chunk_traces):
+                columns = decoder.empty()
+                for block in self._header_blocks(source, indices[start:start + chunk_traces]):
+                    with decoding(self.stats, 'headers', block[2]):
+                        decoder.decode_into(columns, *block)
+                yield start, decoder.finish(columns)
+
+    def close(self):
+        """
+        Release any resources held by the indexer
+        """
+        pass
+
+
+class MmapTraceHeaderIndexer(TraceHeaderIndexer):
+    """
+    Handle indexing of trace headers through a memory map of the file.
+
+    The map is created on first access and kept until close() is called,
+    headers are unpacked directly from the mapped buffer.
+    """
+    def __init__(self, path, trace_size, trace_count, header_edits, endian, lazy=False,
+                 layout=None, stats=None):
+        super().__init__(path, trace_size, trace_count, header_edits, endian, lazy, layout,
+                         stats)
+        self._handle = None
+        self._mmap = None
+        self._buffer = None
+
+    @property
+    def buffer(self):
+        """
+        Read only memoryview over the whole mapped file
+        """
+        if self._buffer is None:
+            self._handle = self.path.open('rb')
+            try:
+                self._mmap = mmap.mmap(self._handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                self._handle.close()
+                self._handle = None
+                raise
+            self._buffer = memoryview(self._mmap)
+            if self.stats is not None:
+                self.stats.count('opens')
+        return self._buffer
+
+    def read_header(self, buffer, idx):
+        """
+        Read traceheader from the mapped buffer
+
+        :param buffer: memoryview of the SEG-Y file
+        :param idx: trace index
+        :return: TraceHeader object
+        """
+        offset = self.header_offset(idx)
+        # Slicing a memoryview does not copy the underlying data
+        data = buffer[offset:offset + TraceHeader.SIZE]
+        if self.lazy:
+            # Lazy headers keep their data, a copy lets the map be closed
+            data = bytes(data)
+        with decoding(self.stats, 'headers', 1):
+            return self.header_type(data, header_edits=self.header_edits, endian=self.endian)
+
+    def read_headers(self, buffer, indices):
+        return [self.read_header(buffer, idx) for idx in indices]
+
+    @contextmanager
+    def _source(self):
+        yield self.buffer
+
+    def _header_blocks(self, buffer, indices):
+        # Headers are decoded in place from the map at the full stride
+        yield buffer, self.header_offset(indices[0]), len(indices), self.trace_size * indices.step
+
+    def close(self):
+        if self._buffer is not None:
+            self._buffer.release()
+            self._mmap.close()
+            self._handle.close()
+            self._buffer = self._mmap = self._handle = None
+
+
+class VariableTraceHeaderIndexer(TraceHeaderIndexer):
+    """
+    Handle indexing of trace headers in files where traces differ in length.
+
+    Header offsets come from a TraceOffsets index so lookups stay O(1),
+    headers are always read through the read planner as there is no
+    fixed stride to read blocks at.
+    """
+    def __init__(self, path, offsets, header_edits, endian, lazy=False, stats=None):
+        """
+
+        :param path: path to SEG-Y File
+        :param offsets: TraceOffsets of the file
+        :param header_edits: edits to trace_header
+        :param endian: endianness of data
+        :param lazy: give LazyTraceHeader objects that decode keys on access
+        :param stats: IOStats to record reads and decoding in (default: not recorded)
+        """
+        super().__init__(path, None, len(offsets), header_edits, endian, lazy, layout=offsets,
+                         stats=stats)
+
+    def _header_blocks(self, reader, indices):
+        return self._gathered_blocks(reader, indices)
+
+
+class TraceDataIndexer:
+    """
+    Handle indexing and obtaining decoded trace samples by slicing.
+
+    Integer indices give the samples for one trace, slices and sequences
+    of indices give a 2D numpy array (trace, sample) if numpy is available
+    or a list of array.array otherwise.
+    """
+    CHUNK_BYTES = TraceHeaderIndexer.CHUNK_BYTES
+    MAX_BLOCK_STRIDE = TraceHeaderIndexer.MAX_BLOCK_STRIDE
+    MAX_GAP = TraceHeaderIndexer.MAX_GAP
+
+    def __init__(self, path, trace_size, trace_count, sample_format, endian, use_numpy=None,
+                 layout=None, stats=None):
+        """
+
+        :param path: path to SEG-Y File
+        :param trace_size: size of an individual trace (excluding headers)
+        :param trace_count: number of traces in the SEG-Y file
+        :param sample_format: SampleFormat of the trace data
+        :param endian: endianness of data
+        :param use_numpy: return numpy arrays (default: if numpy is installed)
+        :param layout: TraceLayout of the file
+                       (default: traces straight after the binary header)
+        :param stats: IOStats to record reads and decoding in (default: not recorded)
+        """
+        self.layout = layout if layout is not None else TraceLayout(trace_size, trace_count)
+        self.start_offset = self.layout.start_offset
+        self.path = Path(path)
+        self.data_size = trace_size
+        self.header_size = self.layout.header_size
+        self.trace_size = self.layout.trace_size
+        self.trace_count = self.layout.trace_count
+        self.sample_format = SampleFormat(sample_format)
+        self.sample_count = trace_size // self.sample_format.size
+        self.endian = endian
+        self.use_numpy = resolve_numpy(use_numpy)
+        self.max_gap = self.MAX_GAP
+        self.stats = stats
+
+    def trace_offset(self, idx):
+        """
+        Get the byte offset of a trace (starting at its header) in the file
+
+        :param idx: trace index (negative indices count from the end)
+        :return: offset of the start of the trace
+        """
+        return self.layout.trace_offset(idx)
+
+    def _trace_blocks(self, reader, indices):
+        """
+        Read traces for a sequence of indices with as few reads as possible
+
+        Ranges with a small step are read as strided blocks, other sequences
+        go through the read planner so nearby traces share reads.
+
+        :param reader: PositionalReader for the SEG-Y
+        :param indices: sequence of trace indices
+        :return: generator of (buffer, offset, count, record_size) in index order
+        """
+        if isinstance(indices, range) and indices.step > 0:
+            record_size = self.trace_size * indices.step
+            if record_size <= self.MAX_BLOCK_STRIDE:
+                per_block = max(1, self.CHUNK_BYTES // record_size)
+                for i in range(0, len(indices), per_block):
+                    block = indices[i:i + per_block]
+                    buffer = bytearray((len(block) - 1) * record_size + self.trace_size)
+                    reader.readinto(buffer, self.trace_offset(block[0]))
+                    yield buffer, self.header_size, len(block), record_size
+                return
+
+        per_block = max(1, self.CHUNK_BYTES // self.trace_size)
+        for i in range(0, len(indices), per_block):
+            block = indices[i:i + per_block]
+            offsets = [self.trace_offset(idx) for idx in block]
+            buffer = reader.gather(offsets, self.trace_size, self.max_gap, self.CHUNK_BYTES)
+            yield buffer, self.header_size, len(block), self.trace_size
+
+    def read_traces(self, reader, indices):
+        """
+        Read and decode the samples for a sequence of trace indices
+
+        :param reader: PositionalReader for the SEG-Y
+        :param indices: sequence of trace indices
+        :return: 2D numpy array or list of array.array
+        """
+        blocks = []
+        for block in self._trace_blocks(reader, indices):
+            with decoding(self.stats, 'samples', block[2] * self.sample_count):
+                blocks.append(decode_sample_block(*block, self.sample_count, self.sample_format,
+                                                  self.endian, use_numpy=self.use_numpy))
+        if not self.use_numpy:
+            return [trace for block in blocks for trace in block]
+        elif blocks:
+            return np.concatenate(blocks)
+        return np.empty((0, self.sample_count))
+
+    def __getitem__(self, trace_no):
+        if isinstance(trace_no, slice):
+            indices = range(*trace_no.indices(self.trace_count))
+        elif isinstance(trace_no, numbers.Integral):
+            self.trace_offset(trace_no)  # Bounds check
+            indices = [trace_no]
+        elif isinstance(trace_no, range):
+            if trace_no:
+                self.trace_offset(trace_no[0])
+                self.trace_offset(trace_no[-1])
+            indices = trace_no
+        elif isinstance(trace_no, (str, bytes)) or not hasattr(trace_no, '__iter__'):
+            raise TypeError(
+                f'Trace Indices must be INT, slice or a sequence of INT, '
+                f'not {type(trace_no)}'
+            )
+        else:
+            indices = [int(idx) for idx in trace_no]
+            for idx in indices:
+                self.trace_offset(idx)
+
+        with PositionalReader(self.path, self.stats) as reader:
+            data = self.read_traces(reader, indices)
+
+        if isinstance(trace_no, numbers.Integral):
+            return data[0]
+        return data
+
+
+class VariableTraceDataIndexer:
+    """
+    Handle indexing and obtaining decoded trace samples for traces that
+    differ in length.
+
+    Integer indices give the samples for one trace, slices and sequences
+    of indices give a list with the samples of each trace.
+    """
+    def __init__(self, path, offsets, sample_format, endian, use_numpy=None, stats=None):
+        """
+
+        :param path: path to SEG-Y File
+        :param offsets: TraceOffsets of the file
+        :param sample_format: SampleFormat of the trace data
+        :param endian: endianness of data
+        :param use_numpy: return numpy arrays (default: if numpy is installed)
+        :param stats: IOStats to record reads and decoding in (default: not recorded)
+        """
+        self.path = Path(path)
+        self.offsets = offsets
+        self.trace_count = len(offsets)
+        self.sample_format = SampleFormat(sample_format)
+        self.endian = endian
+        self.use_numpy = resolve_numpy(use_numpy)
+        self.stats = stats
+
+    def read_trace(self, reader, idx):
+        """
+        Read and decode the samples of a single trace
 
-        # Pycharm doesn't take the TypeError as not being a real branch
-        # noinspection PyUnboundLocalVariable
+        :param reader: PositionalReader for the SEG-Y
+        :param idx: trace index
+        :return: numpy array or array.array
+        """
+        data = reader.pread(self.offsets.data_size(idx), self.offsets.data_offset(idx))
+        with decoding(self.stats, 'samples', len(data) // self.sample_format.size):
+            return decode_samples(data, self.sample_format, self.endian,
+                                  use_numpy=self.use_numpy)
+
+    def __getitem__(self, trace_no):
+        if isinstance(trace_no, slice):
+            indices = range(*trace_no.indices(self.trace_count))
+        elif isinstance(trace_no, numbers.Integral):
+            self.offsets.trace_offset(trace_no)  # Bounds check
+            indices = [trace_no]
+        elif isinstance(trace_no, (str, bytes)) or not hasattr(trace_no, '__iter__'):
+            raise TypeError(
+                f'Trace Indices must be INT, slice or a sequence of INT, '
+                f'not {type(trace_no)}'
+            )
+        else:
+            indices = [int(idx) for idx in trace_no]
+            for idx in indices:
+                self.offsets.trace_offset(idx)
+
+        with PositionalReader(self.path, self.stats) as reader:
+            data = [self.read_trace(reader, idx) for idx in indices]
+
+        if isinstance(trace_no, numbers.Integral):
+            return data[0]
         return data
 
 
+class LoadedTraceHeader:
+    """
+    Trace header values taken from loaded header columns
+
+    Dict-like access to the loaded header keys.
+    """
+    def __init__(self, data):
+        self.data = data
+
+    def __str__(self):
+        return str(self.data)
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __getattr__(self, key):
+        try:
+            return self.data[key]
+        except KeyError:
+            raise AttributeError(f'LoadedTraceHeader object has no attribute \'{key}\'')
+
+
+class LoadedHeaderIndexer:
+    """
+    Handle indexing of trace headers loaded into memory as columns.
+    """
+    def __init__(self, columns, trace_count):
+        """
+
+        :param columns: dict of {key: column} covering every trace
+        :param trace_count: number of traces in the SEG-Y file
+        """
+        self.columns = columns
+        self.trace_count = trace_count
+
+    def _values(self, column, indices):
+        if np is not None and isinstance(column, np.ndarray):
+            return column[list(indices)].tolist()
+        return [column[i] for i in indices]
+
+    def _index(self, idx):
+        idx = operator.index(idx)
+        if idx >= self.trace_count or idx < -self.trace_count:
+            raise IndexError(f'Index {idx} out of range.')
+        return idx
+
+    def __getitem__(self, trace_no):
+        single = False
+        if isinstance(trace_no, slice):
+            indices = range(*trace_no.indices(self.trace_count))
+        elif isinstance(trace_no, (str, bytes)):
+            indices = None
+        elif hasattr(trace_no, '__iter__'):
+            indices = [self._index(idx) for idx in trace_no]
+        else:
+            try:
+                indices = [self._index(trace_no)]
+            except TypeError:
+                indices = None
+            single = True
+        if indices is None:
+            raise TypeError(
+                f'Trace Header Indices must be INT, slice or a sequence of INT, '
+                f'not {type(trace_no)}'
+            )
+
+        keys = list(self.columns)
+        values = [self._values(self.columns[key], indices) for key in keys]
+        headers = [LoadedTraceHeader(dict(zip(keys, row))) for row in zip(*values)]
+
+        if single:
+            return headers[0]
+        return headers
+
+    def read_columns(self, keys, start=None, stop=None, step=None):
+        """
+        Get selected loaded header keys for a range of traces
+
+        :param keys: list of header keys
+        :param start: first trace index (as for slicing)
+        :param stop: end trace index (as for slicing)
+        :param step: trace step (as for slicing)
+        :return: dict of {key: column}
+        """
+        selection = slice(start, stop, step)
+        return {key: self.columns[key][selection] for key in keys}
+
+    def iter_columns(self, keys, chunk_traces=65536):
+        """
+        Get selected loaded header keys for every trace in chunks
+
+        :param keys: list of header keys
+        :param chunk_traces: number of traces in each chunk
+        :return: generator of (first trace index, {key: column})
+        """
+        chunk_traces = max(1, chunk_traces)
+        for start in range(0, self.trace_count, chunk_traces):
+            yield start, self.read_columns(keys, start, start + chunk_traces)
+
+
 class SegY:
     ENDIAN = '>'
 
@@ -440,8 +1165,37 @@ class SegY:
             trheader_edits=None,
             binheader_overrides=None,
             # trheader_overrides=None,
-            endian=ENDIAN
+            endian=ENDIAN,
+            memory_map=False,
+            lazy_headers=False,
+            variable_length=False,
+            offset_cache=False,
+            offset_cache_dir=None,
+            stats=None,
     ):
+        """
+        Open a SEG-Y file and read the text and binary headers
+
+        :param filepath: path to the SEG-Y file
+        :param text_encoding: encoding of the text header
+        :param binheader_edits: edits to the structure of the binary header
+        :param trheader_edits: edits to the structure of the trace headers
+        :param binheader_overrides: overrides of values in the binary header
+        :param endian: endianness of the data '>' big, '<' little
+        :param memory_map: read trace headers through a memory map of the file
+                           held open until close() is called
+        :param lazy_headers: trace headers decode each key when first used
+                             instead of every key up front
+        :param variable_length: traces may differ in length, their offsets are
+                                found from each header's SAMPLE_COUNT in one
+                                pass over the headers
+        :param offset_cache: store the trace offsets of a variable length file
+                             and reuse them until the file changes
+        :param offset_cache_dir: offset cache directory
+                                 (default: next to the SEG-Y file)
+        :param stats: IOStats to record file access and decoding in
+                      (default: not recorded)
+        """
         self.filepath = Path(filepath)
 
         self.text_encoding = text_encoding
@@ -450,51 +1204,532 @@ class SegY:
         self.trheader_edits = trheader_edits if trheader_edits else {}
         # self.trheader_overrides = trheader_overrides if trheader_overrides else {}
         self.endian = endian
+        self.stats = stats
 
-        with self.filepath.open('rb') as segy_data:
+        with open_file(self.filepath, stats) as segy_data:
             self.text_header = TextHeader.from_file(segy_data, self.text_encoding)
             self.binary_header = BinaryHeader.from_file(segy_data,
                                                         self.binheader_edits,
                                                         self.binheader_overrides,
                                                         self.endian)
 
-        self.samples_per_trace = self.binary_header['SAMPLES_PER_TRACE']
-        self.sample_format = SampleFormat(self.binary_header['SAMPLE_FORMAT_CODE'])
-        self.sample_size = self.sample_format.size
-        self.trace_size = self.sample_size * self.samples_per_trace
+            self.samples_per_trace = self.binary_header['SAMPLES_PER_TRACE']
+            self.sample_format = SampleFormat(self.binary_header['SAMPLE_FORMAT_CODE'])
+            self.sample_size = self.sample_format.size
+            self.trace_size = self.sample_size * self.samples_per_trace
 
-        filesize = self.filepath.stat().st_size
-        data_size = (filesize - TextHeader.CHARACTERS - BinaryHeader.SIZE)
-        self.trace_count = data_size // (TraceHeader.SIZE + self.trace_size)
+            self.layout = TraceLayout.from_file(segy_data,
+                                                self.binary_header,
+                                                self.trace_size,
+                                                self.filepath.stat().st_size,
+                                                self.text_encoding)
+        self.variable_length = variable_length
 
         self._loaded = False
-        self.headerindexer = TraceHeaderIndexer(self.filepath,
-                                                self.trace_size,
-                                                self.trace_count,
-                                                self.trheader_edits,
-                                                self.endian)
+        self._records = None
+        if variable_length:
+            if memory_map:
+                raise ValueError('memory_map is not supported for variable length files')
+            self.layout = self._trace_offsets(offset_cache, offset_cache_dir)
+            self.trace_count = self.layout.trace_count
+            self.headerindexer = VariableTraceHeaderIndexer(self.filepath,
+                                                            self.layout,
+                                                            self.trheader_edits,
+                                                            self.endian,
+                                                            lazy=lazy_headers,
+                                                            stats=stats)
+            self.traceindexer = VariableTraceDataIndexer(self.filepath,
+                                                         self.layout,
+                                                         self.sample_format,
+                                                         self.endian,
+                                                         stats=stats)
+            return
+
+        self.trace_count = self.layout.trace_count
+        indexer = MmapTraceHeaderIndexer if memory_map else TraceHeaderIndexer
+        self.headerindexer = indexer(self.filepath,
+                                     self.trace_size,
+                                     self.trace_count,
+                                     self.trheader_edits,
+                                     self.endian,
+                                     lazy=lazy_headers,
+                                     layout=self.layout,
+                                     stats=stats)
+        self.traceindexer = TraceDataIndexer(self.filepath,
+                                             self.trace_size,
+                                             self.trace_count,
+                                             self.sample_format,
+                                             self.endian,
+                                             layout=self.layout,
+                                             stats=stats)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _trace_offsets(self, cache=False, cache_dir=None):
+        """
+        Find the trace offsets of a variable length file, optionally through the cache
+
+        :param cache: use the on-disk offset cache
+        :param cache_dir: cache directory (default: next to the SEG-Y file)
+        :return: TraceOffsets
+        """
+        layout = self.layout
+        if cache:
+            key = self._cache_key()
+            offsets = TraceOffsets.load(key, cache_dir)
+            if offsets is not None:
+                return offsets
+
+        struct_dict = {**TraceHeader.STRUCT_DICT, **self.trheader_edits}
+        offsets = TraceOffsets.from_file(self.filepath, layout, self.sample_size,
+                                         struct_dict['SAMPLE_COUNT'], self.endian,
+                                         self.filepath.stat().st_size, stats=self.stats)
+        if cache:
+            try:
+                offsets.save(key, cache_dir)
+            except OSError as e:
+                # The cache only saves time, the offsets are still good
+                warnings.warn(f'Trace offsets could not be cached: {e}',
+                              stacklevel=caller_stacklevel())
+        return offsets
+
+    def _cache_key(self):
+        """
+        Cache key of the file as read with the current edits and layout
+
+        :return: dict (see cache.file_key)
+        """
+        return file_key(self.filepath, self.endian, self.trheader_edits, self.layout,
+                        self.sample_size)
+
+    def _require_fixed_length(self, name):
+        if self.variable_length:
+            raise ValueError(f'{name} requires traces of a fixed length')
+
+    def close(self):
+        """
+        Close any file handles or memory maps held by the SegY object
+        """
+        self.headerindexer.close()
+        self._records = None
+
+    def trace_records(self):
+        """
+        Memory map the trace region as a numpy structured array
+
+        Each record holds every trace header key (including edits) and the
+        samples for that trace in the 'SAMPLES' field, so header columns
+        (eg: records['INLINE']) and blocks of traces are strided views into
+        the file without copying. IBM floats are left as raw uint32 values.
+
+        Requires numpy.
+
+        :return: read only numpy memmap with one record per trace
+        """
+        if np is None:
+            raise ModuleNotFoundError('Module \'numpy\' could not be found')
+        self._require_fixed_length('trace_records')
+        if self._records is None:
+            dtype = trace_dtype(self.headerindexer.struct_dict,
+                                self.layout.header_size,
+                                self.sample_format,
+                                self.samples_per_trace,
+                                self.endian)
+            self._records = np.memmap(self.filepath,
+                                      dtype=dtype,
+                                      mode='r',
+                                      offset=self.layout.start_offset,
+                                      shape=(self.trace_count,))
+            if self.stats is not None:
+                self.stats.count('opens')
+        return self._records
 
     @property
     def trace_header(self):
         if self._loaded:
-            raise NotImplementedError('Loading headers not yet implemented')
+            return self._loaded_indexer
         else:
             return self.headerindexer
 
-    def sampled_headers(self, count):
+    def _read_all_columns(self, keys, cache=False, cache_dir=None, use_numpy=None):
+        """
+        Read header columns for every trace, optionally through the header cache
+
+        :param keys: trace header keys to read
+        :param cache: use the on-disk header cache
+        :param cache_dir: cache directory (default: next to the SEG-Y file)
+        :param use_numpy: return numpy arrays (default: if numpy is installed)
+        :return: dict of {key: column} (may include extra cached keys)
+        """
+        cached = None
+        if cache:
+            header_cache = HeaderCache(cache_dir)
+            key = self._cache_key()
+            cached = header_cache.load(key, use_numpy=use_numpy)
+
+        columns = cached if cached else {}
+        missing = [name for name in keys if name not in columns]
+        if missing:
+            columns.update(self.headerindexer.read_columns(missing, use_numpy=use_numpy))
+            if cache:
+                decoder = ColumnDecoder(self.headerindexer.struct_dict, list(columns),
+                                        self.endian, use_numpy)
+                typecodes = {name: decoder.typecode(name) for name in columns}
+                try:
+                    header_cache.save(key, columns, typecodes)
+                except OSError as e:
+                    # eg: read only archives, the columns are still good
+                    warnings.warn(f'Trace headers could not be cached: {e}',
+                                  stacklevel=caller_stacklevel())
+        return columns
+
+    def load_headers(self, keys=None, *, cache=False, cache_dir=None, use_numpy=None):
+        """
+        Load trace header columns into memory
+
+        After loading, trace_header gives headers containing the loaded keys
+        from memory and headers_columns uses the loaded data where it can.
+
+        With cache enabled the columns are stored on disk (next to the file
+        or in cache_dir) and reused until the file, endianness or trace
+        header edits change.
+
+        :param keys: trace header keys to load (default: all keys)
+        :param cache: use the on-disk header cache
+        :param cache_dir: cache directory (default: next to the SEG-Y file)
+        :param use_numpy: store numpy arrays (default: if numpy is installed)
+        :return: dict of {key: column}
+        """
+        keys = list(self.headerindexer.struct_dict) if keys is None else list(keys)
+        columns = self._read_all_columns(keys, cache, cache_dir, use_numpy)
+
+        self._loaded_indexer = LoadedHeaderIndexer(
+            {name: columns[name] for name in keys}, self.trace_count
+        )
+        self._loaded = True
+        return self._loaded_indexer.columns
+
+    @property
+    def traces(self):
+        """
+        Indexer for decoded trace samples (see TraceDataIndexer)
+        """
+        return self.traceindexer
+
+    def iter_traces(self, chunk_traces=1024, *, fields=None, decode=True, batches=False,
+                    use_numpy=None):
+        """
+        Iterate over every trace in the file in order
+
+        The trace region is read in chunks of chunk_traces whole traces into
+        a single reused buffer, so memory use does not depend on file size.
+
+        Per trace this yields (header, samples) where header is a TraceHeader,
+        or a dict of only the requested fields, and samples are the decoded
+        samples or an undecoded TraceData if decode is False.
+
+        With batches this yields (columns, samples) once per chunk where
+        columns is a dict of header columns for fields (default: all keys)
+        and samples is a 2D numpy array or list of array.array (or a list
+        of TraceData if decode is False).
+
+        :param chunk_traces: number of traces read at once
+        :param fields: header keys to decode (default: full headers)
+        :param decode: decode the samples
+        :param batches: yield one item per chunk instead of per trace
+        :param use_numpy: use numpy arrays (default: if numpy is installed)
+        :return: generator
+        """
+        self._require_fixed_length('iter_traces')
+        indexer = self.headerindexer
+        stride = indexer.trace_size
+        header_size = self.layout.header_size
+        decoder = None
+        if fields is not None or batches:
+            keys = list(indexer.struct_dict) if fields is None else list(fields)
+            decoder = ColumnDecoder(indexer.struct_dict, keys, self.endian, use_numpy)
+
+        buffer = bytearray(max(1, chunk_traces) * stride)
+        view = memoryview(buffer)
+        with open_file(self.filepath, self.stats) as handle:
+            handle.seek(indexer.start_offset)
+            remaining = self.trace_count
+            while remaining > 0:
+                count = min(remaining, len(buffer) // stride)
+                read = handle.readinto(view[:count * stride])
+                count = min(count, read // stride)
+                if count == 0:
+                    break
+                remaining -= count
+
+                if decoder is not None:
+                    with decoding(self.stats, 'headers', count):
+                        columns = decoder.empty()
+                        decoder.decode_into(columns, buffer, 0, count, stride)
+                        columns = decoder.finish(columns)
+
+                if decode:
+                    with decoding(self.stats, 'samples', count * self.samples_per_trace):
+                        samples = decode_sample_block(buffer, header_size, count, stride,
+                                                      self.samples_per_trace,
+                                                      self.sample_format,
+                                                      self.endian, use_numpy=use_numpy)
+                else:
+                    samples = [
+                        TraceData(bytes(view[pos + header_size:pos + stride]),
+                                  self.sample_format, self.endian, self.stats)
+                        for pos in range(0, count * stride, stride)
+                    ]
+
+                if batches:
+                    yield columns, samples
+                elif decoder is not None:
+                    rows = zip(*(columns[key].tolist() for key in decoder.keys))
+                    for row, trace in zip(rows, samples):
+                        yield dict(zip(decoder.keys, row)), trace
+                else:
+                    for pos, trace in zip(range(0, count * stride, stride), samples):
+                        # The buffer is reused, lazy headers need their own copy
+                        data = view[pos:pos + TraceHeader.SIZE]
+                        with decoding(self.stats, 'headers', 1):
+                            header = indexer.header_type(bytes(data) if indexer.lazy else data,
+                                                         indexer.header_edits, self.endian)
+                        yield header, trace
+
+    def headers_columns(self, keys, start=None, stop=None, step=None, *, use_numpy=None):
+        """
+        Read selected trace header keys for a range of traces as columns
+
+        :param keys: list of trace header keys (eg: ['INLINE', 'CROSSLINE'])
+        :param start: first trace index
+        :param stop: end trace index (exclusive)
+        :param step: trace step
+        :param use_numpy: return numpy arrays (default: if numpy is installed)
+        :return: dict of {key: array}
+        """
+        loaded = self._loaded and use_numpy is None
+        if loaded and all(key in self._loaded_indexer.columns for key in keys):
+            return self._loaded_indexer.read_columns(keys, start, stop, step)
+        return self.headerindexer.read_columns(keys, start, stop, step, use_numpy=use_numpy)
+
+    def _iter_columns(self, keys, chunk_traces, use_numpy=None):
+        """
+        Header columns for every trace in chunks, from loaded headers if possible
+
+        :return: generator of (first trace index, {key: column})
+        """
+        loaded = self._loaded and use_numpy is None
+        if loaded and all(key in self._loaded_indexer.columns for key in keys):
+            return self._loaded_indexer.iter_columns(keys, chunk_traces)
+        return self.headerindexer.iter_columns(keys, chunk_traces, use_numpy=use_numpy)
+
+    def select(self, where, *, chunk_traces=65536, batches=False, use_numpy=None):
+        """
+        Find the traces with header values matching every condition
+
+        Conditions are {'key': condition} where condition is a value to
+        match, an inclusive (low, high) range with None for an open end,
+        a set of allowed values or a function taking a column of values
+        and returning a boolean mask. eg:
+
+            sgy.select({'TRACE_ID_CODE': 1, 'CDP': (2000, 2500)})
+
+        Only the keys in the conditions are decoded, chunk_traces headers
+        at a time, and matching indices are produced as each chunk is
+        checked. The indices can be passed on to trace_header or traces.
+
+        :param where: dict of {'key': condition}
+        :param chunk_traces: number of trace headers checked at once
+        :param batches: yield an array of matching indices for each chunk
+        :param use_numpy: evaluate with numpy arrays (default: if numpy is installed)
+        :return: generator of trace indices (or of index arrays with batches)
+        """
+        header_filter = HeaderFilter(where)
+
+        for start, columns in self._iter_columns(header_filter.keys, chunk_traces, use_numpy):
+            matches = header_filter.matches(columns, start)
+            if batches:
+                if len(matches):
+                    yield matches
+            elif isinstance(matches, list):
+                yield from matches
+            else:
+                yield from matches.tolist()
+
+    def header_summary(self, fields=None, *, chunk_traces=65536, precision=12, use_numpy=None):
+        """
+        Statistics of trace header values over every trace in one pass
+
+        For each key this gives the minimum, maximum, number of distinct
+        values and whether the values only increase or only decrease in
+        trace order. Headers are decoded as columns chunk_traces at a time
+        and distinct values are counted in fixed memory (exact up to 1024
+        values, then a HyperLogLog estimate), eg:
+
+            summary = sgy.header_summary()
+            summary.constant_fields()   # unused or dead keys
+            summary['CDP'].increasing
+            print(summary)
+
+        Loaded header columns are used if they cover every key.
+
+        :param fields: trace header keys to summarise (default: all keys)
+        :param chunk_traces: number of trace headers decoded at once
+        :param precision: HyperLogLog precision, 2**precision bytes per key
+                          for about 1.04 / sqrt(2**precision) relative error
+        :param use_numpy: use numpy arrays (default: if numpy is installed)
+        :return: HeaderSummary
+        """
+        keys = list(self.headerindexer.struct_dict) if fields is None else list(fields)
+        summary = HeaderSummary(keys, precision)
+        for _, columns in self._iter_columns(keys, chunk_traces, use_numpy):
+            summary.add(columns)
+        return summary
+
+    def _sample_interval(self, count):
         interval = self.trace_count // count
         if interval < 1:
             interval = 1
+        return interval
+
+    def sampled_indices(self, count):
+        """
+        Trace indices used for approximately *count* evenly spaced samples
+
+        The last trace is always included.
+
+        :param count: rough number of samples wanted
+        :return: list of trace indices
+        """
+        interval = self._sample_interval(count)
+        indices = list(range(0, self.trace_count, interval))
+        if self.trace_count and (self.trace_count - 1) not in range(0, self.trace_count, interval):
+            indices.append(self.trace_count - 1)
+        return indices
+
+    def sampled_headers(self, count):
+        interval = self._sample_interval(count)
 
         samples = self.trace_header[::interval]
-        if (self.trace_count - 1) not in range(0, self.trace_count, interval):
+        if self.trace_count and (self.trace_count - 1) not in range(0, self.trace_count, interval):
             samples.append(self.trace_header[self.trace_count - 1])
 
         return samples
 
+    async def sampled_headers_async(self, count, *, concurrency=16, executor=None):
+        """
+        Get approximately *count* sampled headers with concurrent reads
+
+        Header reads are issued together through a thread pool, with at most
+        *concurrency* in flight, and returned in trace order. Useful where
+        each read has high latency (eg: network filesystems).
+
+        :param count: rough number of samples wanted
+        :param concurrency: maximum number of reads in flight
+        :param executor: concurrent.futures executor to use
+                         (default: a new thread pool of *concurrency* threads)
+        :return: list of TraceHeader objects
+        """
+        if self._loaded:
+            return self.sampled_headers(count)
+
+        loop = get_running_loop()
+        indexer = self.headerindexer
+        semaphore = asyncio.Semaphore(concurrency)
+
+        own_executor = executor is None
+        if own_executor:
+            executor = ThreadPoolExecutor(max_workers=concurrency)
+
+        async def read(reader, idx):
+            async with semaphore:
+                return await loop.run_in_executor(executor, indexer.pread_header, reader, idx)
+
+        try:
+            with PositionalReader(self.filepath, self.stats) as reader:
+                return await asyncio.gather(
+                    *(read(reader, idx) for idx in self.sampled_indices(count))
+                )
+        finally:
+            if own_executor:
+                executor.shutdown(wait=False)
+
+    def _sampled_columns(self, count, keys, use_numpy=None):
+        """
+        Header columns for the sampled traces (see sampled_indices)
+
+        :param count: rough number of samples wanted
+        :param keys: header keys to read
+        :param use_numpy: return numpy arrays (default: if numpy is installed)
+        :return: dict of {key: column}
+        """
+        interval = self._sample_interval(count)
+        columns = self.headers_columns(keys, step=interval, use_numpy=use_numpy)
+        last = self.trace_count - 1
+        if last > 0 and last % interval:
+            final = self.headers_columns(keys, last, last + 1, use_numpy=use_numpy)
+            for key, column in columns.items():
+                if np is not None and isinstance(column, np.ndarray):
+                    columns[key] = np.concatenate([column, final[key]])
+                else:
+                    column.extend(final[key])
+        return columns
+
+    def _require_survey(self):
+        raise TypeError(
+            f'Navigation needs a 2D or 3D survey, open the file with SegY2D or SegY3D '
+            f'rather than {self.__class__.__name__}'
+        )
+
+    def _nav_keys(self, **kwargs):
+        self._require_survey()
+
+    def _column_nav(self, columns, **kwargs):
+        self._require_survey()
+
+    def nav_columns(self, start=None, stop=None, step=None, *, use_numpy=None, **kwargs):
+        """
+        Navigation for a range of traces as columns
+
+        Only the keys needed for the navigation are read and scalars are
+        applied to whole columns. Takes the same keyword arguments as
+        sampled_nav.
+
+        :param start: first trace index
+        :param stop: end trace index (exclusive)
+        :param step: trace step
+        :param use_numpy: use numpy arrays (default: if numpy is installed)
+        :return: NavColumns (use .tuples() for a list of namedtuples)
+        """
+        columns = self.headers_columns(self._nav_keys(**kwargs), start, stop, step,
+                                       use_numpy=use_numpy)
+        return self._column_nav(columns, **kwargs)
 
-Nav2D = namedtuple('Nav2D', 'trace sp cdp x y')
-Nav3D = namedtuple('Nav3D', 'trace inline xline x y')
+    def _nav_from_samples(self, samples, **kwargs):
+        keys = self._nav_keys(**kwargs)
+        columns = {key: [sample[key] for sample in samples] for key in keys}
+        return self._column_nav(columns, **kwargs).tuples()
+
+    async def sampled_nav_async(self, count, *, concurrency=16, executor=None, **kwargs):
+        """
+        Get approximately *count* samples of navigation with concurrent reads
+
+        Takes the same keyword arguments as sampled_nav.
+
+        :param count: rough number of samples wanted
+        :param concurrency: maximum number of reads in flight
+        :param executor: concurrent.futures executor to use
+        :return: list of navigation namedtuples
+        """
+        self._nav_keys(**kwargs)  # Check the survey kind before reading
+        samples = await self.sampled_headers_async(count,
+                                                   concurrency=concurrency,
+                                                   executor=executor)
+        return self._nav_from_samples(samples, **kwargs)
 
 
 class SegY2D(SegY):
@@ -508,6 +1743,8 @@ class SegY2D(SegY):
             nav_loc='CDP',
             use_nav_scalar=True,
             use_sp_scalar=True,
+            as_columns=False,
+            use_numpy=None,
     ):
         """
         Get approximately *count* samples of navigation
@@ -519,34 +1756,21 @@ class SegY2D(SegY):
         :param nav_loc: Start of key of navigation in header (eg: 'CDP')
         :param use_nav_scalar: Use the navigation scalar in the header
         :param use_sp_scalar: Use the shotpoint scalar in the header
+        :param as_columns: return NavColumns instead of a list of namedtuples
+        :param use_numpy: use numpy arrays (default: if numpy is installed)
         :return: list of (trace, sp, cdp, x, y) namedtuples.
         """
-        x_loc, y_loc = nav_loc + '_X', nav_loc + '_Y'
-
-        samples = self.sampled_headers(count)
-
-        nav = []
-        for sample in samples:
-            trace, sp, cdp = sample[trace_loc], sample[sp_loc], sample[cdp_loc]
-            x, y = sample[x_loc], sample[y_loc]
-
-            if use_sp_scalar:
-                scalar = sample['SP_SCALAR']
-                if scalar > 0:
-                    sp *= scalar
-                elif scalar < 0:
-                    sp /= -scalar
-
-            if use_nav_scalar:
-                scalar = sample['COORDINATE_SCALAR']
-                if scalar > 0:
-                    x, y = x * scalar, y * scalar
-                elif scalar < 0:
-                    x, y = x / -scalar, y / -scalar
+        options = dict(trace_loc=trace_loc, sp_loc=sp_loc, cdp_loc=cdp_loc, nav_loc=nav_loc,
+                       use_nav_scalar=use_nav_scalar, use_sp_scalar=use_sp_scalar)
+        columns = self._sampled_columns(count, nav_keys_2d(**options), use_numpy)
+        nav = nav_2d(columns, **options)
+        return nav if as_columns else nav.tuples()
 
-            nav.append(Nav2D(trace, sp, cdp, x, y))
+    def _nav_keys(self, **kwargs):
+        return nav_keys_2d(**kwargs)
 
-        return nav
+    def _column_nav(self, columns, **kwargs):
+        return nav_2d(columns, **kwargs)
 
     def get_geometry(
             self,
@@ -558,26 +1782,77 @@ class SegY2D(SegY):
         if geometry is None:
             raise ModuleNotFoundError('Module \'shapely\' could not be found')
 
-        x_loc, y_loc = nav_loc + '_X', nav_loc + '_Y'
+        nav = self.sampled_nav(count, nav_loc=nav_loc, use_nav_scalar=use_nav_scalar,
+                               use_sp_scalar=False, as_columns=True)
+        return geometry.LineString(nav.points())
 
-        samples = self.sampled_headers(count)
 
-        nav = []
-        for sample in samples:
-            x, y = sample[x_loc], sample[y_loc]
+class SegY3D(SegY):
+    def __init__(self, filepath, **kwargs):
+        super().__init__(filepath, **kwargs)
+        self._geometry_index = None
 
-            if use_nav_scalar:
-                scalar = sample['COORDINATE_SCALAR']
-                if scalar > 0:
-                    x, y = x * scalar, y * scalar
-                elif scalar < 0:
-                    x, y = x / -scalar, y / -scalar
+    def build_index(
+            self,
+            *,
+            inline_loc='INLINE',
+            crossline_loc='CROSSLINE',
+            cache=False,
+            cache_dir=None,
+    ):
+        """
+        Build the inline/crossline to trace index lookup
 
-            nav.append((x, y))
-        return geometry.LineString(nav)
+        Regularly sorted surveys are detected and looked up by arithmetic,
+        others use a dictionary of header values.
 
+        :param inline_loc: key of inline number in header
+        :param crossline_loc: key of crossline number in header
+        :param cache: store the header columns in the on-disk header cache
+        :param cache_dir: cache directory (default: next to the SEG-Y file)
+        :return: GeometryIndex
+        """
+        columns = self._read_all_columns([inline_loc, crossline_loc], cache, cache_dir)
+        self._geometry_index = GeometryIndex(columns[inline_loc], columns[crossline_loc])
+        return self._geometry_index
+
+    @property
+    def geometry_index(self):
+        """
+        Inline/crossline lookup, built with default keys on first use
+        """
+        if self._geometry_index is None:
+            self.build_index()
+        return self._geometry_index
+
+    def inline(self, inline):
+        """
+        Decoded samples for every trace in an inline
+
+        :param inline: inline number
+        :return: traces as for the traces indexer
+        """
+        return self.traces[self.geometry_index.inline_traces(inline)]
+
+    def crossline(self, crossline):
+        """
+        Decoded samples for every trace in a crossline
+
+        :param crossline: crossline number
+        :return: traces as for the traces indexer
+        """
+        return self.traces[self.geometry_index.crossline_traces(crossline)]
+
+    def trace_at(self, inline, crossline):
+        """
+        Decoded samples for the trace at an inline/crossline location
+
+        :param inline: inline number
+        :param crossline: crossline number
+        :return: samples for one trace
+        """
+        return self.traces[self.geometry_index.trace_index(inline, crossline)]
 
-class SegY3D(SegY):
     def sampled_nav(
             self,
             count,
@@ -587,28 +1862,33 @@ class SegY3D(SegY):
             crossline_loc='CROSSLINE',
             nav_loc='CDP',
             use_nav_scalar=True,
+            as_columns=False,
+            use_numpy=None,
     ):
-        x_loc, y_loc = nav_loc + '_X', nav_loc + '_Y'
-
-        samples = self.sampled_headers(count)
-
-        nav = []
-
-        for sample in samples:
-            trace = sample[trace_loc]
-            inline, crossline = sample[inline_loc], sample[crossline_loc]
-            x, y = sample[x_loc], sample[y_loc]
+        """
+        Get approximately *count* samples of navigation
 
-            if use_nav_scalar:
-                scalar = sample['COORDINATE_SCALAR']
-                if scalar > 0:
-                    x, y = x * scalar, y * scalar
-                elif scalar < 0:
-                    x, y = x / -scalar, y / -scalar
+        :param count: rough number of samples wanted
+        :param trace_loc: key of trace data in header
+        :param inline_loc: key of inline number in header
+        :param crossline_loc: key of crossline number in header
+        :param nav_loc: Start of key of navigation in header (eg: 'CDP')
+        :param use_nav_scalar: Use the navigation scalar in the header
+        :param as_columns: return NavColumns instead of a list of namedtuples
+        :param use_numpy: use numpy arrays (default: if numpy is installed)
+        :return: list of (trace, inline, xline, x, y) namedtuples.
+        """
+        options = dict(trace_loc=trace_loc, inline_loc=inline_loc, crossline_loc=crossline_loc,
+                       nav_loc=nav_loc, use_nav_scalar=use_nav_scalar)
+        columns = self._sampled_columns(count, nav_keys_3d(**options), use_numpy)
+        nav = nav_3d(columns, **options)
+        return nav if as_columns else nav.tuples()
 
-            nav.append(Nav3D(trace, inline, crossline, x, y))
+    def _nav_keys(self, **kwargs):
+        return nav_keys_3d(**kwargs)
 
-        return nav
+    def _column_nav(self, columns, **kwargs):
+        return nav_3d(columns, **kwargs)
 
     def get_point_geometry(
             self,
@@ -620,24 +1900,56 @@ class SegY3D(SegY):
         if geometry is None:
             raise ModuleNotFoundError('Module \'shapely\' could not be found')
 
-        x_loc, y_loc = nav_loc + '_X', nav_loc + '_Y'
-
-        samples = self.sampled_headers(count)
-
-        nav = []
-        for sample in samples:
-            x, y = sample[x_loc], sample[y_loc]
+        nav = self.sampled_nav(count, nav_loc=nav_loc, use_nav_scalar=use_nav_scalar,
+                               as_columns=True)
+        return geometry.MultiPoint(nav.points())
 
+    def footprint(
+            self,
+            *,
+            inline_loc='INLINE',
+            crossline_loc='CROSSLINE',
+            nav_loc='CDP',
+            use_nav_scalar=True,
+            chunk_traces=65536,
+            use_numpy=None,
+            max_bins=MAX_BINS,
+    ):
+        """
+        Scan every trace header for the bins occupied by the survey
+
+        Only the line number, coordinate and scalar keys are read, a chunk
+        of traces at a time. Memory use depends on the inline/crossline
+        extent of the survey rather than the number of traces.
+
+        :param inline_loc: header key of the inline number
+        :param crossline_loc: header key of the crossline number
+        :param nav_loc: coordinate key prefix ('CDP', 'SOURCE' or 'GROUP')
+        :param use_nav_scalar: apply COORDINATE_SCALAR to the coordinates
+        :param chunk_traces: number of trace headers read at once
+        :param use_numpy: use numpy arrays (default: if numpy is installed)
+        :param max_bins: largest occupancy grid (inlines * crossline range) allowed
+        :return: Footprint with the occupancy grid and bin to map transform
+        """
+        x_loc, y_loc = nav_loc + '_X', nav_loc + '_Y'
+        keys = [inline_loc, crossline_loc, x_loc, y_loc]
+        if use_nav_scalar:
+            keys.append('COORDINATE_SCALAR')
+
+        grid = OccupancyGrid(max_bins)
+        fit = AffineFit()
+        for _, columns in self._iter_columns(keys, chunk_traces, use_numpy):
+            inlines, crosslines = columns[inline_loc], columns[crossline_loc]
+            x, y = columns[x_loc], columns[y_loc]
             if use_nav_scalar:
-                scalar = sample['COORDINATE_SCALAR']
-                if scalar > 0:
-                    x, y = x * scalar, y * scalar
-                elif scalar < 0:
-                    x, y = x / -scalar, y / -scalar
-
-            nav.append((x, y))
+                x, y = scale_coordinates(x, y, columns['COORDINATE_SCALAR'])
+            grid.add(inlines, crosslines)
+            fit.add(inlines, crosslines, x, y)
 
-        return geometry.MultiPoint(nav)
+        if not grid.rows:
+            raise ValueError('No traces to build a footprint from')
+        transform = fit.solve(grid.inline_step, grid.crossline_step)
+        return Footprint(grid, transform, self.trace_count)
 
     def get_geometry(
             self,
@@ -645,7 +1957,27 @@ class SegY3D(SegY):
             *,
             nav_loc='CDP',
             use_nav_scalar=True,
+            exact=False,
     ):
+        """
+        Outline of the survey
+
+        By default this is the convex hull of count sampled points. With
+        exact every trace is scanned and the outline follows the occupied
+        bins, including notches and holes (see footprint), count is
+        ignored.
+
+        :param count: rough number of samples for the convex hull
+        :param nav_loc: coordinate key prefix ('CDP', 'SOURCE' or 'GROUP')
+        :param use_nav_scalar: apply COORDINATE_SCALAR to the coordinates
+        :param exact: build the outline from every trace
+        :return: shapely geometry
+        """
+        if exact:
+            if geometry is None:
+                raise ModuleNotFoundError('Module \'shapely\' could not be found')
+            return self.footprint(nav_loc=nav_loc, use_nav_scalar=use_nav_scalar).geometry()
+
         points = self.get_point_geometry(count,
                                          nav_loc=nav_loc,
                                          use_nav_scalar=use_nav_scalar)
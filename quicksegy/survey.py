@@ -0,0 +1,119 @@
+"""
+Scan navigation and geometry from many SEG-Y files in parallel.
+"""
+import os
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+from quicksegy.probe import probe
+from quicksegy.segy import SegY2D, SegY3D
+
+SEGY_KINDS = {'2d': SegY2D, '3d': SegY3D}
+
+ScanResult = namedtuple('ScanResult', 'path nav geometry error')
+
+
+def scan_file(path, kind='3d', count=500, *, with_geometry=False, detect_format=False,
+              segy_kwargs=None, nav_kwargs=None):
+    """
+    Get sampled navigation (and optionally geometry) from a single file
+
+    Errors are returned in the result rather than raised.
+
+    :param path: path to the SEG-Y file
+    :param kind: '2d' or '3d'
+    :param count: rough number of navigation samples
+    :param with_geometry: also build the shapely geometry
+    :param detect_format: detect endianness and text encoding with probe,
+                          segy_kwargs take precedence
+    :param segy_kwargs: keyword arguments for the SegY class
+    :param nav_kwargs: keyword arguments for sampled_nav
+    :return: ScanResult
+    """
+    try:
+        segy_class = SEGY_KINDS[kind.lower()]
+        segy_kwargs = segy_kwargs or {}
+        if detect_format:
+            segy_kwargs = {**probe(path), **segy_kwargs}
+        sgy = segy_class(path, **segy_kwargs)
+        with sgy:
+            nav = sgy.sampled_nav(count, **(nav_kwargs or {}))
+            shape = None
+            if with_geometry:
+                nav_loc = (nav_kwargs or {}).get('nav_loc', 'CDP')
+                shape = sgy.get_geometry(count, nav_loc=nav_loc)
+        return ScanResult(path, nav, shape, None)
+    except Exception as e:
+        return ScanResult(path, None, None, e)
+
+
+def scan_surveys(paths, kind='3d', count=500, *, workers=None, max_pending=None,
+                 with_geometry=False, detect_format=False, segy_kwargs=None, nav_kwargs=None):
+    """
+    Scan navigation from many SEG-Y files using a process pool
+
+    Results are yielded as each file finishes (not in input order). Errors
+    for individual files are captured in the result and do not stop the
+    scan. At most max_pending files are submitted at any time so large
+    lists of paths do not all sit in memory as pending work.
+
+    :param paths: iterable of SEG-Y file paths
+    :param kind: '2d' or '3d'
+    :param count: rough number of navigation samples per file
+    :param workers: number of worker processes (default: CPU count),
+                    0 or 1 scans in the current process
+    :param max_pending: maximum number of files submitted at once
+                        (default: 2 * workers)
+    :param with_geometry: also build shapely geometries (requires shapely)
+    :param detect_format: detect endianness and text encoding of each file
+                          with probe, segy_kwargs take precedence
+    :param segy_kwargs: keyword arguments for the SegY class
+    :param nav_kwargs: keyword arguments for sampled_nav
+    :return: generator of ScanResult(path, nav, geometry, error)
+    """
+    if kind.lower() not in SEGY_KINDS:
+        raise ValueError(f'Unknown survey kind {kind!r}, expected one of {list(SEGY_KINDS)}')
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if max_pending is None:
+        max_pending = 2 * max(1, workers)
+    if workers < 0:
+        raise ValueError(f'workers must be 0 or more, not {workers}')
+    if max_pending < 1:
+        raise ValueError(f'max_pending must be at least 1, not {max_pending}')
+
+    options = {
+        'with_geometry': with_geometry,
+        'detect_format': detect_format,
+        'segy_kwargs': segy_kwargs,
+        'nav_kwargs': nav_kwargs,
+    }
+    # Arguments are checked above when called, scanning starts on iteration
+    return _scan(iter(paths), kind, count, workers, max_pending, options)
+
+
+def _scan(paths, kind, count, workers, max_pending, options):
+    if workers <= 1:
+        for path in paths:
+            yield scan_file(path, kind, count, **options)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        def submit(batch):
+            return {
+                pool.submit(scan_file, path, kind, count, **options): path
+                for path in batch
+            }
+
+        pending = submit(islice(paths, max_pending))
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    yield future.result()
+                except Exception as e:
+                    # Worker process failures (eg: a crashed pool)
+                    yield ScanResult(path, None, None, e)
+            pending.update(submit(islice(paths, max_pending - len(pending))))
@@ -0,0 +1,426 @@
+"""
+Write new SEG-Y files from an existing one.
+
+write_subset copies selected traces and sample windows as raw bytes,
+samples are never decoded. When every sample is kept and headers are not
+changed, runs of consecutive traces are copied file to file (see
+fileio.copy_range).
+
+write_converted rewrites every trace with samples in another sample
+format and/or endianness, a chunk of traces at a time.
+
+Both write to a temporary file next to the target, which replaces the
+target only once every trace has been written.
+"""
+import os
+import struct
+from contextlib import contextmanager
+from pathlib import Path
+
+from quicksegy.segy import BinaryHeader, TextHeader
+from quicksegy.internals.compat import np, resolve_numpy
+from quicksegy.internals.fileio import PositionalReader
+from quicksegy.internals.header_enums import SampleFormat
+from quicksegy.internals.samples import decode_sample_block, encode_samples
+from quicksegy.internals.stats import decoding
+from quicksegy.internals.struct_utils import DOUBLE, FLOAT
+
+CHUNK_BYTES = 2**24
+
+# memoryview formats to slice samples of each size
+_SAMPLE_VIEWS = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+
+
+def _trace_indices(traces, trace_count):
+    if traces is None:
+        return range(trace_count)
+    if isinstance(traces, slice):
+        return range(*traces.indices(trace_count))
+    indices = []
+    for idx in traces:
+        idx = int(idx)
+        if idx >= trace_count or idx < -trace_count:
+            raise IndexError(f'Index {idx} out of range.')
+        indices.append(idx + trace_count if idx < 0 else idx)
+    return indices
+
+
+def _sample_window(samples, samples_per_trace):
+    if samples is None:
+        return range(samples_per_trace)
+    if isinstance(samples, slice):
+        samples = range(*samples.indices(samples_per_trace))
+    if not isinstance(samples, range):
+        raise TypeError(f'Sample window must be a slice or range, not {type(samples)}')
+    if samples.step < 1:
+        raise ValueError('Sample window must have a positive step')
+    if len(samples) == 0:
+        raise ValueError('Sample window contains no samples')
+    if samples[0] < 0 or samples[-1] >= samples_per_trace:
+        raise IndexError(f'Sample window {samples} outside of {samples_per_trace} samples')
+    return samples
+
+
+def _runs(indices, max_count):
+    """
+    Split trace indices into runs of consecutive ascending traces
+
+    :param indices: sequence of trace indices
+    :param max_count: maximum length of a run
+    :return: generator of ranges
+    """
+    if isinstance(indices, range) and indices.step == 1:
+        for start in range(indices.start, indices.stop, max_count):
+            yield range(start, min(start + max_count, indices.stop))
+        return
+    first = previous = None
+    for idx in indices:
+        if first is not None and idx == previous + 1 and idx - first < max_count:
+            previous = idx
+            continue
+        if first is not None:
+            yield range(first, previous + 1)
+        first = previous = idx
+    if first is not None:
+        yield range(first, previous + 1)
+
+
+def _field_range(ctype):
+    """
+    :param ctype: struct type code
+    :return: (minimum, maximum) of an integer field, or None for floats
+    """
+    if ctype in (FLOAT, DOUBLE):
+        return None
+    bits = 8 * struct.calcsize('=' + ctype)
+    if ctype.islower():
+        return -2**(bits - 1), 2**(bits - 1) - 1
+    return 0, 2**bits - 1
+
+
+def _check_range(struct_dict, key, values, where):
+    limits = _field_range(struct_dict[key].ctype)
+    if limits is None or not values:
+        return
+    low, high = min(values), max(values)
+    if low < limits[0] or high > limits[1]:
+        value = low if low < limits[0] else high
+        raise ValueError(f'New {key} of {value} in {where} is outside the range '
+                         f'{limits[0]} to {limits[1]} of the field')
+
+
+def _window_timing(window, interval, delay):
+    """
+    Trace timing after applying a sample window
+
+    :param window: range of samples kept
+    :param interval: sample interval (microseconds)
+    :param delay: delay recording time (milliseconds)
+    :return: (interval, delay) of the new trace
+    """
+    return interval * window.step, delay + round(window.start * interval / 1000)
+
+
+def _check_window(sgy, indices, window):
+    """
+    Raise ValueError before writing if a sample window moves the sample
+    interval or delay of any trace outside the range of its header field
+    """
+    struct_dict = {**BinaryHeader.STRUCT_DICT, **(sgy.binheader_edits or {})}
+    binary_interval = sgy.binary_header['SAMPLE_INTERVAL']
+    if window.step > 1:
+        _check_range(struct_dict, 'SAMPLE_INTERVAL', [binary_interval * window.step],
+                     'the binary header')
+    if not (window.start or window.step > 1) or not len(indices):
+        return
+
+    keys = ['SAMPLE_INTERVAL', 'DELAY_RECORDING_TIME']
+    first = min(indices)
+    columns = sgy.headers_columns(keys, first, max(indices) + 1, use_numpy=False)
+    intervals, delays = [], []
+    for idx in indices:
+        interval, delay = _window_timing(
+            window, columns['SAMPLE_INTERVAL'][idx - first] or binary_interval,
+            columns['DELAY_RECORDING_TIME'][idx - first])
+        intervals.append(interval)
+        delays.append(delay)
+    struct_dict = sgy.headerindexer.struct_dict
+    _check_range(struct_dict, 'SAMPLE_INTERVAL', intervals, 'the trace headers')
+    _check_range(struct_dict, 'DELAY_RECORDING_TIME', delays, 'the trace headers')
+
+
+@contextmanager
+def _replace_on_success(path):
+    """
+    Open a temporary file next to path, which replaces path if the block
+    finishes without an exception and is removed otherwise
+
+    :param path: Path of the file to write
+    :return: context manager giving the file object
+    """
+    temp = path.with_name(path.name + '.tmp')
+    try:
+        with temp.open('wb') as out:
+            yield out
+    except BaseException:
+        try:
+            temp.unlink()
+        except FileNotFoundError:
+            pass
+        raise
+    os.replace(str(temp), str(path))
+
+
+class _HeaderPatcher:
+    """
+    Rewrite trace header values in raw header bytes
+    """
+    def __init__(self, struct_dict, endian, window, binary_interval, header_updates):
+        self.struct_dict = struct_dict
+        self.endian = endian
+        self.window = window
+        self.binary_interval = binary_interval
+        self.header_updates = header_updates
+        self._structs = {}
+
+    def _struct(self, key):
+        try:
+            return self._structs[key]
+        except KeyError:
+            pair = self.struct_dict[key]
+            packer = self._structs[key] = (struct.Struct(self.endian + pair.ctype), pair.offset)
+            return packer
+
+    def get(self, header, key):
+        packer, offset = self._struct(key)
+        return packer.unpack_from(header, offset)[0]
+
+    def set(self, header, key, value):
+        packer, offset = self._struct(key)
+        packer.pack_into(header, offset, value)
+
+    def patch(self, header, new_idx, old_idx):
+        window = self.window
+        self.set(header, 'SAMPLE_COUNT', len(window))
+        if window.start or window.step > 1:
+            interval, delay = _window_timing(
+                window, self.get(header, 'SAMPLE_INTERVAL') or self.binary_interval,
+                self.get(header, 'DELAY_RECORDING_TIME'))
+            if window.start:
+                self.set(header, 'DELAY_RECORDING_TIME', delay)
+            if window.step > 1:
+                self.set(header, 'SAMPLE_INTERVAL', interval)
+        if self.header_updates is not None:
+            for key, value in self.header_updates(new_idx, old_idx).items():
+                self.set(header, key, value)
+
+
+def _binary_header(sgy, raw, window):
+    """
+    Patch the raw binary header for the new sample count and interval
+    """
+    struct_dict = {**BinaryHeader.STRUCT_DICT, **(sgy.binheader_edits or {})}
+
+    def set_value(key, value):
+        pair = struct_dict[key]
+        struct.pack_into(sgy.endian + pair.ctype, raw, TextHeader.CHARACTERS + pair.offset, value)
+
+    set_value('SAMPLES_PER_TRACE', len(window))
+    set_value('SAMPLE_FORMAT_CODE', int(sgy.sample_format))
+    if sgy.binary_header['EXTENDED_SAMPLES_PER_TRACE']:
+        set_value('EXTENDED_SAMPLES_PER_TRACE', len(window))
+    if window.step > 1:
+        set_value('SAMPLE_INTERVAL', sgy.binary_header['SAMPLE_INTERVAL'] * window.step)
+        if sgy.binary_header['EXTENDED_SAMPLE_INTERVAL']:
+            set_value('EXTENDED_SAMPLE_INTERVAL',
+                      sgy.binary_header['EXTENDED_SAMPLE_INTERVAL'] * window.step)
+    if sgy.layout.trailer_count:
+        # Data trailers are not copied
+        set_value('TRAILER_RECORDS', 0)
+
+
+def write_subset(sgy, path, traces=None, samples=None, *, header_updates=None,
+                 chunk_bytes=CHUNK_BYTES):
+    """
+    Write a new SEG-Y file from selected traces and samples of an open SegY
+
+    The text header (and any extended text headers) are copied unchanged,
+    the binary header has its sample count (and interval when decimating)
+    rewritten. Extended trace headers are copied with each trace, data
+    trailers are dropped. Trace headers get a new SAMPLE_COUNT and, when the window
+    doesn't start at the first sample or is decimated, an adjusted
+    DELAY_RECORDING_TIME and SAMPLE_INTERVAL. ValueError is raised before
+    writing if these would not fit in their header fields.
+
+    eg: the first 500 samples of inline 120
+        write_subset(sgy, 'il120.sgy', sgy.geometry_index.inline_traces(120), slice(0, 500))
+
+    :param sgy: SegY instance to copy from
+    :param path: path of the new file
+    :param traces: trace indices to copy, a slice, or None for every trace
+                   (eg: from sgy.select or sgy.geometry_index)
+    :param samples: slice or range of sample indices to keep (default: all)
+    :param header_updates: optional function(new_index, old_index) returning
+                           a dict of {key: value} to set in each trace header
+    :param chunk_bytes: maximum size of each read
+    :return: path of the new file
+    """
+    path = Path(path)
+    if path.exists() and path.resolve() == sgy.filepath.resolve():
+        raise ValueError('Cannot write a subset over the source file')
+    sgy._require_fixed_length('write_subset')
+
+    indexer = sgy.headerindexer
+    stride = indexer.trace_size
+    header_size = sgy.layout.header_size
+    indices = _trace_indices(traces, sgy.trace_count)
+    window = _sample_window(samples, sgy.samples_per_trace)
+    full_traces = window == range(sgy.samples_per_trace)
+    run_traces = max(1, chunk_bytes // stride)
+    _check_window(sgy, indices, window)
+
+    with PositionalReader(sgy.filepath, sgy.stats) as reader, _replace_on_success(path) as out:
+        raw = bytearray(indexer.start_offset)
+        reader.readinto(raw, 0)
+        _binary_header(sgy, raw, window)
+        out.write(raw)
+
+        if full_traces and header_updates is None:
+            for run in _runs(indices, run_traces):
+                reader.copy_to(out, indexer.header_offset(run[0]), len(run) * stride)
+            return path
+
+        patcher = _HeaderPatcher(indexer.struct_dict, sgy.endian, window,
+                                 sgy.binary_header['SAMPLE_INTERVAL'], header_updates)
+        sample_size = sgy.sample_size
+        first = header_size + window.start * sample_size
+        last = header_size + (window[-1] + 1) * sample_size
+        buffer = bytearray(run_traces * stride)
+        view = memoryview(buffer)
+
+        new_idx = 0
+        for run in _runs(indices, run_traces):
+            reader.readinto(view[:len(run) * stride], indexer.header_offset(run[0]))
+            for position, old_idx in zip(range(0, len(run) * stride, stride), run):
+                header = bytearray(view[position:position + header_size])
+                patcher.patch(header, new_idx, old_idx)
+                out.write(header)
+                trace = view[position + first:position + last]
+                if window.step > 1:
+                    trace = trace.cast(_SAMPLE_VIEWS[sample_size])[::window.step].tobytes()
+                out.write(trace)
+                new_idx += 1
+    return path
+
+
+def _swap_spans(struct_dict):
+    """
+    Byte ranges to reverse to change the endianness of a header
+
+    Fields overlapping an earlier field are skipped so no bytes are
+    swapped twice.
+
+    :param struct_dict: header struct dictionary {'key': StructPair}
+    :return: list of (offset, size)
+    """
+    spans = []
+    end = 0
+    for offset, size in sorted({(pair.offset, struct.calcsize('=' + pair.ctype))
+                                for pair in struct_dict.values()}):
+        if offset >= end and size > 1:
+            spans.append((offset, size))
+        end = max(end, offset + size)
+    return spans
+
+
+def _swap_header(header, spans):
+    for offset, size in spans:
+        header[offset:offset + size] = header[offset:offset + size][::-1]
+
+
+def write_converted(sgy, path, sample_format=SampleFormat.IEEE_FLOAT, endian=None, *,
+                    chunk_traces=4096, use_numpy=None):
+    """
+    Write a copy of a SEG-Y file with samples in a different format
+
+    Samples are decoded and re-encoded a chunk of traces at a time so
+    memory use does not depend on the file size. SAMPLE_FORMAT_CODE is
+    updated in the binary header and, if the endianness changes, every
+    known binary and trace header field is byte swapped. Text headers and
+    extended trace headers are copied unchanged, data trailers are dropped.
+
+    Values written to integer formats are rounded and clipped to the range
+    of the format. Conversion to IBM floats rounds to the nearest value.
+
+    eg: big endian IBM floats to little endian IEEE floats
+        write_converted(sgy, 'ieee.sgy', SampleFormat.IEEE_FLOAT, '<')
+
+    :param sgy: SegY instance to copy from
+    :param path: path of the new file
+    :param sample_format: SampleFormat (or format code) of the new file
+    :param endian: endianness of the new file (default: same as sgy)
+    :param chunk_traces: number of traces converted at once
+    :param use_numpy: use numpy (default: if numpy is installed)
+    :return: path of the new file
+    """
+    path = Path(path)
+    if path.exists() and path.resolve() == sgy.filepath.resolve():
+        raise ValueError('Cannot convert a file in place')
+    sgy._require_fixed_length('write_converted')
+
+    sample_format = SampleFormat(sample_format)
+    out_size = sample_format.size * sgy.samples_per_trace
+    endian = sgy.endian if endian is None else endian
+    use_numpy = resolve_numpy(use_numpy)
+
+    indexer = sgy.headerindexer
+    stride = indexer.trace_size
+    header_size = sgy.layout.header_size
+    swap = endian != sgy.endian
+    trace_spans = _swap_spans(indexer.struct_dict) if swap else []
+    chunk_traces = max(1, chunk_traces)
+
+    with PositionalReader(sgy.filepath, sgy.stats) as reader, _replace_on_success(path) as out:
+        raw = bytearray(indexer.start_offset)
+        reader.readinto(raw, 0)
+        binary_dict = {**BinaryHeader.STRUCT_DICT, **(sgy.binheader_edits or {})}
+        binary = memoryview(raw)[TextHeader.CHARACTERS:TextHeader.CHARACTERS + BinaryHeader.SIZE]
+        if swap:
+            _swap_header(binary, _swap_spans(binary_dict))
+        format_pair = binary_dict['SAMPLE_FORMAT_CODE']
+        struct.pack_into(endian + format_pair.ctype, binary, format_pair.offset, int(sample_format))
+        if sgy.layout.trailer_count:
+            trailer_pair = binary_dict['TRAILER_RECORDS']
+            struct.pack_into(endian + trailer_pair.ctype, binary, trailer_pair.offset, 0)
+        out.write(raw)
+
+        buffer = bytearray(chunk_traces * stride)
+        view = memoryview(buffer)
+        if use_numpy:
+            block = np.empty((chunk_traces, header_size + out_size), dtype=np.uint8)
+
+        for start in range(0, sgy.trace_count, chunk_traces):
+            count = min(chunk_traces, sgy.trace_count - start)
+            reader.readinto(view[:count * stride], indexer.header_offset(start))
+            with decoding(sgy.stats, 'samples', count * sgy.samples_per_trace):
+                samples = decode_sample_block(buffer, header_size, count, stride,
+                                              sgy.samples_per_trace, sgy.sample_format,
+                                              sgy.endian, use_numpy=use_numpy)
+
+            if use_numpy:
+                output = block[:count]
+                output[:, :header_size] = np.ndarray((count, header_size), dtype=np.uint8,
+                                                     buffer=buffer, strides=(stride, 1))
+                for offset, size in trace_spans:
+                    output[:, offset:offset + size] = output[:, offset:offset + size][:, ::-1]
+                encoded = encode_samples(samples, sample_format, endian, use_numpy=True)
+                output[:, header_size:] = np.frombuffer(encoded, dtype=np.uint8).reshape(count, -1)
+                out.write(output.data)
+                continue
+
+            for position, trace in zip(range(0, count * stride, stride), samples):
+                header = bytearray(view[position:position + header_size])
+                _swap_header(header, trace_spans)
+                out.write(header)
+                out.write(encode_samples(trace, sample_format, endian, use_numpy=False))
+    return path
@@ -8,7 +8,7 @@ setup(
     name='quicksegy',
     version=__version__,
 
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
     url='',
     license='MIT',
     description='Quick tool for handling SEG-Y metadata and geometry.',
@@ -1,4 +1,15 @@
 import os
 import sys
 
+import pytest
+
 sys.path.insert(0, os.path.abspath('.'))
+
+from benchmarks.synthetic import sample_value, write_segy  # noqa: E402,F401
+
+
+@pytest.fixture
+def make_segy(tmp_path):
+    def _make(name='test.sgy', **kwargs):
+        return write_segy(tmp_path / name, **kwargs)
+    return _make
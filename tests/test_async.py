@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+import pytest
+
+from quicksegy.segy import SegY2D, SegY3D
+from quicksegy.internals.fileio import PositionalReader
+
+DELAY = 0.05
+
+
+@pytest.fixture
+def slow_reads(monkeypatch):
+    original = PositionalReader.pread
+
+    def delayed_pread(self, size, offset):
+        time.sleep(DELAY)
+        return original(self, size, offset)
+
+    monkeypatch.setattr(PositionalReader, 'pread', delayed_pread)
+
+
+def run(coroutine):
+    return asyncio.new_event_loop().run_until_complete(coroutine)
+
+
+def test_sampled_headers_async_matches(make_segy):
+    sgy = SegY2D(make_segy(trace_count=23))
+    expected = sgy.sampled_headers(5)
+    result = run(sgy.sampled_headers_async(5, concurrency=3))
+    assert [h.data for h in result] == [h.data for h in expected]
+    assert sgy.sampled_indices(5) == [0, 4, 8, 12, 16, 20, 22]
+
+
+@pytest.mark.parametrize('cls', [SegY2D, SegY3D])
+def test_sampled_nav_async_concurrent(make_segy, slow_reads, cls):
+    sgy = cls(make_segy(trace_count=40, inline_count=8))
+    count = 20
+
+    start = time.perf_counter()
+    nav = run(sgy.sampled_nav_async(count, concurrency=10, nav_loc='CDP'))
+    elapsed = time.perf_counter() - start
+
+    assert nav == sgy.sampled_nav(count, nav_loc='CDP')
+    # 20 serial reads would take 1s
+    assert elapsed < count * DELAY / 3
+
+
+@pytest.mark.parametrize('cls', [SegY2D, SegY3D])
+def test_sampled_nav_async_empty(make_segy, cls):
+    sgy = cls(make_segy(trace_count=0))
+    assert sgy.sampled_indices(5) == []
+    assert sgy.sampled_headers(5) == []
+    assert run(sgy.sampled_headers_async(5)) == []
+    assert run(sgy.sampled_nav_async(5)) == sgy.sampled_nav(5) == []
@@ -0,0 +1,31 @@
+import json
+
+from benchmarks import run as bench
+from benchmarks.synthetic import write_segy
+
+from quicksegy import SegY2D
+
+
+def test_synthetic_file_is_deterministic(tmp_path):
+    first = write_segy(tmp_path / 'a.sgy', trace_count=30, format_code=8)
+    second = write_segy(tmp_path / 'b.sgy', trace_count=30, format_code=8)
+    assert first.read_bytes() == second.read_bytes()
+
+    # Integer samples outside the format range wrap rather than failing
+    data = SegY2D(first).traces[29]
+    assert all(-128 <= value < 128 for value in data)
+
+
+def test_run_and_compare(tmp_path):
+    output = bench.run(tmp_path, trace_count=20, sample_count=8, inline_count=5,
+                       repeat=1, names=['trace_header', 'header_scan', 'sampled_nav'])
+    output = json.loads(json.dumps(output))
+    names = {item['name'] for item in output['results']}
+    assert names == {'trace_header', 'lazy_trace_header_key', 'multistruct_unpack', 'header_scan',
+                     'header_columns', 'sampled_nav'}
+    for item in output['results']:
+        assert item['traces_per_sec'] > 0 and item['mb_per_sec'] > 0
+
+    ratios = bench.compare(output, output)
+    assert len(ratios) == len(output['results'])
+    assert all(speedup == 1 for _, _, speedup in ratios)
@@ -0,0 +1,128 @@
+import os
+
+import pytest
+
+from quicksegy.segy import SegY2D, LoadedHeaderIndexer
+from quicksegy.internals.cache import HeaderCache, file_key
+from quicksegy.internals.struct_utils import StructPair
+
+KEYS = ['CDP', 'CDP_X', 'CDP_Y', 'COORDINATE_SCALAR', 'SP', 'SP_SCALAR', 'TRACE_NO_LINE']
+
+
+@pytest.mark.parametrize('use_numpy', [False, True])
+def test_load_headers_matches_file(make_segy, use_numpy):
+    path = make_segy(trace_count=30)
+    expected = SegY2D(path).sampled_nav(7)
+
+    sgy = SegY2D(path)
+    columns = sgy.load_headers(KEYS, use_numpy=use_numpy)
+    assert list(columns) == KEYS
+    assert isinstance(sgy.trace_header, LoadedHeaderIndexer)
+    assert sgy.sampled_nav(7) == expected
+    assert sgy.trace_header[-1].CDP == 2029
+    assert list(sgy.headers_columns(['CDP'], 2, 5)['CDP']) == [2002, 2003, 2004]
+    with pytest.raises(IndexError):
+        sgy.trace_header[30]
+
+
+@pytest.mark.parametrize('use_numpy', [False, True])
+def test_loaded_headers_index_types(make_segy, use_numpy):
+    sgy = SegY2D(make_segy(trace_count=12))
+    sgy.load_headers(['CDP'], use_numpy=use_numpy)
+    assert [h.CDP for h in sgy.trace_header[[7, 0, -1]]] == [2007, 2000, 2011]
+    assert [h.CDP for h in sgy.trace_header[range(2, 5)]] == [2002, 2003, 2004]
+    assert [h.CDP for h in sgy.trace_header[sgy.sampled_indices(4)]] == \
+        [2000, 2003, 2006, 2009, 2011]
+    with pytest.raises(IndexError):
+        sgy.trace_header[[1, 12]]
+    with pytest.raises(TypeError):
+        sgy.trace_header['CDP']
+    with pytest.raises(TypeError):
+        sgy.trace_header[1.0]
+
+
+def test_loaded_headers_numpy_indices(make_segy):
+    np = pytest.importorskip('numpy')
+    sgy = SegY2D(make_segy(trace_count=12))
+    sgy.load_headers(['CDP'])
+    assert sgy.trace_header[np.int64(5)].CDP == 2005
+    assert [h.CDP for h in sgy.trace_header[np.array([3, 1])]] == [2003, 2001]
+    selected = sgy.select({'CDP': lambda cdp: cdp > 2008})
+    assert [h.CDP for h in sgy.trace_header[selected]] == [2009, 2010, 2011]
+
+
+def test_header_cache_roundtrip(make_segy, tmp_path, monkeypatch):
+    path = make_segy(trace_count=12)
+    cache_dir = tmp_path / 'cache'
+
+    sgy = SegY2D(path)
+    first = sgy.load_headers(KEYS, cache=True, cache_dir=cache_dir, use_numpy=False)
+    cache_file = HeaderCache(cache_dir).cache_path(path)
+    assert cache_file.exists()
+
+    # Reading from the file again would fail so the cache must be used
+    def fail(*args, **kwargs):
+        raise AssertionError('Headers were read from the file')
+
+    sgy = SegY2D(path)
+    monkeypatch.setattr(sgy.headerindexer, 'read_columns', fail)
+    second = sgy.load_headers(KEYS[:3], cache=True, cache_dir=cache_dir, use_numpy=False)
+    assert {key: list(col) for key, col in second.items()} == \
+        {key: list(first[key]) for key in KEYS[:3]}
+
+
+def test_header_cache_sidecar_adds_keys(make_segy):
+    path = make_segy(trace_count=5)
+    SegY2D(path).load_headers(['CDP'], cache=True)
+    sgy = SegY2D(path)
+    sgy.load_headers(['SP'], cache=True)
+
+    key = file_key(path, '>', {}, sgy.layout, sgy.sample_size)
+    cached = HeaderCache().load(key, use_numpy=False)
+    assert sorted(cached) == ['CDP', 'SP']
+    assert HeaderCache().cache_path(path).name == 'test.sgy.qsidx'
+
+
+def test_header_cache_invalidation(make_segy, tmp_path):
+    path = make_segy(trace_count=5)
+    header_cache = HeaderCache(tmp_path / 'cache')
+    sgy = SegY2D(path)
+    sgy.load_headers(['CDP'], cache=True, cache_dir=header_cache.directory)
+    layout, sample_size = sgy.layout, sgy.sample_size
+
+    key = file_key(path, '>', {}, layout, sample_size)
+    assert header_cache.load(key) is not None
+    assert header_cache.load(file_key(path, '>', {})) is None
+    assert header_cache.load(file_key(path, '<', {}, layout, sample_size)) is None
+    edits = {'CDP': StructPair(24, 'i')}
+    assert header_cache.load(file_key(path, '>', edits, layout, sample_size)) is None
+
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert header_cache.load(file_key(path, '>', {}, layout, sample_size)) is None
+
+
+def test_header_cache_binary_header_override(make_segy):
+    path = make_segy(trace_count=20, sample_count=10)
+    columns = SegY2D(path).load_headers(['CDP'], cache=True, use_numpy=False)
+    assert len(columns['CDP']) == 20
+
+    # A different sample count moves every trace, the cached column can't be used
+    sgy = SegY2D(path, binheader_overrides={'SAMPLES_PER_TRACE': 4})
+    assert sgy.trace_count == 21
+    columns = sgy.load_headers(['CDP'], cache=True, use_numpy=False)
+    assert len(columns['CDP']) == 21
+    assert list(columns['CDP']) == list(sgy.headerindexer.read_columns(['CDP'])['CDP'])
+
+
+def test_header_cache_unwritable(make_segy, tmp_path):
+    path = make_segy(trace_count=5)
+    # A file where the cache directory should be can't be written to
+    blocked = tmp_path / 'blocked'
+    blocked.write_bytes(b'')
+
+    with pytest.warns(UserWarning, match='could not be cached') as record:
+        columns = SegY2D(path).load_headers(['CDP'], cache=True, cache_dir=blocked,
+                                            use_numpy=False)
+    assert record[0].filename == __file__
+    assert list(columns['CDP']) == [2000, 2001, 2002, 2003, 2004]
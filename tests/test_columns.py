@@ -0,0 +1,99 @@
+import array
+
+import pytest
+
+from quicksegy.segy import SegY3D, TraceHeaderIndexer
+from quicksegy.internals.struct_utils import StructPair
+
+KEYS = ['INLINE', 'CROSSLINE', 'CDP_X', 'COORDINATE_SCALAR']
+
+
+def expected_columns(sgy, indices):
+    headers = [sgy.trace_header[i] for i in indices]
+    return {key: [h[key] for h in headers] for key in KEYS}
+
+
+@pytest.mark.parametrize('memory_map', [False, True])
+@pytest.mark.parametrize('use_numpy', [False, True])
+@pytest.mark.parametrize('bounds', [
+    (None, None, None),
+    (3, 17, 2),
+    (None, None, 400),
+    (15, 2, -3),
+    (5, 5, 1),
+])
+def test_headers_columns(make_segy, memory_map, use_numpy, bounds):
+    path = make_segy(trace_count=30, inline_count=6)
+    with SegY3D(path, memory_map=memory_map) as sgy:
+        columns = sgy.headers_columns(KEYS, *bounds, use_numpy=use_numpy)
+        indices = range(*slice(*bounds).indices(sgy.trace_count))
+        expected = expected_columns(sgy, indices)
+
+    assert list(columns) == KEYS
+    for key in KEYS:
+        if use_numpy:
+            assert columns[key].tolist() == expected[key]
+        else:
+            assert isinstance(columns[key], array.array)
+            assert list(columns[key]) == expected[key]
+
+
+def test_headers_columns_sparse_reads(make_segy, monkeypatch):
+    # Force individual header reads instead of block reads
+    monkeypatch.setattr(TraceHeaderIndexer, 'MAX_BLOCK_STRIDE', 0)
+    monkeypatch.setattr(TraceHeaderIndexer, 'CHUNK_BYTES', 1000)
+    path = make_segy(trace_count=30, inline_count=6)
+    sgy = SegY3D(path)
+    columns = sgy.headers_columns(KEYS, 1, None, 3, use_numpy=False)
+    expected = expected_columns(sgy, range(1, 30, 3))
+    assert {key: list(col) for key, col in columns.items()} == expected
+
+
+def test_headers_columns_ibm_edit(make_segy):
+    edits = {'IBM_VALUE': StructPair(232, ibm_float=True)}
+
+    def header_func(i, values):
+        # 0x42640000 is 100.0 as an IBM float, stored in unused header bytes
+        values['SOURCE_MEASUREMENT_UNIT'] = 0
+    path = make_segy(trace_count=3, header_func=header_func)
+    with open(path, 'r+b') as f:
+        for i in range(3):
+            f.seek(3600 + i * (240 + 40) + 232)
+            f.write(bytes.fromhex('42640000'))
+
+    sgy = SegY3D(path, trheader_edits=edits)
+    columns = sgy.headers_columns(['IBM_VALUE'], use_numpy=False)
+    assert columns['IBM_VALUE'].typecode == 'd'
+    assert list(columns['IBM_VALUE']) == [100.0] * 3
+
+
+def test_headers_columns_bad_key(make_segy):
+    sgy = SegY3D(make_segy(trace_count=3))
+    with pytest.raises(KeyError):
+        sgy.headers_columns(['NOT_A_KEY'])
+
+
+@pytest.mark.parametrize('endian', ['>', '<'])
+@pytest.mark.parametrize('format_code', [1, 2, 3, 5])
+def test_trace_records(make_segy, endian, format_code):
+    np = pytest.importorskip('numpy')
+    path = make_segy(trace_count=12, sample_count=7, inline_count=4,
+                     endian=endian, format_code=format_code)
+    edits = {'ALT_CDP': StructPair(20, 'i')}
+    with SegY3D(path, endian=endian, trheader_edits=edits) as sgy:
+        records = sgy.trace_records()
+        assert records.shape == (12,)
+        assert not records.flags.writeable
+
+        columns = sgy.headers_columns(KEYS)
+        for key in KEYS:
+            np.testing.assert_array_equal(records[key], columns[key])
+        np.testing.assert_array_equal(records['ALT_CDP'], records['CDP'])
+
+        samples = records['SAMPLES']
+        assert samples.shape == (12, 7)
+        raw = sgy.sample_format.as_struct
+        with open(path, 'rb') as f:
+            f.seek(3600 + 3 * (240 + 7 * sgy.sample_size) + 240)
+            expected = np.frombuffer(f.read(7 * sgy.sample_size), dtype=endian + raw)
+        np.testing.assert_array_equal(samples[3], expected)
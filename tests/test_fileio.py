@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+from quicksegy.segy import SegY2D
+from quicksegy.internals import fileio
+from quicksegy.internals.fileio import PositionalReader, plan_reads
+
+
+def test_plan_reads_merges_nearby():
+    blocks = plan_reads([300, 0, 100, 1000, 120], 10, max_gap=100)
+    assert [(b.offset, b.size) for b in blocks] == [(0, 130), (300, 10), (1000, 10)]
+    assert blocks[0].targets == [(0, 1), (100, 2), (120, 4)]
+    assert blocks[1].targets == [(0, 0)]
+
+
+def test_plan_reads_max_size():
+    blocks = plan_reads([0, 10, 20, 30], 10, max_gap=0, max_size=20)
+    assert [(b.offset, b.size) for b in blocks] == [(0, 20), (20, 20)]
+
+
+@pytest.mark.parametrize('vectored', [True, False])
+def test_gather(tmp_path, monkeypatch, vectored):
+    monkeypatch.setattr(fileio, 'HAS_PREADV', vectored and fileio.HAS_PREADV)
+    path = tmp_path / 'data.bin'
+    path.write_bytes(bytes(range(256)) * 4)
+
+    offsets = [500, 3, 7, 3, 900, 1020]
+    with PositionalReader(path) as reader:
+        result = reader.gather(offsets, 4, max_gap=50)
+    data = path.read_bytes()
+    assert bytes(result) == b''.join(data[o:o + 4] for o in offsets)
+
+
+def _capped(monkeypatch, limit):
+    # Mimic filesystems returning at most limit bytes per call
+    pread, preadv = os.pread, getattr(os, 'preadv', None)
+
+    def capped_preadv(fd, buffers, offset):
+        left, capped = limit, []
+        for buffer in buffers:
+            view = memoryview(buffer).cast('B')[:left]
+            capped.append(view)
+            left -= len(view)
+            if not left:
+                break
+        return preadv(fd, capped, offset)
+
+    monkeypatch.setattr(os, 'pread', lambda fd, size, offset: pread(fd, min(size, limit), offset))
+    if preadv is not None:
+        monkeypatch.setattr(os, 'preadv', capped_preadv)
+
+
+@pytest.mark.parametrize('vectored', [True, False])
+def test_short_reads(make_segy, monkeypatch, vectored):
+    monkeypatch.setattr(fileio, 'HAS_PREADV', vectored and fileio.HAS_PREADV)
+    path = make_segy(trace_count=40, sample_count=50)
+    sgy = SegY2D(path)
+    sgy.traceindexer.use_numpy = False
+    expected = sgy.headers_columns(['CDP'], use_numpy=False)
+    traces = sgy.traces[:]
+
+    _capped(monkeypatch, 4096)
+    sgy = SegY2D(path)
+    sgy.traceindexer.use_numpy = False
+    assert sgy.headers_columns(['CDP'], use_numpy=False) == expected
+    assert sgy.traces[:] == traces
+    assert sgy.trace_header[39].CDP == 2039
+    with PositionalReader(path) as reader:
+        assert reader.pread(10000, 100) == path.read_bytes()[100:10100]
+
+
+def test_read_past_end(tmp_path):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(bytes(100))
+    with PositionalReader(path) as reader:
+        with pytest.raises(EOFError):
+            reader.pread(10, 95)
+        with pytest.raises(EOFError):
+            reader.readv([bytearray(60), bytearray(60)], 0)
+        with pytest.raises(EOFError):
+            reader.copy_to(open(os.devnull, 'wb'), 50, 60)
+
+
+@pytest.mark.parametrize('max_gap', [0, 2**16])
+def test_header_fancy_indexing(make_segy, max_gap):
+    sgy = SegY2D(make_segy(trace_count=30))
+    sgy.trace_header.max_gap = max_gap
+    indices = [29, 0, 5, 6, 5, -2]
+
+    headers = sgy.trace_header[indices]
+    assert [h.TRACE_NO_LINE for h in headers] == [30, 1, 6, 7, 6, 29]
+    assert [h.CDP for h in sgy.trace_header[-3:]] == [2027, 2028, 2029]
+    assert [h.CDP for h in sgy.trace_header[10:2:-4]] == [2010, 2006]
+    with pytest.raises(IndexError):
+        sgy.trace_header[[1, 30]]
@@ -0,0 +1,122 @@
+import array
+
+import pytest
+
+from quicksegy import SegY3D
+from quicksegy.internals.footprint import AffineFit, OccupancyGrid
+
+XL_COUNT = 8
+HOLE = {(4, 3), (4, 4), (5, 3), (5, 4)}
+NOTCH = {(9, 5), (9, 6), (9, 7)}
+
+
+def survey_header(il_step, xl_step):
+    def header_func(i, values):
+        il_i, xl_i = divmod(i, XL_COUNT)
+        if (il_i, xl_i) in HOLE | NOTCH:
+            # Duplicate trace in the first bin, leaving these bins empty
+            il_i, xl_i = 0, 0
+        values['INLINE'] = 100 + il_step * il_i
+        values['CROSSLINE'] = 200 + xl_step * xl_i
+        # 50m bins on a rotated grid, in cm with a -100 scalar
+        values['CDP_X'] = (500000 + 30 * il_i + 40 * xl_i) * 100
+        values['CDP_Y'] = (6000000 - 40 * il_i + 30 * xl_i) * 100
+    return header_func
+
+
+@pytest.mark.parametrize('use_numpy', [False, True])
+@pytest.mark.parametrize('chunk_traces', [3, 1000])
+@pytest.mark.parametrize('steps', [(1, 1), (2, 4)])
+def test_footprint(make_segy, use_numpy, chunk_traces, steps):
+    Polygon = pytest.importorskip('shapely.geometry').Polygon
+    if use_numpy:
+        pytest.importorskip('numpy')
+    path = make_segy(trace_count=80, inline_count=XL_COUNT, header_func=survey_header(*steps))
+    sgy = SegY3D(path)
+
+    footprint = sgy.footprint(chunk_traces=chunk_traces, use_numpy=use_numpy)
+    assert footprint.bin_count == 80 - len(HOLE | NOTCH)
+    assert (footprint.grid.inline_step, footprint.grid.crossline_step) == steps
+    assert footprint.to_map(100 + steps[0], 200) == pytest.approx((500030, 5999960))
+
+    shape = footprint.geometry()
+    assert shape.geom_type == 'Polygon'
+    assert shape.area == pytest.approx(footprint.bin_count * 50 * 50)
+    assert len(shape.interiors) == 1
+    assert Polygon(shape.interiors[0]).area == pytest.approx(2 * 50 * 2 * 50)
+
+    # The sampled convex hull covers the hole
+    assert not sgy.get_geometry(80).interiors
+    assert sgy.get_geometry(80, exact=True).equals(shape)
+
+
+def test_occupancy_grid_growth():
+    grid = OccupancyGrid()
+    grid.add(array.array('i', [10, 10]), array.array('i', [5, 7]))
+    grid.add(array.array('i', [11, 12]), array.array('i', [1, 13]))
+    assert grid.origin == 1 and grid.width == 13
+    assert grid.crossline_step == 2
+    assert grid.inline_step == 1
+    assert list(grid.runs()) == [(10, 5, 7), (11, 1, 1), (12, 13, 13)]
+
+
+def test_affine_fit_single_line():
+    # A single inline is fitted as a line with square bins across it
+    fit = AffineFit()
+    fit.add([1, 1, 1], [1, 2, 3], [0.0, 1.0, 2.0], [0.0, 0.0, 0.0])
+    assert fit.solve() == pytest.approx([0, 1, 1, 0, -1, -1])
+
+    fit = AffineFit()
+    fit.add([2, 4, 6], [7, 7, 7], [0.0, 0.0, 0.0], [10.0, 20.0, 30.0])
+    a, b, d, e, xoff, yoff = fit.solve(inline_step=2, crossline_step=1)
+    assert (a, d) == pytest.approx((0, 5))
+    assert abs(b) == pytest.approx(10) and e == pytest.approx(0)
+
+
+@pytest.mark.parametrize('inlines, crosslines', [
+    ([1, 1, 1], [3, 3, 3]),  # a single bin
+    ([1, 2, 3], [1, 2, 3]),  # a diagonal line
+])
+def test_affine_fit_needs_a_grid(inlines, crosslines):
+    fit = AffineFit()
+    fit.add(inlines, crosslines, [0.0, 1.0, 2.0], [0.0, 1.0, 2.0])
+    with pytest.raises(ValueError):
+        fit.solve()
+
+
+@pytest.mark.parametrize('direction', ['inline', 'crossline'])
+def test_footprint_single_line(make_segy, direction):
+    pytest.importorskip('shapely')
+
+    def header_func(i, values):
+        il_i, xl_i = (0, i) if direction == 'inline' else (i, 0)
+        values['INLINE'] = 100 + il_i
+        values['CROSSLINE'] = 200 + 4 * xl_i
+        values['CDP_X'] = (500000 + 30 * il_i + 40 * xl_i) * 100
+        values['CDP_Y'] = (6000000 - 40 * il_i + 30 * xl_i) * 100
+
+    sgy = SegY3D(make_segy(trace_count=6, inline_count=6, header_func=header_func))
+    footprint = sgy.footprint()
+    if direction == 'inline':
+        assert footprint.to_map(100, 204) == pytest.approx((500040, 6000030))
+    else:
+        assert footprint.to_map(101, 200) == pytest.approx((500030, 5999960))
+    shape = footprint.geometry()
+    assert shape.geom_type == 'Polygon'
+    assert shape.area == pytest.approx(6 * 50 * 50)
+
+
+def test_footprint_grid_limit(make_segy):
+    def header_func(i, values):
+        values['CROSSLINE'] = 2**30 if i == 3 else 200 + i % 4
+
+    sgy = SegY3D(make_segy(trace_count=8, inline_count=4, header_func=header_func))
+    with pytest.raises(ValueError, match='max_bins'):
+        sgy.footprint()
+    with pytest.raises(ValueError, match='max_bins'):
+        sgy.footprint(max_bins=2**29)
+
+    grid = OccupancyGrid(max_bins=6)
+    grid.add(array.array('i', [1, 2]), array.array('i', [1, 3]))
+    with pytest.raises(ValueError):
+        grid.add(array.array('i', [3]), array.array('i', [1]))
@@ -0,0 +1,74 @@
+import pytest
+
+from quicksegy.segy import SegY3D
+from quicksegy.internals.geometry_index import GeometryIndex
+
+
+def test_regular_inline_sorted_index():
+    inlines = [10, 10, 10, 12, 12, 12]
+    crosslines = [5, 6, 7, 5, 6, 7]
+    index = GeometryIndex(inlines, crosslines)
+
+    assert index.regular and index.sorting == 'inline'
+    assert list(index.inline_traces(12)) == [3, 4, 5]
+    assert list(index.crossline_traces(6)) == [1, 4]
+    assert index.trace_index(12, 7) == 5
+    with pytest.raises(KeyError):
+        index.inline_traces(11)
+    with pytest.raises(KeyError):
+        index.trace_index(10, 8)
+
+
+def test_regular_crossline_sorted_index():
+    inlines = [1, 2, 3, 1, 2, 3]
+    crosslines = [9, 9, 9, 7, 7, 7]
+    index = GeometryIndex(inlines, crosslines)
+
+    assert index.regular and index.sorting == 'crossline'
+    assert list(index.inline_traces(2)) == [1, 4]
+    assert list(index.crossline_traces(7)) == [3, 4, 5]
+    assert index.trace_index(3, 9) == 2
+
+
+def test_irregular_index():
+    inlines = [1, 1, 1, 2, 2, 3]
+    crosslines = [5, 6, 7, 6, 7, 7]
+    index = GeometryIndex(inlines, crosslines)
+
+    assert not index.regular
+    assert index.inline_traces(2) == [3, 4]
+    assert index.crossline_traces(7) == [2, 4, 5]
+    assert index.trace_index(3, 7) == 5
+    with pytest.raises(KeyError):
+        index.trace_index(3, 5)
+
+
+@pytest.mark.parametrize('use_numpy', [False, True])
+def test_segy3d_line_access(make_segy, use_numpy):
+    path = make_segy(trace_count=24, sample_count=5, inline_count=6)
+    sgy = SegY3D(path)
+    sgy.traces.use_numpy = use_numpy
+
+    assert sgy.geometry_index.regular
+    inline = sgy.inline(102)
+    assert [list(t) for t in inline] == [list(t) for t in sgy.traces[12:18]]
+    crossline = sgy.crossline(203)
+    assert [list(t) for t in crossline] == [list(t) for t in sgy.traces[3::6]]
+    assert list(sgy.trace_at(101, 204)) == list(sgy.traces[10])
+
+
+def test_segy3d_irregular_survey(make_segy, tmp_path):
+    def header_func(i, values):
+        # Drop the first crossline of the second inline
+        if i >= 7:
+            i += 1
+        values['INLINE'] = 100 + i // 7
+        values['CROSSLINE'] = 200 + i % 7
+
+    path = make_segy(trace_count=13, sample_count=3, header_func=header_func)
+    sgy = SegY3D(path)
+    index = sgy.build_index(cache=True, cache_dir=tmp_path / 'cache')
+
+    assert not index.regular
+    assert list(sgy.trace_at(101, 201)) == list(sgy.traces[7])
+    assert len(sgy.inline(101)) == 6
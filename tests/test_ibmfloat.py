@@ -0,0 +1,85 @@
+import array
+import struct
+
+import pytest
+from hypothesis import given
+from hypothesis.strategies import booleans, floats, integers, lists, sampled_from, tuples
+
+from quicksegy.internals.ibmfloat import (
+    IBM_MAX_WORD, float_to_ibm, float_to_ibm_array, float_to_ibm_words,
+    ibm_to_float, ibm_to_float_array, ibm_words_to_float
+)
+
+words_strategy = lists(integers(min_value=0, max_value=2**32 - 1), max_size=200)
+# IBM floats with a normalised fraction (top hex digit not 0)
+normalised_words = tuples(
+    integers(min_value=0, max_value=0xff), integers(min_value=1, max_value=0xf),
+    integers(min_value=0, max_value=0xfffff),
+).map(lambda parts: parts[0] << 24 | parts[1] << 20 | parts[2])
+
+
+def test_ibm_to_float_known_values():
+    assert ibm_to_float(0x42640000) == 100.0
+    assert ibm_to_float(0xc276a000) == -118.625
+    assert ibm_to_float(0x00000000) == 0.0
+
+
+@given(words_strategy, sampled_from('<>'), booleans())
+def test_ibm_to_float_array_matches_scalar(words, endian, use_numpy):
+    if use_numpy:
+        pytest.importorskip('numpy')
+    data = struct.pack(f'{endian}{len(words)}I', *words)
+
+    result = ibm_to_float_array(data, endian, use_numpy=use_numpy)
+
+    assert len(result) == len(words)
+    assert result.tolist() == [ibm_to_float(word) for word in words]
+
+
+@given(words_strategy, booleans())
+def test_ibm_to_float_array_float32(words, use_numpy):
+    if use_numpy:
+        pytest.importorskip('numpy')
+    data = struct.pack(f'>{len(words)}I', *words)
+
+    result = ibm_to_float_array(data, '>', 'f', use_numpy=use_numpy)
+    expected = array.array('f', [ibm_to_float(word) for word in words])
+
+    assert list(result) == list(expected)
+
+
+def test_ibm_words_to_float_numpy_input():
+    np = pytest.importorskip('numpy')
+    words = np.array([0x42640000, 0xc276a000], dtype='>u4')
+    result = ibm_words_to_float(words)
+    assert isinstance(result, np.ndarray)
+    assert result.tolist() == [100.0, -118.625]
+
+
+def test_float_to_ibm_known_values():
+    assert float_to_ibm(100.0) == 0x42640000
+    assert float_to_ibm(-118.625) == 0xc276a000
+    assert float_to_ibm(0.0) == float_to_ibm(-0.0) == 0
+    assert float_to_ibm(float('nan')) == 0
+    assert float_to_ibm(float('inf')) == IBM_MAX_WORD
+    assert float_to_ibm(-1e300) == 0x80000000 | IBM_MAX_WORD
+    assert float_to_ibm(1e-300) == 0
+    # Below the smallest normalised value precision is lost gradually
+    assert float_to_ibm(16.0**-66) == 0x00010000
+
+
+@given(lists(normalised_words, max_size=100), booleans())
+def test_float_to_ibm_round_trip(words, use_numpy):
+    if use_numpy:
+        pytest.importorskip('numpy')
+    values = [ibm_to_float(word) for word in words]
+    assert [float_to_ibm(value) for value in values] == words
+    assert list(float_to_ibm_words(values, use_numpy=use_numpy)) == words
+
+
+@given(lists(floats(allow_nan=True, allow_infinity=True), max_size=100), sampled_from('<>'))
+def test_float_to_ibm_array_matches_scalar(values, endian):
+    pytest.importorskip('numpy')
+    expected = struct.pack(f'{endian}{len(values)}I', *[float_to_ibm(v) for v in values])
+    assert float_to_ibm_array(values, endian, use_numpy=True) == expected
+    assert float_to_ibm_array(values, endian, use_numpy=False) == expected
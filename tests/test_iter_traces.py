@@ -0,0 +1,41 @@
+import pytest
+
+from quicksegy.segy import SegY2D, TraceData
+
+
+@pytest.mark.parametrize('chunk_traces', [1, 4, 7, 100])
+@pytest.mark.parametrize('use_numpy', [False, True])
+def test_iter_traces_full_headers(make_segy, chunk_traces, use_numpy):
+    sgy = SegY2D(make_segy(trace_count=17, sample_count=5))
+    expected_headers = sgy.trace_header[:]
+    sgy.traces.use_numpy = use_numpy
+    expected_samples = sgy.traces[:]
+
+    results = list(sgy.iter_traces(chunk_traces, use_numpy=use_numpy))
+    assert len(results) == 17
+    for (header, samples), exp_header, exp_samples in \
+            zip(results, expected_headers, expected_samples):
+        assert header.data == exp_header.data
+        assert list(samples) == list(exp_samples)
+
+
+def test_iter_traces_fields_undecoded(make_segy):
+    sgy = SegY2D(make_segy(trace_count=6, sample_count=3))
+    results = list(sgy.iter_traces(4, fields=['CDP', 'SP'], decode=False))
+
+    assert [header for header, _ in results] == \
+        [{'CDP': 2000 + i, 'SP': 1000 + 5 * i} for i in range(6)]
+    assert all(isinstance(trace, TraceData) for _, trace in results)
+    assert list(results[2][1].data) == list(sgy.traces[2])
+
+
+def test_iter_traces_batches(make_segy):
+    np = pytest.importorskip('numpy')
+    sgy = SegY2D(make_segy(trace_count=10, sample_count=3))
+    batches = list(sgy.iter_traces(4, fields=['CDP'], batches=True))
+
+    assert [len(columns['CDP']) for columns, _ in batches] == [4, 4, 2]
+    cdps = np.concatenate([columns['CDP'] for columns, _ in batches])
+    assert cdps.tolist() == list(range(2000, 2010))
+    samples = np.concatenate([block for _, block in batches])
+    np.testing.assert_array_equal(samples, sgy.traces[:])
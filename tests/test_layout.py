@@ -0,0 +1,113 @@
+import pytest
+
+from quicksegy import write_converted, write_subset
+from quicksegy.segy import SegY3D
+from quicksegy.internals.layout import TraceLayout
+
+LAYOUTS = {
+    'rev1_text': dict(revision=1, extended_text=['extended 1', 'extended 2']),
+    'rev1_variable_text': dict(revision=1, extended_text=['extended', '((SEG: EndText))'],
+                               binary_values={'EXTENDED_TEXT_HEADER_COUNT': -1}),
+    'rev2_trace_headers': dict(revision=2, extended_headers=2),
+    'rev2_offset_trailers': dict(revision=2, extended_text=['extended'], padding=1000,
+                                 extended_headers=1, trailers=2),
+    # Revision 0 files may have junk in the REV 1/2 fields
+    'rev0_junk': dict(revision=0, binary_values={'EXTENDED_TEXT_HEADER_COUNT': 3,
+                                                 'MAX_EXTENDED_TRACE_HEADERS': 7,
+                                                 'FIRST_TRACE_OFFSET': 12345}),
+}
+
+
+def _as_lists(traces):
+    return [list(trace) for trace in traces]
+
+
+@pytest.mark.parametrize('name', list(LAYOUTS))
+@pytest.mark.parametrize('memory_map', [False, True])
+def test_layout_matches_plain_file(make_segy, name, memory_map):
+    kwargs = dict(trace_count=12, sample_count=5, inline_count=4)
+    plain = SegY3D(make_segy('plain.sgy', **kwargs))
+    with SegY3D(make_segy('layout.sgy', **kwargs, **LAYOUTS[name]),
+                memory_map=memory_map) as sgy:
+        assert sgy.trace_count == 12
+        assert [h.data for h in sgy.trace_header[::-5]] == \
+            [h.data for h in plain.trace_header[::-5]]
+        assert sgy.trace_header[[3, 0, 11]][2]['CDP'] == plain.trace_header[11]['CDP']
+        assert sgy.headers_columns(['INLINE', 'CDP'], use_numpy=False) == \
+            plain.headers_columns(['INLINE', 'CDP'], use_numpy=False)
+        assert _as_lists(sgy.traces[1:10:4]) == _as_lists(plain.traces[1:10:4])
+        assert _as_lists(sgy.traces[[7, 2]]) == _as_lists(plain.traces[[7, 2]])
+        assert sgy.sampled_nav(4) == plain.sampled_nav(4)
+
+        for (header, trace), (expected_header, expected) in zip(
+                sgy.iter_traces(chunk_traces=5, use_numpy=False),
+                plain.iter_traces(chunk_traces=5, use_numpy=False)):
+            assert header.data == expected_header.data
+            assert list(trace) == list(expected)
+
+
+def test_layout_offsets(make_segy):
+    path = make_segy(trace_count=6, sample_count=5, **LAYOUTS['rev2_offset_trailers'])
+    layout = SegY3D(path).layout
+
+    assert layout.extended_text_count == 1
+    assert layout.start_offset == 3200 * 2 + 400 + 1000
+    assert layout.header_size == 480
+    assert layout.trace_size == 480 + 20
+    assert layout.trailer_count == 2
+    assert layout.trace_offset(-1) == layout.start_offset + 5 * 500
+    assert layout.data_offset(1) == layout.start_offset + 500 + 480
+    with pytest.raises(IndexError):
+        layout.trace_offset(6)
+
+    assert layout == TraceLayout(20, 6, start_offset=layout.start_offset, extended_headers=1)
+
+
+def test_layout_records(make_segy):
+    np = pytest.importorskip('numpy')
+    kwargs = dict(trace_count=8, sample_count=5, format_code=5)
+    plain = SegY3D(make_segy('plain.sgy', **kwargs))
+    sgy = SegY3D(make_segy('layout.sgy', **kwargs, **LAYOUTS['rev2_offset_trailers']))
+
+    records = sgy.trace_records()
+    assert np.array_equal(records['CDP'], plain.trace_records()['CDP'])
+    assert np.array_equal(records['SAMPLES'], plain.trace_records()['SAMPLES'])
+
+
+def test_layout_bad_offset(make_segy):
+    path = make_segy(trace_count=2, revision=2, binary_values={'FIRST_TRACE_OFFSET': 10**9})
+    with pytest.raises(ValueError):
+        SegY3D(path)
+    sgy = SegY3D(path, binheader_overrides={'FIRST_TRACE_OFFSET': 0})
+    assert sgy.trace_count == 2
+
+
+def test_layout_missing_end_text(make_segy):
+    path = make_segy(trace_count=2, revision=1, extended_text=['no end'],
+                     binary_values={'EXTENDED_TEXT_HEADER_COUNT': -1})
+    with pytest.raises(ValueError):
+        SegY3D(path)
+
+
+@pytest.mark.parametrize('samples', [None, slice(1, 4)])
+def test_layout_write_subset(make_segy, tmp_path, samples):
+    sgy = SegY3D(make_segy(trace_count=10, sample_count=5, **LAYOUTS['rev2_offset_trailers']))
+    out = SegY3D(write_subset(sgy, tmp_path / 'subset.sgy', slice(2, 8), samples))
+
+    assert out.layout.start_offset == sgy.layout.start_offset
+    assert out.layout.header_size == sgy.layout.header_size
+    assert out.layout.trailer_count == 0
+    assert out.trace_count == 6
+    assert [h['CDP'] for h in out.trace_header[:]] == [h['CDP'] for h in sgy.trace_header[2:8]]
+    window = samples if samples else slice(None)
+    assert _as_lists(out.traces[:]) == [trace[window] for trace in _as_lists(sgy.traces[2:8])]
+
+
+def test_layout_write_converted(make_segy, tmp_path):
+    sgy = SegY3D(make_segy(trace_count=10, sample_count=5, **LAYOUTS['rev2_offset_trailers']))
+    out = SegY3D(write_converted(sgy, tmp_path / 'converted.sgy', 5, '<'), endian='<')
+
+    assert out.layout == sgy.layout
+    assert out.layout.trailer_count == 0
+    assert [h.data for h in out.trace_header[:]] == [h.data for h in sgy.trace_header[:]]
+    assert _as_lists(out.traces[:]) == _as_lists(sgy.traces[:])
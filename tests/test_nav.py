@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from quicksegy import SegY2D, SegY3D
+from quicksegy.internals.nav import NavColumns, Nav2D, Nav3D, scale_values
+from quicksegy.segy import Nav2D as SegyNav2D, SegY
+
+
+def scalars(i, values):
+    values['COORDINATE_SCALAR'] = (-100, 0, 10)[i % 3]
+    values['SP_SCALAR'] = (-10, 0, 2)[i % 3]
+
+
+def expected_nav_2d(i):
+    scale = (-100, 0, 10)[i % 3]
+    sp_scale = (-10, 0, 2)[i % 3]
+    x, y = 50000000 + i * 1250, 600000000 + i * 2500
+    sp = 1000 + 5 * i
+    if scale:
+        x, y = (x / -scale, y / -scale) if scale < 0 else (x * scale, y * scale)
+    if sp_scale:
+        sp = sp / -sp_scale if sp_scale < 0 else sp * sp_scale
+    return Nav2D(i + 1, sp, 2000 + i, x, y)
+
+
+def test_scale_values():
+    assert scale_values([10, 10, 10], [-5, 0, 3]) == [2.0, 10, 30]
+    np = pytest.importorskip('numpy')
+    result = scale_values(np.array([10, 10, 10]), np.array([-5, 0, 3]))
+    assert result.tolist() == [2.0, 10.0, 30.0]
+
+    # Without a dividing scalar integers stay integers, as without numpy
+    result = scale_values(np.array([10, 10], dtype=np.int32), np.array([0, 3], dtype=np.int16))
+    assert result.dtype.kind == 'i'
+    assert result.tolist() == scale_values([10, 10], [0, 3]) == [10, 30]
+    assert all(isinstance(value, int) for value in result.tolist())
+
+
+@pytest.mark.parametrize('use_numpy', [False, True])
+def test_nav_integer_types(make_segy, use_numpy):
+    if use_numpy:
+        pytest.importorskip('numpy')
+
+    def positive_scalars(idx, values):
+        values['COORDINATE_SCALAR'] = 10
+        values['SP_SCALAR'] = 0
+
+    sgy = SegY2D(make_segy(trace_count=6, header_func=positive_scalars))
+    point = sgy.sampled_nav(3, use_numpy=use_numpy)[0]
+    assert isinstance(point.x, int) and isinstance(point.sp, int)
+
+
+@pytest.mark.parametrize('use_numpy', [False, True])
+def test_sampled_nav_2d(make_segy, use_numpy):
+    if use_numpy:
+        pytest.importorskip('numpy')
+    sgy = SegY2D(make_segy(trace_count=20, header_func=scalars))
+
+    nav = sgy.sampled_nav(6, use_numpy=use_numpy)
+    assert SegyNav2D is Nav2D
+    assert nav == [expected_nav_2d(i) for i in sgy.sampled_indices(6)]
+    assert nav[-1].trace == 20
+
+    columns = sgy.sampled_nav(6, as_columns=True, use_numpy=use_numpy)
+    assert isinstance(columns, NavColumns)
+    assert len(columns) == len(nav)
+    assert columns.tuples() == nav
+    assert columns.points() == [(point.x, point.y) for point in nav]
+
+
+@pytest.mark.parametrize('use_numpy', [False, True])
+def test_nav_columns_every_trace(make_segy, use_numpy):
+    if use_numpy:
+        pytest.importorskip('numpy')
+    sgy = SegY2D(make_segy(trace_count=20, header_func=scalars))
+    nav = sgy.nav_columns(use_numpy=use_numpy, use_sp_scalar=False)
+    assert list(nav.sp) == [1000 + 5 * i for i in range(20)]
+    assert nav.tuples()[7].x == expected_nav_2d(7).x
+
+    subset = sgy.nav_columns(5, 10, 2, use_numpy=use_numpy)
+    assert subset.tuples() == [expected_nav_2d(i) for i in (5, 7, 9)]
+
+
+def test_sampled_nav_3d(make_segy):
+    sgy = SegY3D(make_segy(trace_count=20, inline_count=5))
+    nav = sgy.sampled_nav(4)
+    assert all(isinstance(point, Nav3D) for point in nav)
+    assert [(point.inline, point.xline) for point in nav] == \
+        [(100 + i // 5, 200 + i % 5) for i in sgy.sampled_indices(4)]
+    assert nav == sgy.nav_columns(step=5).tuples() + sgy.nav_columns(19, 20).tuples()
+
+    sgy.load_headers()
+    assert sgy.sampled_nav(4) == nav
+
+
+def test_nav_needs_survey_kind(make_segy):
+    sgy = SegY(make_segy(trace_count=6))
+    with pytest.raises(TypeError, match='SegY2D or SegY3D'):
+        sgy.nav_columns()
+    with pytest.raises(TypeError, match='SegY2D or SegY3D'):
+        asyncio.new_event_loop().run_until_complete(sgy.sampled_nav_async(3))
@@ -0,0 +1,165 @@
+import array
+
+import pytest
+
+from quicksegy import write_subset
+from quicksegy.segy import SegY2D, SegY3D, VariableTraceHeaderIndexer
+from quicksegy.internals.offsets import SUFFIX, TraceOffsets
+from quicksegy.internals.struct_utils import UINT16, StructPair
+
+from conftest import sample_value
+
+
+def trace_samples(idx):
+    return 3 + idx % 4
+
+
+def expected_trace(idx):
+    return [sample_value(idx, j) for j in range(trace_samples(idx))]
+
+
+@pytest.fixture
+def variable_segy(make_segy):
+    def _make(**kwargs):
+        return make_segy(trace_count=13, sample_count=5, format_code=5, inline_count=4,
+                         trace_samples=trace_samples, **kwargs)
+    return _make
+
+
+@pytest.mark.parametrize('lazy_headers', [False, True])
+def test_variable_length_headers(variable_segy, lazy_headers):
+    sgy = SegY3D(variable_segy(), variable_length=True, lazy_headers=lazy_headers)
+    assert isinstance(sgy.trace_header, VariableTraceHeaderIndexer)
+    assert sgy.trace_count == 13
+    assert sgy.trace_header[-1]['CDP'] == 2012
+    assert [h['SAMPLE_COUNT'] for h in sgy.trace_header[::-3]] == \
+        [trace_samples(i) for i in range(12, -1, -3)]
+    assert list(sgy.headers_columns(['CDP'], 2, 11, 4, use_numpy=False)['CDP']) == \
+        [2002, 2006, 2010]
+    assert [h['CDP'] for h in sgy.trace_header[[9, 0, 4]]] == [2009, 2000, 2004]
+    assert list(sgy.select({'INLINE': 102}, use_numpy=False)) == [8, 9, 10, 11]
+    assert sgy.geometry_index.trace_index(101, 202) == 6
+
+    with pytest.raises(IndexError):
+        sgy.trace_header[13]
+
+
+@pytest.mark.parametrize('use_numpy', [False, True])
+def test_variable_length_traces(variable_segy, use_numpy):
+    if use_numpy:
+        pytest.importorskip('numpy')
+    sgy = SegY3D(variable_segy(), variable_length=True)
+    sgy.traceindexer.use_numpy = use_numpy
+
+    assert list(sgy.traces[5]) == expected_trace(5)
+    assert [list(t) for t in sgy.traces[1:12:5]] == [expected_trace(i) for i in (1, 6, 11)]
+    assert [list(t) for t in sgy.traces[[-1, 2]]] == [expected_trace(12), expected_trace(2)]
+    assert [list(t) for t in sgy.inline(101)] == [expected_trace(i) for i in range(4, 8)]
+
+    offsets = sgy.layout
+    assert [offsets.sample_count(i) for i in range(13)] == [trace_samples(i) for i in range(13)]
+    with pytest.raises(IndexError):
+        sgy.traces[-14]
+
+
+def test_variable_length_layout(variable_segy):
+    path = variable_segy(revision=2, extended_text=['extended'], extended_headers=1, trailers=1)
+    sgy = SegY2D(path, variable_length=True)
+    offsets = sgy.layout
+
+    assert sgy.trace_count == 13
+    assert offsets.start_offset == 3600 + 3200
+    assert offsets.trace_offset(1) == offsets.start_offset + 480 + trace_samples(0) * 4
+    assert offsets.data_offset(1) == offsets.trace_offset(1) + 480
+    assert list(sgy.traces[12]) == expected_trace(12)
+
+
+def test_variable_length_truncated(variable_segy):
+    path = variable_segy()
+    with open(path, 'ab') as f:
+        f.write(bytes(100))
+    assert SegY2D(path, variable_length=True).trace_count == 13
+
+
+def test_variable_length_bad_sample_count(variable_segy):
+    path = variable_segy()
+    offset = SegY2D(path, variable_length=True).layout.trace_offset(5)
+    with open(path, 'r+b') as f:
+        f.seek(offset + 114)
+        f.write((30000).to_bytes(2, 'big'))
+
+    with pytest.warns(UserWarning, match=f'Trace 5 at offset {offset} has 30000 samples') as record:
+        sgy = SegY2D(path, variable_length=True)
+    assert sgy.trace_count == 5
+    # Reported at the SegY call
+    assert record[0].filename == __file__
+
+    with pytest.warns(UserWarning) as record:
+        SegY3D(path, variable_length=True)
+    assert record[0].filename == __file__
+    assert list(sgy.traces[4]) == expected_trace(4)
+
+
+def test_variable_length_unsupported(variable_segy, tmp_path):
+    path = variable_segy()
+    with pytest.raises(ValueError):
+        SegY2D(path, variable_length=True, memory_map=True)
+
+    sgy = SegY2D(path, variable_length=True)
+    with pytest.raises(ValueError):
+        list(sgy.iter_traces())
+    with pytest.raises(ValueError):
+        write_subset(sgy, tmp_path / 'subset.sgy')
+
+
+def test_offset_cache(variable_segy, tmp_path, monkeypatch):
+    path = variable_segy()
+    first = SegY2D(path, variable_length=True, offset_cache=True)
+    assert path.with_name(path.name + SUFFIX).exists()
+
+    def fail(*args, **kwargs):
+        raise AssertionError('offsets should come from the cache')
+
+    monkeypatch.setattr(TraceOffsets, 'from_file', fail)
+    second = SegY2D(path, variable_length=True, offset_cache=True)
+    assert second.layout.offsets == first.layout.offsets
+    assert isinstance(second.layout.offsets, array.array)
+    assert second.trace_header[7]['CDP'] == 2007
+
+    # Different trace header edits need a new index
+    with pytest.raises(AssertionError):
+        SegY2D(path, variable_length=True, offset_cache=True,
+               trheader_edits={'SAMPLE_COUNT': StructPair(114, UINT16)})
+
+    monkeypatch.undo()
+    cache_dir = tmp_path / 'cache'
+    SegY2D(path, variable_length=True, offset_cache=True, offset_cache_dir=cache_dir)
+    assert len(list(cache_dir.glob('*' + SUFFIX))) == 1
+
+
+def test_caches_follow_layout(variable_segy):
+    path = variable_segy(revision=2, extended_headers=1)
+    first = SegY2D(path, variable_length=True, offset_cache=True)
+    first.load_headers(['CDP'], cache=True, use_numpy=False)
+
+    # Without the extended trace header every trace is in a different place,
+    # its fill bytes are read as a SAMPLE_COUNT running past the end of the file
+    overrides = {'MAX_EXTENDED_TRACE_HEADERS': 0}
+    with pytest.warns(UserWarning, match='past the end'):
+        second = SegY2D(path, variable_length=True, offset_cache=True,
+                        binheader_overrides=overrides)
+    assert second.layout.header_size == 240
+    assert second.layout.offsets != first.layout.offsets
+    columns = second.load_headers(['CDP'], cache=True, use_numpy=False)
+    assert len(columns['CDP']) == second.trace_count
+    assert list(columns['CDP']) == \
+        list(second.headerindexer.read_columns(['CDP'], use_numpy=False)['CDP'])
+
+
+def test_offset_cache_unwritable(variable_segy, tmp_path):
+    blocked = tmp_path / 'blocked'
+    blocked.write_bytes(b'')
+    with pytest.warns(UserWarning, match='could not be cached'):
+        sgy = SegY2D(variable_segy(), variable_length=True, offset_cache=True,
+                     offset_cache_dir=blocked)
+    assert sgy.trace_count == 13
@@ -0,0 +1,90 @@
+import pytest
+
+from quicksegy import SegY3D, probe, scan_surveys
+from quicksegy.probe import endian_score, guess_text_encoding
+
+TEXT = 'C 1 CLIENT: QUICKSEGY     LINE: TEST-001'
+
+
+def _replace_text(path, text, encoding):
+    with open(path, 'r+b') as f:
+        f.write(text.ljust(3200).encode(encoding))
+
+
+@pytest.mark.parametrize('endian', ['>', '<'])
+@pytest.mark.parametrize('format_code', [1, 2, 3, 5, 6, 8, 11])
+def test_probe_endian(make_segy, endian, format_code):
+    path = make_segy(trace_count=6, sample_count=7, format_code=format_code, endian=endian,
+                     text=TEXT.encode('ascii'))
+    kwargs = probe(path)
+    assert kwargs == {'endian': endian, 'text_encoding': 'ebcdic-cp-be'}
+
+    sgy = SegY3D(path, **kwargs)
+    assert sgy.trace_count == 6
+    assert sgy.text_header[0].startswith(TEXT)
+
+
+def test_probe_scores(make_segy):
+    path = make_segy(trace_count=6, sample_count=7)
+    filesize = path.stat().st_size
+    with open(path, 'rb') as f:
+        f.seek(3200)
+        binary_data = f.read(400)
+        assert endian_score(f, binary_data, filesize, '<') is None
+        assert endian_score(f, binary_data, filesize, '>') == 7
+
+    # A file that doesn't hold whole traces scores lower
+    with open(path, 'ab') as f:
+        f.write(bytes(10))
+    with open(path, 'rb') as f:
+        assert endian_score(f, binary_data, filesize + 10, '>') == 5
+
+
+@pytest.mark.parametrize('endian', ['>', '<'])
+def test_probe_endian_constant(make_segy, endian):
+    path = make_segy(trace_count=3, endian=endian, revision=2,
+                     binary_values={'ENDIAN_CONSTANT': 0x01020304})
+    with open(path, 'rb') as f:
+        f.seek(3200)
+        binary_data = f.read(400)
+        assert endian_score(f, binary_data, path.stat().st_size, endian) == 100
+    assert probe(path)['endian'] == endian
+
+
+@pytest.mark.parametrize('text, encoding, expected', [
+    (TEXT, 'ascii', 'ascii'),
+    (TEXT + ' SURVEY: CAFÉ', 'latin-1', 'latin-1'),
+    (TEXT + ' SURVEY: CAFÉ', 'cp037', 'ebcdic-cp-be'),
+])
+def test_probe_text_encoding(make_segy, text, encoding, expected):
+    path = make_segy(trace_count=3)
+    _replace_text(path, text, encoding)
+    kwargs = probe(path)
+    assert kwargs['text_encoding'] == expected
+    assert SegY3D(path, **kwargs).text_header[0].startswith(TEXT)
+
+
+def test_guess_text_encoding_empty():
+    assert guess_text_encoding(bytes(3200)) == 'ebcdic-cp-be'
+
+
+def test_probe_not_segy(make_segy, tmp_path):
+    path = make_segy(trace_count=3, binary_values={'SAMPLE_FORMAT_CODE': 99})
+    with pytest.raises(ValueError):
+        probe(path)
+
+    small = tmp_path / 'small.sgy'
+    small.write_bytes(bytes(1000))
+    with pytest.raises(ValueError):
+        probe(small)
+
+
+def test_scan_surveys_detect_format(make_segy):
+    path = make_segy(trace_count=12, inline_count=4, endian='<')
+    _replace_text(path, TEXT, 'ascii')
+    result, = scan_surveys([path], kind='3d', count=3, workers=1, detect_format=True)
+    assert result.error is None
+    assert result.nav == SegY3D(path, endian='<').sampled_nav(3)
+
+    result, = scan_surveys([path], kind='3d', count=3, workers=1)
+    assert result.error is not None
@@ -0,0 +1,59 @@
+import pytest
+
+from quicksegy import SegY2D
+from quicksegy.internals.query import Condition, HeaderFilter
+
+
+def trace_id(i, values):
+    values['TRACE_ID_CODE'] = 2 if i % 3 == 0 else 1
+
+
+@pytest.mark.parametrize('use_numpy', [False, True])
+@pytest.mark.parametrize('chunk_traces', [1, 7, 1000])
+@pytest.mark.parametrize('memory_map', [False, True])
+def test_select(make_segy, use_numpy, chunk_traces, memory_map):
+    if use_numpy:
+        pytest.importorskip('numpy')
+    path = make_segy(trace_count=30, header_func=trace_id)
+    with SegY2D(path, memory_map=memory_map) as sgy:
+        def select(where):
+            return list(sgy.select(where, chunk_traces=chunk_traces, use_numpy=use_numpy))
+
+        assert select({'TRACE_ID_CODE': 1, 'CDP': (2005, 2012)}) == \
+            [5, 7, 8, 10, 11]
+        assert select({'CDP': (None, 2002)}) == [0, 1, 2]
+        assert select({'CDP': (2027, None)}) == [27, 28, 29]
+        assert select({'SP': {1000, 1010, 9999}}) == [0, 2]
+        assert select({'CDP': lambda column: [value % 10 == 0 for value in column]}) == \
+            [0, 10, 20]
+        assert select({'CDP': 1}) == []
+
+
+def test_select_batches_and_indexers(make_segy):
+    np = pytest.importorskip('numpy')
+    sgy = SegY2D(make_segy(trace_count=30, header_func=trace_id))
+    batches = list(sgy.select({'TRACE_ID_CODE': 2}, chunk_traces=10, batches=True))
+    assert [batch.tolist() for batch in batches] == [[0, 3, 6, 9], [12, 15, 18], [21, 24, 27]]
+
+    indices = np.concatenate(batches)
+    headers = sgy.trace_header[indices]
+    assert [header.CDP for header in headers] == [2000 + i for i in range(0, 30, 3)]
+    np.testing.assert_array_equal(sgy.traces[indices], sgy.traces[::3])
+
+
+def test_select_loaded(make_segy):
+    sgy = SegY2D(make_segy(trace_count=12))
+    sgy.load_headers(['CDP'])
+    assert list(sgy.select({'CDP': (2003, 2005)}, chunk_traces=2)) == [3, 4, 5]
+    # Keys that are not loaded are read from the file
+    assert list(sgy.select({'CDP': (2003, 2005), 'SP': 1020})) == [4]
+
+
+def test_condition_errors():
+    with pytest.raises(ValueError):
+        Condition('CDP', (1, 2, 3))
+    with pytest.raises(TypeError):
+        Condition('CDP', 'text')
+    with pytest.raises(ValueError):
+        HeaderFilter({})
+    assert HeaderFilter({'CDP': 1, 'SP': {2}}).keys == ['CDP', 'SP']
@@ -0,0 +1,137 @@
+import pickle
+
+import pytest
+
+from quicksegy.segy import (
+    SegY2D, SegY3D, LazyTraceHeader, MmapTraceHeaderIndexer, TraceHeader, TraceHeaderIndexer
+)
+from quicksegy.internals.struct_utils import StructPair
+
+
+@pytest.mark.parametrize('cls', [SegY2D, SegY3D])
+@pytest.mark.parametrize('endian', ['>', '<'])
+def test_mmap_indexer_matches_file_indexer(make_segy, cls, endian):
+    path = make_segy(trace_count=25, inline_count=5, endian=endian)
+
+    plain = cls(path, endian=endian)
+    with cls(path, endian=endian, memory_map=True) as mapped:
+        assert isinstance(plain.trace_header, TraceHeaderIndexer)
+        assert isinstance(mapped.trace_header, MmapTraceHeaderIndexer)
+        assert mapped.trace_count == 25
+
+        for expected, actual in zip(plain.trace_header[::3], mapped.trace_header[::3]):
+            assert expected.data == actual.data
+
+        assert mapped.trace_header[-1]['TRACE_NO_LINE'] == 25
+        assert mapped.trace_header[7].INLINE == 101
+        assert mapped.sampled_nav(5) == plain.sampled_nav(5)
+
+
+def test_mmap_indexer_bounds(make_segy):
+    path = make_segy(trace_count=4)
+    with SegY2D(path, memory_map=True) as sgy:
+        with pytest.raises(IndexError):
+            sgy.trace_header[4]
+        with pytest.raises(IndexError):
+            sgy.trace_header[-5]
+        with pytest.raises(TypeError):
+            sgy.trace_header[1.0]
+
+
+def test_mmap_indexer_close(make_segy):
+    path = make_segy(trace_count=4)
+    sgy = SegY2D(path, memory_map=True)
+    assert sgy.trace_header[0]['CDP'] == 2000
+    sgy.close()
+    assert sgy.trace_header._buffer is None
+    # The map is recreated on the next access
+    assert sgy.trace_header[1]['CDP'] == 2001
+    sgy.close()
+
+
+def test_trace_header_record(make_segy):
+    path = make_segy(trace_count=3)
+    with open(path, 'rb') as f:
+        f.seek(3600)
+        data = f.read(240)
+
+    header = TraceHeader(data)
+    assert not hasattr(header, '__dict__')
+    assert isinstance(header, TraceHeader)
+    assert header['CDP'] == header.CDP == 2000
+    assert header.data['CDP_X'] == 50000000
+    assert len(header.data) == len(TraceHeader.STRUCT_DICT)
+    assert str(header) == str(header.data)
+    with pytest.raises(KeyError):
+        header['NOT_A_KEY']
+    with pytest.raises(AttributeError):
+        header.NOT_A_KEY
+
+    edits = {'ALT_CDP': StructPair(20, 'i')}
+    edited = TraceHeader(data, edits)
+    assert edited.ALT_CDP == edited.CDP == 2000
+    assert type(edited) is TraceHeader.record_type(dict(edits))
+    assert type(edited) is not type(header)
+    assert type(TraceHeader(data)) is type(header)
+
+
+def test_trace_header_record_pickle(make_segy):
+    path = make_segy(trace_count=3)
+    edits = {'ALT_CDP': StructPair(20, 'i')}
+    header = SegY2D(path, trheader_edits=edits).trace_header[1]
+    restored = pickle.loads(pickle.dumps(header))
+    assert type(restored) is type(header)
+    assert restored.data == header.data
+
+
+def test_lazy_trace_header(make_segy):
+    path = make_segy(trace_count=3)
+    with open(path, 'rb') as f:
+        f.seek(3600)
+        data = f.read(240)
+
+    eager = TraceHeader(data)
+    header = LazyTraceHeader(memoryview(data))
+    assert isinstance(header, LazyTraceHeader)
+    assert isinstance(header, TraceHeader)
+    assert not hasattr(header, '__dict__')
+    assert type(header) is not type(eager)
+
+    assert header._cache == {}
+    assert header['CDP'] == header.CDP == 2000
+    assert header._cache == {'CDP': 2000}
+    assert header.data == eager.data
+    assert str(header) == str(eager)
+    with pytest.raises(KeyError):
+        header['NOT_A_KEY']
+    with pytest.raises(AttributeError):
+        header.NOT_A_KEY
+
+    edits = {'ALT_CDP': StructPair(20, 'i'), 'IBM_VALUE': StructPair(180, 'I', ibm_float=True)}
+    edited = LazyTraceHeader(data, edits, '>')
+    assert edited.ALT_CDP == 2000
+    assert edited.IBM_VALUE == TraceHeader(data, edits).IBM_VALUE != 0
+
+    restored = pickle.loads(pickle.dumps(edited))
+    assert type(restored) is type(edited)
+    assert restored.data == edited.data
+
+
+@pytest.mark.parametrize('memory_map', [False, True])
+def test_lazy_headers_from_segy(make_segy, memory_map):
+    path = make_segy(trace_count=12, inline_count=4)
+    plain = SegY3D(path)
+    sgy = SegY3D(path, memory_map=memory_map, lazy_headers=True)
+
+    headers = sgy.trace_header[::2] + [sgy.trace_header[5]]
+    assert all(isinstance(header, LazyTraceHeader) for header in headers)
+    expected = plain.trace_header[::2] + [plain.trace_header[5]]
+    assert [h.data for h in headers] == [h.data for h in expected]
+    assert sgy.sampled_nav(4) == plain.sampled_nav(4)
+
+    iterated = [header for header, _ in sgy.iter_traces(5, decode=False)]
+    assert [h.CDP for h in iterated] == list(range(2000, 2012))
+
+    # Lazy headers don't hold on to the memory map
+    sgy.close()
+    assert headers[3].INLINE == 101
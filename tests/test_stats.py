@@ -0,0 +1,146 @@
+import pickle
+
+import pytest
+
+from quicksegy import IOStats, SegY2D, SegY3D, scan_surveys, write_converted, write_subset
+from quicksegy.internals.fileio import HAS_PREAD
+from quicksegy.internals.stats import COUNTERS, decoding
+
+
+def test_stats_header_reads(make_segy):
+    stats = IOStats()
+    sgy = SegY3D(make_segy(trace_count=20, sample_count=8, inline_count=4), stats=stats)
+    assert sgy.trace_header.stats is stats
+    assert stats.opens == 1 and stats.bytes_read >= 3600
+
+    stats.reset()
+    assert sgy.trace_header[3]['CDP'] == 2003
+    assert stats.as_dict()['opens'] == 1
+    assert (stats.reads, stats.bytes_read, stats.headers_decoded) == (1, 240, 1)
+    if HAS_PREAD:
+        assert stats.seeks == 0
+
+    stats.reset()
+    sgy.headers_columns(['CDP'], use_numpy=False)
+    assert stats.headers_decoded == 20
+    assert stats.samples_decoded == 0
+    assert stats.times['decode_headers'] > 0
+
+
+@pytest.mark.parametrize('use_numpy', [False, True])
+def test_stats_traces(make_segy, use_numpy):
+    if use_numpy:
+        pytest.importorskip('numpy')
+    stats = IOStats()
+    sgy = SegY2D(make_segy(trace_count=10, sample_count=8), stats=stats)
+    sgy.traceindexer.use_numpy = use_numpy
+    stats.reset()
+
+    sgy.traces[2:6]
+    assert stats.samples_decoded == 32
+    assert stats.bytes_read == 3 * (240 + 32) + 240 + 32
+    assert stats.times['read'] > 0
+
+    stats.reset()
+    list(sgy.iter_traces(chunk_traces=4, use_numpy=use_numpy))
+    assert (stats.opens, stats.seeks, stats.reads) == (1, 1, 3)
+    assert stats.headers_decoded == 10
+    assert stats.samples_decoded == 80
+
+
+def test_stats_undecoded_traces(make_segy):
+    stats = IOStats()
+    sgy = SegY2D(make_segy(trace_count=4, sample_count=5), stats=stats)
+    traces = [trace for _, trace in sgy.iter_traces(decode=False)]
+    assert stats.samples_decoded == 0
+    traces[1].data
+    assert stats.samples_decoded == 5
+
+
+def test_stats_hooks(make_segy):
+    events = []
+    stats = IOStats(hooks=[lambda name, value: events.append((name, value))])
+    sgy = SegY2D(make_segy(trace_count=4), stats=stats)
+    assert ('opens', 1) in events
+
+    del events[:]
+    sgy.trace_header[0]
+    names = [name for name, _ in events]
+    assert ('bytes_read', 240) in events
+    assert {'read_time', 'decode_headers_time', 'headers_decoded'} <= set(names)
+
+    other = []
+    stats.add_hook(lambda name, value: other.append(name))
+    stats.remove_hook(stats.hooks[0])
+    sgy.trace_header[1]
+    assert len(other) == len(events)
+
+
+def test_stats_variable_length_and_mmap(make_segy):
+    path = make_segy(trace_count=6, sample_count=5, format_code=5,
+                     trace_samples=lambda idx: 2 + idx)
+    stats = IOStats()
+    sgy = SegY2D(path, variable_length=True, stats=stats)
+    assert stats.headers_decoded == 0 and stats.reads > 2
+    stats.reset()
+    sgy.traces[[1, 4]]
+    assert stats.samples_decoded == 3 + 6
+    assert stats.reads == 2
+
+    stats.reset()
+    with SegY2D(make_segy('fixed.sgy', trace_count=4), memory_map=True, stats=stats) as sgy:
+        sgy.trace_header[0]
+        sgy.trace_header[1]
+    assert stats.opens == 2
+    assert stats.headers_decoded == 2
+
+
+def test_stats_disabled(make_segy):
+    sgy = SegY2D(make_segy(trace_count=4))
+    assert sgy.stats is None
+    assert sgy.trace_header.stats is None and sgy.traceindexer.stats is None
+    with decoding(None, 'headers', 1) as result:
+        assert result is None
+
+
+def test_stats_counters():
+    stats = IOStats()
+    stats.count('reads', 3)
+    with stats.timed('decode_samples'):
+        pass
+    values = stats.as_dict()
+    assert set(COUNTERS) < set(values)
+    assert values['reads'] == 3 and values['decode_samples_time'] >= 0
+    assert 'reads=3' in repr(stats)
+    with pytest.raises(AttributeError):
+        stats.missing
+
+
+def test_stats_writers(make_segy, tmp_path):
+    stats = IOStats()
+    sgy = SegY2D(make_segy(trace_count=10, sample_count=8), stats=stats)
+
+    stats.reset()
+    write_subset(sgy, tmp_path / 'subset.sgy', range(0, 10, 2))
+    assert stats.opens == 1
+    assert stats.bytes_read == 3600 + 5 * (240 + 32)
+
+    stats.reset()
+    write_converted(sgy, tmp_path / 'converted.sgy', endian='<')
+    assert stats.bytes_read == 3600 + 10 * (240 + 32)
+    assert stats.samples_decoded == 80
+
+
+def test_stats_pickle(make_segy):
+    stats = IOStats()
+    stats.count('reads', 2)
+    copy = pickle.loads(pickle.dumps(stats))
+    copy.count('reads')
+    assert (stats.reads, copy.reads) == (2, 3)
+
+    # Can be passed to SegY objects opened in worker processes
+    path = make_segy(trace_count=6)
+    result, = scan_surveys([path], kind='2d', count=3, workers=2,
+                           segy_kwargs={'stats': stats})
+    assert result.error is None
+    assert result.nav == SegY2D(path).sampled_nav(3)
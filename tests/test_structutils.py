@@ -58,3 +58,50 @@ def test_multistruct_unpack(demo_multi, demo_data):
     }
 
     assert demo_multi.unpack(demo_data) == expected
+
+
+def test_multistruct_flat_plan(demo_multi):
+    assert demo_multi.flat_struct.format == '>BhfQ4xlHd'
+    assert demo_multi.overlaps == []
+    assert demo_multi.names == ['v1', 'v2', 'v3', 'v4', 'v5', 'v6', 'v7']
+
+
+def test_multistruct_unpack_tuple(demo_multi, demo_data):
+    padded = b'\x00' * 5 + demo_data
+    assert demo_multi.unpack_tuple(padded, offset=5) == (2, -4, 0.5, 2**40, -2**20, 16, 10.25)
+
+
+def test_multistruct_overlaps_and_order(demo_data):
+    struct_dict = {
+        'v5': StructPair(19, 'l'),
+        'v1': StructPair(0, 'B'),
+        'v2_low': StructPair(2, 'B'),
+        'v2': StructPair(1, 'h'),
+        'v4': StructPair(7, 'Q'),
+    }
+    ms = MultiStruct(struct_dict)
+
+    assert ms.flat_struct.format == '>Bh4xQ4xl'
+    assert [section.names for section in ms.overlaps] == [['v2_low']]
+    assert ms.unpack(demo_data) == {
+        'v1': 2,
+        'v2': -4,
+        'v2_low': 0xfc,
+        'v4': 2**40,
+        'v5': -2**20,
+    }
+
+
+def test_multistruct_key_order(demo_data):
+    # Keys out of offset order, including an overlapping field
+    struct_dict = {
+        'v5': StructPair(19, 'l'),
+        'v1': StructPair(0, 'B'),
+        'v2_low': StructPair(2, 'B'),
+        'v2': StructPair(1, 'h'),
+    }
+    ms = MultiStruct(struct_dict)
+    values = ms.unpack(demo_data)
+    assert list(values) == ['v5', 'v1', 'v2_low', 'v2']
+    assert values == {'v5': -2**20, 'v1': 2, 'v2_low': 0xfc, 'v2': -4}
+    assert ms.unpack_tuple(demo_data)[ms.index['v2']] == -4
@@ -0,0 +1,93 @@
+import array
+import random
+
+import pytest
+
+from quicksegy.segy import SegY3D
+from quicksegy.internals.summary import EXACT_LIMIT, DistinctCounter, FieldSummary
+
+
+@pytest.mark.parametrize('use_numpy', [False, True])
+def test_header_summary(make_segy, use_numpy):
+    if use_numpy:
+        pytest.importorskip('numpy')
+
+    def edit(idx, values):
+        values['SOURCE_X'] = (idx * 7) % 5
+
+    path = make_segy(trace_count=30, inline_count=6, header_func=edit)
+    sgy = SegY3D(path)
+    summary = sgy.header_summary(chunk_traces=7, use_numpy=use_numpy)
+
+    assert summary.trace_count == 30
+    assert len(summary) == len(sgy.trace_header.struct_dict)
+    cdp = summary['CDP']
+    assert (cdp.minimum, cdp.maximum, cdp.distinct) == (2000, 2029, 30)
+    assert cdp.increasing and not cdp.decreasing and cdp.distinct_exact
+
+    assert summary['INLINE'].increasing
+    assert summary['INLINE'].distinct == 5
+    assert summary['CROSSLINE'].distinct == 6
+    assert set(summary.unsorted_fields()) == {'CROSSLINE', 'SOURCE_X'}
+
+    constant = summary.constant_fields()
+    assert constant['COORDINATE_SCALAR'] == -100
+    assert constant['TRACE_ID_CODE'] == 1
+    assert 'CDP' not in constant
+    assert summary.as_dict()['SOURCE_X'] == {
+        'count': 30, 'min': 0, 'max': 4, 'distinct': 5, 'distinct_exact': True,
+        'increasing': False, 'decreasing': False,
+    }
+    assert 'COORDINATE_SCALAR' in str(summary)
+
+
+def test_header_summary_fields_and_loaded(make_segy):
+    sgy = SegY3D(make_segy(trace_count=12, inline_count=4))
+    sgy.load_headers(['INLINE', 'CDP_X'], use_numpy=False)
+    summary = sgy.header_summary(['INLINE', 'CDP_X'])
+    assert list(summary) == ['INLINE', 'CDP_X']
+    assert summary['CDP_X'].increasing
+    assert summary['INLINE'].maximum == 102
+
+
+def test_field_summary_order_across_chunks():
+    summary = FieldSummary('KEY')
+    summary.add(array.array('i', [5, 4, 4]))
+    assert summary.decreasing and not summary.increasing
+    summary.add(array.array('i', [6]))
+    assert not summary.decreasing
+    assert (summary.minimum, summary.maximum, summary.count) == (4, 6, 4)
+
+
+def test_field_summary_unsigned():
+    np = pytest.importorskip('numpy')
+    summary = FieldSummary('KEY')
+    summary.add(np.array([3, 1, 2], dtype=np.uint16))
+    assert not summary.increasing and not summary.decreasing
+
+
+@pytest.mark.parametrize('use_numpy', [False, True])
+def test_distinct_counter_estimate(use_numpy):
+    if use_numpy:
+        np = pytest.importorskip('numpy')
+    rng = random.Random(1)
+    values = [rng.randrange(-2**31, 2**31) for _ in range(50000)]
+
+    counter = DistinctCounter()
+    for start in range(0, len(values), 4096):
+        chunk = values[start:start + 4096]
+        counter.add(np.array(chunk) if use_numpy else array.array('i', chunk))
+
+    assert not counter.is_exact
+    assert len(counter.registers) == 4096
+    assert abs(counter.count() - len(set(values))) < 0.05 * len(set(values))
+
+
+def test_distinct_counter_numpy_matches_python():
+    np = pytest.importorskip('numpy')
+    values = [i * 0.5 for i in range(3 * EXACT_LIMIT)] + [float(i) for i in range(100)]
+    python, numpy = DistinctCounter(), DistinctCounter()
+    python.add(array.array('d', values))
+    numpy.add(np.array(values))
+    assert python.registers == numpy.registers
+    assert python.count() == numpy.count()
@@ -0,0 +1,39 @@
+import pytest
+
+from quicksegy import SegY2D, SegY3D, scan_surveys
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_scan_surveys(make_segy, tmp_path, workers):
+    paths = [make_segy(f'line_{i}.sgy', trace_count=10 + i) for i in range(5)]
+    bad_path = tmp_path / 'missing.sgy'
+
+    results = list(scan_surveys(paths + [bad_path], kind='2d', count=4,
+                                workers=workers, max_pending=2))
+
+    assert sorted(str(r.path) for r in results) == sorted(str(p) for p in paths + [bad_path])
+    by_path = {r.path: r for r in results}
+
+    assert isinstance(by_path[bad_path].error, FileNotFoundError)
+    for path in paths:
+        assert by_path[path].error is None
+        assert by_path[path].nav == SegY2D(path).sampled_nav(4)
+
+
+def test_scan_surveys_3d_kwargs(make_segy):
+    path = make_segy(trace_count=12, inline_count=4)
+    result, = scan_surveys([path], kind='3d', count=3, workers=1,
+                           nav_kwargs={'trace_loc': 'TRACE_NO_FILE'})
+    assert result.nav == SegY3D(path).sampled_nav(3, trace_loc='TRACE_NO_FILE')
+
+
+def test_scan_surveys_bad_kind():
+    # Checked when called, not when the results are first iterated
+    with pytest.raises(ValueError):
+        scan_surveys([], kind='4d')
+
+
+@pytest.mark.parametrize('options', [{'max_pending': 0}, {'workers': -1}])
+def test_scan_surveys_bad_options(make_segy, options):
+    with pytest.raises(ValueError):
+        scan_surveys([make_segy(trace_count=3)], kind='2d', **options)
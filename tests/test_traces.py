@@ -0,0 +1,89 @@
+import array
+
+import pytest
+
+from quicksegy.segy import SegY2D, TraceData, TraceDataIndexer
+from quicksegy.internals.fileio import PositionalReader
+
+from conftest import sample_value
+
+
+def expected_trace(idx, sample_count, format_code):
+    values = [sample_value(idx, j) for j in range(sample_count)]
+    if format_code not in (1, 5, 6):
+        values = [int(v * 4) for v in values]
+    return values
+
+
+@pytest.mark.parametrize('format_code', [1, 2, 3, 5, 6, 8, 11])
+@pytest.mark.parametrize('endian', ['>', '<'])
+@pytest.mark.parametrize('use_numpy', [False, True])
+def test_traces_indexing(make_segy, format_code, endian, use_numpy):
+    path = make_segy(trace_count=15, sample_count=6, format_code=format_code, endian=endian)
+    sgy = SegY2D(path, endian=endian)
+    traces = TraceDataIndexer(sgy.filepath, sgy.trace_size, sgy.trace_count,
+                              sgy.sample_format, endian, use_numpy=use_numpy)
+
+    assert list(traces[3]) == expected_trace(3, 6, format_code)
+    assert list(traces[-1]) == expected_trace(14, 6, format_code)
+
+    for selection, indices in [
+        (slice(None), range(15)),
+        (slice(2, 11, 3), range(2, 11, 3)),
+        (slice(None, None, -4), range(14, -1, -4)),
+        ([7, 8, 9, 2, 3, -1], [7, 8, 9, 2, 3, 14]),
+        (slice(5, 5), []),
+    ]:
+        result = traces[selection]
+        assert len(result) == len(indices)
+        if not use_numpy:
+            assert all(isinstance(trace, array.array) for trace in result)
+        assert [list(trace) for trace in result] == \
+            [expected_trace(i, 6, format_code) for i in indices]
+
+
+def test_traces_default_indexer(make_segy):
+    np = pytest.importorskip('numpy')
+    sgy = SegY2D(make_segy(trace_count=5, sample_count=4))
+    result = sgy.traces[1:4]
+    assert isinstance(result, np.ndarray)
+    assert result.shape == (3, 4)
+    assert result.dtype == np.float64
+
+
+def test_traces_bulk_read_count(make_segy, monkeypatch):
+    sgy = SegY2D(make_segy(trace_count=40, sample_count=4))
+    reads = []
+    original = PositionalReader.readv
+
+    def counting_readv(self, buffers, offset):
+        reads.append(offset)
+        return original(self, buffers, offset)
+
+    monkeypatch.setattr(PositionalReader, 'readv', counting_readv)
+    sgy.traces[5:30]
+    assert len(reads) == 1
+    reads.clear()
+    sgy.traces.max_gap = 0
+    sgy.traces[[1, 2, 3, 10, 11]]
+    assert len(reads) == 2
+    reads.clear()
+    sgy.traces.max_gap = 2**16
+    sgy.traces[[11, 1, 2, 3, 10]]
+    assert len(reads) == 1
+
+
+def test_traces_errors(make_segy):
+    sgy = SegY2D(make_segy(trace_count=5, sample_count=4))
+    with pytest.raises(IndexError):
+        sgy.traces[5]
+    with pytest.raises(IndexError):
+        sgy.traces[[0, 9]]
+    with pytest.raises(TypeError):
+        sgy.traces['a']
+
+
+def test_tracedata_typed_array():
+    data = TraceData(bytes.fromhex('42640000c276a000'), format_code=1, endian='>')
+    assert isinstance(data.data, array.array)
+    assert list(data.data) == [100.0, -118.625]
@@ -0,0 +1,145 @@
+import pytest
+
+from quicksegy import SegY2D, SegY3D, write_converted, write_subset
+from quicksegy.internals import fileio
+from quicksegy.writer import _runs
+
+
+def timing(i, values):
+    values['SAMPLE_INTERVAL'] = 4000
+    values['DELAY_RECORDING_TIME'] = 100
+
+
+def test_runs():
+    assert list(_runs(range(0, 10), 4)) == [range(0, 4), range(4, 8), range(8, 10)]
+    assert list(_runs([1, 2, 3, 7, 8, 2], 2)) == \
+        [range(1, 3), range(3, 4), range(7, 9), range(2, 3)]
+    assert list(_runs([], 5)) == []
+
+
+@pytest.mark.parametrize('zero_copy', [True, False])
+def test_write_whole_traces(make_segy, tmp_path, monkeypatch, zero_copy):
+    if not zero_copy:
+        monkeypatch.setattr(fileio.os, 'copy_file_range', None, raising=False)
+        monkeypatch.setattr(fileio.os, 'sendfile', None, raising=False)
+    path = make_segy(trace_count=20, inline_count=5)
+    sgy = SegY3D(path)
+
+    out = write_subset(sgy, tmp_path / 'out.sgy', [5, 6, 7, 8, 9, 15, 0], chunk_bytes=1)
+    subset = SegY3D(out)
+    assert subset.trace_count == 7
+    assert str(subset.text_header) == str(sgy.text_header)
+    assert [h.CDP for h in subset.trace_header[:]] == [2005, 2006, 2007, 2008, 2009, 2015, 2000]
+    assert list(subset.traces[5]) == list(sgy.traces[15])
+
+    out = write_subset(sgy, tmp_path / 'inline.sgy', sgy.geometry_index.inline_traces(102))
+    assert [h.INLINE for h in SegY3D(out).trace_header[:]] == [102] * 5
+    assert (tmp_path / 'inline.sgy').read_bytes()[3600:] == \
+        path.read_bytes()[3600 + 10 * 280:3600 + 15 * 280]
+
+
+@pytest.mark.parametrize('format_code', [1, 3, 6, 8])
+def test_write_sample_window(make_segy, tmp_path, format_code):
+    path = make_segy(trace_count=10, sample_count=12, format_code=format_code,
+                     header_func=timing)
+    sgy = SegY2D(path)
+
+    out = write_subset(sgy, tmp_path / 'out.sgy', slice(1, None, 2), slice(2, 11, 3))
+    subset = SegY2D(out)
+    assert subset.trace_count == 5
+    assert subset.samples_per_trace == 3
+    assert subset.binary_header['SAMPLE_FORMAT_CODE'] == format_code
+
+    header = subset.trace_header[1]
+    assert header.CDP == 2003
+    assert header.SAMPLE_COUNT == 3
+    assert header.SAMPLE_INTERVAL == 12000
+    assert header.DELAY_RECORDING_TIME == 108
+    assert list(subset.traces[1]) == list(sgy.traces[3])[2:11:3]
+
+
+def test_write_header_updates(make_segy, tmp_path):
+    sgy = SegY2D(make_segy(trace_count=10))
+    out = write_subset(sgy, tmp_path / 'out.sgy', sgy.select({'CDP': (2004, 2006)}),
+                       header_updates=lambda new, old: {'TRACE_NO_LINE': new + 1, 'SP': old})
+    headers = SegY2D(out).trace_header[:]
+    assert [(h.TRACE_NO_LINE, h.SP, h.CDP) for h in headers] == \
+        [(1, 4, 2004), (2, 5, 2005), (3, 6, 2006)]
+    assert list(SegY2D(out).traces[0]) == list(sgy.traces[4])
+
+
+def test_write_errors(make_segy, tmp_path):
+    path = make_segy(trace_count=4, sample_count=5)
+    sgy = SegY2D(path)
+    with pytest.raises(ValueError):
+        write_subset(sgy, path)
+    with pytest.raises(IndexError):
+        write_subset(sgy, tmp_path / 'out.sgy', [4])
+    with pytest.raises(IndexError):
+        write_subset(sgy, tmp_path / 'out.sgy', samples=range(3, 6))
+    with pytest.raises(ValueError):
+        write_subset(sgy, tmp_path / 'out.sgy', samples=slice(3, 3))
+
+
+def test_write_timing_out_of_range(make_segy, tmp_path):
+    sgy = SegY2D(make_segy(trace_count=4, sample_count=40, header_func=timing))
+    out = tmp_path / 'out.sgy'
+    with pytest.raises(ValueError, match='SAMPLE_INTERVAL of 36000'):
+        write_subset(sgy, out, samples=slice(0, 40, 9))
+    assert list(tmp_path.iterdir()) == [sgy.filepath]
+    write_subset(sgy, out, samples=slice(0, 40, 8))
+    assert SegY2D(out).trace_header[0].SAMPLE_INTERVAL == 32000
+
+
+def test_write_failure_keeps_target(make_segy, tmp_path):
+    sgy = SegY2D(make_segy(trace_count=4))
+    out = tmp_path / 'out.sgy'
+    out.write_bytes(b'previous')
+
+    def fail(new, old):
+        if new == 2:
+            raise RuntimeError('failed')
+        return {}
+
+    with pytest.raises(RuntimeError):
+        write_subset(sgy, out, header_updates=fail)
+    assert out.read_bytes() == b'previous'
+    assert sorted(tmp_path.iterdir()) == sorted([sgy.filepath, out])
+
+
+@pytest.mark.parametrize('use_numpy', [False, True])
+@pytest.mark.parametrize('source, target', [
+    ((1, '>'), (5, '<')),
+    ((5, '<'), (1, '>')),
+    ((1, '>'), (1, '<')),
+    ((3, '>'), (2, '>')),
+    ((6, '<'), (1, '>')),
+    ((2, '<'), (6, '>')),
+])
+def test_write_converted(make_segy, tmp_path, use_numpy, source, target):
+    if use_numpy:
+        pytest.importorskip('numpy')
+    (src_format, src_endian), (dst_format, dst_endian) = source, target
+    sgy = SegY2D(make_segy(trace_count=11, sample_count=7, format_code=src_format,
+                           endian=src_endian), endian=src_endian)
+
+    out = write_converted(sgy, tmp_path / 'out.sgy', dst_format, dst_endian,
+                          chunk_traces=4, use_numpy=use_numpy)
+    converted = SegY2D(out, endian=dst_endian)
+    assert converted.sample_format == dst_format
+    assert converted.trace_count == 11
+    assert str(converted.text_header) == str(sgy.text_header)
+    assert converted.binary_header['SAMPLES_PER_TRACE'] == 7
+    for original, header in zip(sgy.trace_header[:], converted.trace_header[:]):
+        assert header.data == original.data
+
+    for i in (0, 5, 10):
+        assert list(converted.traces[i]) == list(sgy.traces[i])
+
+
+def test_write_converted_clips_integers(make_segy, tmp_path):
+    sgy = SegY2D(make_segy(trace_count=300, sample_count=4, format_code=5))
+    out = write_converted(sgy, tmp_path / 'out.sgy', 8, use_numpy=False)
+    values = list(SegY2D(out).traces[299])
+    assert values == [127, 127, 127, 127]
+    assert list(SegY2D(out).traces[0]) == [0, 1, 1, 1]